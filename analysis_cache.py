@@ -0,0 +1,75 @@
+# Bounded, thread-safe LRU cache with hit/miss counters
+# Used for whole-sentence results in the app (shared across sessions) and for
+# per-token labels in analyzer.py
+
+import os
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+# sizes can be overridden through the environment
+SENTENCE_CACHE_SIZE = int(os.environ.get("LING_SENTENCE_CACHE_SIZE", 2048))
+TOKEN_CACHE_SIZE = int(os.environ.get("LING_TOKEN_CACHE_SIZE", 50000))
+
+
+class LRUCache:
+    """Least-recently-used cache holding at most `maxsize` entries (0 disables it)."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for `key`, computing and storing it on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def resize(self, maxsize: int):
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._data) > max(maxsize, 0):
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,68 @@
+# Verb analysis shared by the Streamlit app and the batch tools
+# Turns spaCy's morphology into readable labels and falls back to the verb
+# lexicon (lexicon.py) when spaCy gives no morphology for a verb
+
+from analysis_cache import TOKEN_CACHE_SIZE, LRUCache
+from instrumentation import instrumented_doc, register_cache, stage
+from lexicon import match_conjugation
+
+# Readable mapping dictionaries for spaCy
+person_map = {"1": "First-Person", "2": "Second-Person", "3": "Third-Person"}
+number_map = {"Sing": "Singular", "Plur": "Plural"}
+tense_map = {"Pres": "Present-Tense", "Past": "Past-Tense", "Fut": "Future-Tense"}
+mood_map = {"Ind": "Indicative", "Imp": "Imperative", "Sub": "Subjunctive", "Cnd": "Conditional"}
+verbform_map = {"Fin": "Finite", "Inf": "Infinitive", "Part": "Participle", "Ger": "Gerund"}
+
+
+def spacy_label(morph):
+    """Readable label built from a token's spaCy morphology ("" when there is none)."""
+    person = person_map.get(morph.get("Person")[0], "") if morph.get("Person") else ""
+    number = number_map.get(morph.get("Number")[0], "") if morph.get("Number") else ""
+    tense = tense_map.get(morph.get("Tense")[0], "") if morph.get("Tense") else ""
+    mood = mood_map.get(morph.get("Mood")[0], "") if morph.get("Mood") else ""
+    verbform = verbform_map.get(morph.get("VerbForm")[0], "") if morph.get("VerbForm") else ""
+
+    return " ".join(filter(None, [person, number, tense, mood, verbform]))
+
+
+# (lowercased text, lemma, morph key) -> readable conjugation, shared by every caller
+token_cache = LRUCache(TOKEN_CACHE_SIZE)
+register_cache("token", token_cache)
+
+
+def token_conjugation(token):
+    """Readable conjugation of a verb token: spaCy's label, else the lexicon fallback."""
+    def compute():
+        # for each verb in the data, get morphology and human readable label
+        with stage("analyzer.spacy_label"):
+            label = spacy_label(token.morph)
+
+        # fallback: verb lexicon (lexicon.py) if spaCy fails
+        if not label.strip():
+            with stage("analyzer.lexicon_fallback"):
+                fallback = match_conjugation(token.text.lower(), token.lemma_)
+        else:
+            fallback = None
+
+        return label if label else (fallback or "(unknown)")
+
+    return token_cache.get_or_compute((token.text.lower(), token.lemma_, str(token.morph)), compute)
+
+
+def analyze_doc(doc):
+    """Return a {"Verb", "Lemma", "Conjugation"} dict for every verb in a spaCy doc."""
+    results = []
+
+    for token in doc:
+        if token.pos_ in ["VERB", "AUX"]:
+            results.append({
+                "Verb": token.text,
+                "Lemma": token.lemma_,
+                "Conjugation": token_conjugation(token)
+            })
+
+    return results
+
+
+def analyze_sentence_spacy(nlp, sentence: str):
+    return analyze_doc(instrumented_doc(nlp, sentence))
@@ -0,0 +1,91 @@
+# Bulk analysis of whole transcripts or text files
+# Input is parsed lazily into utterances, analyzed one chunk at a time (through
+# the app's model pool, or nlp.pipe via pipe_analyzer), and every verb row is appended to a CSV on disk, so memory stays bounded
+# even for files with hundreds of thousands of lines
+
+import csv
+import io
+
+from analyzer import analyze_doc
+from chat_reader import Utterance, parse_chat
+
+RESULT_COLUMNS = ["file", "speaker", "start_ms", "end_ms", "utterance", "verb", "lemma", "conjugation"]
+
+
+def read_text_utterances(lines, file: str = ""):
+    """One utterance per non-empty line of a plain text file."""
+    for line in lines:
+        text = line.strip()
+        if text:
+            yield Utterance(file, "", text, None, None)
+
+
+def read_uploaded_utterances(name: str, binary_file):
+    """Lazily parse an uploaded .cha transcript (or any text file) into utterances."""
+    lines = io.TextIOWrapper(binary_file, encoding="utf-8", errors="replace")
+    if name.lower().endswith(".cha"):
+        return parse_chat(lines, name)
+    return read_text_utterances(lines, name)
+
+
+def chunks(iterable, size: int):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def pipe_analyzer(nlp, batch_size: int = 64):
+    """An analyze_many callable for analyze_in_chunks that runs the pipeline directly."""
+    def analyze_many(texts):
+        return [analyze_doc(doc) for doc in nlp.pipe(texts, batch_size=batch_size)]
+    return analyze_many
+
+
+def analyze_in_chunks(analyze_many, utterances, chunk_size: int = 500):
+    """
+    Yield (number of utterances done, verb rows) after every chunk, where each row
+    follows RESULT_COLUMNS. `analyze_many` maps a list of texts to their analyze_doc
+    results (ModelPool.analyze, or pipe_analyzer). Only one chunk is held in memory at a time.
+    """
+    done = 0
+    for chunk in chunks(utterances, chunk_size):
+        rows = []
+        analyses = analyze_many([u.text for u in chunk])
+        for utterance, results in zip(chunk, analyses):
+            for r in results:
+                rows.append((utterance.file, utterance.speaker, utterance.start_ms, utterance.end_ms,
+                             utterance.text, r["Verb"], r["Lemma"], r["Conjugation"]))
+        done += len(chunk)
+        yield done, rows
+
+
+def write_results_csv(path: str, results):
+    """Write the rows of analyze_in_chunks to `path` as they arrive, passing the chunks through."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(RESULT_COLUMNS)
+        for done, rows in results:
+            writer.writerows(rows)
+            f.flush()
+            yield done, rows
+
+
+def csv_to_parquet(csv_path: str, parquet_path: str):
+    """Convert a results CSV to Parquet batch by batch (needs pyarrow)."""
+    import pyarrow as pa  # optional, only needed for the Parquet download
+    from pyarrow import csv as pa_csv
+    import pyarrow.parquet as pq
+
+    convert = pa_csv.ConvertOptions(column_types={
+        "file": pa.string(), "speaker": pa.string(), "start_ms": pa.int64(), "end_ms": pa.int64(),
+        "utterance": pa.string(), "verb": pa.string(), "lemma": pa.string(), "conjugation": pa.string(),
+    })
+    reader = pa_csv.open_csv(csv_path, convert_options=convert)
+    with pq.ParquetWriter(parquet_path, reader.schema) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
@@ -0,0 +1,263 @@
+# Microbenchmarks for the conjugator and analyzer hot paths
+# Every benchmark runs on fixed inputs (the lemmas of data/verbs.csv and a few
+# bfamdl transcripts), is repeated several times, and is reported as seconds
+# per call and per item. Results are saved as JSON and can be compared with a
+# stored baseline; a benchmark whose median got slower than --threshold counts
+# as a regression (and makes the script exit with status 1).
+# Benchmarks needing pandas or the spaCy model are skipped when those are missing.
+#
+# Run with:  python benchmarks.py [--only pretty_label] [--output results.json]
+#            python benchmarks.py --save-baseline          store this run as the baseline
+#            python benchmarks.py --baseline old.json      compare with another run
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+from chat_reader import read_corpus
+from conjugator import generate_regular_conjugations, match_regular_conjugation, pretty_label
+from lexicon import DATADIR, load_verb_lemmas
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), ".cache", "benchmarks", "baseline.json")
+TRANSCRIPTS = [os.path.join(DATADIR, "bfamdl", "bfamdl01.cha"), os.path.join(DATADIR, "bfamdl", "bfamdl02.cha")]
+LEMMA_COUNT = 200           # most frequent lemmas of verbs.csv used as input
+SPACY_BATCH_SIZES = (1, 16, 64, 256)
+SPACY_SENTENCES = 256
+
+
+class Skip(Exception):
+    """A benchmark cannot run here (missing optional dependency or model)."""
+
+
+def fixed_lemmas():
+    return [lemma for lemma in load_verb_lemmas()[:LEMMA_COUNT] if lemma[-2:] in ("ar", "er", "ir")]
+
+
+def fixed_forms():
+    """(form, lemma) for every regular form of the fixed lemmas, in a stable order."""
+    return [(form, lemma) for lemma in fixed_lemmas() for form in generate_regular_conjugations(lemma).values()]
+
+
+def fixed_lines():
+    lines = []
+    for path in TRANSCRIPTS:
+        with open(path, encoding="utf-8") as f:
+            lines.extend(f)
+    return lines
+
+
+def fixed_utterances(count: int):
+    return [u.text for u in read_corpus(TRANSCRIPTS, "PAR") if u.text][:count]
+
+
+def load_nlp():
+    try:
+        from pipelines import load_pipeline
+
+        return load_pipeline()
+    except (ImportError, OSError) as e:  # spaCy or pt_core_news_sm not installed
+        raise Skip(str(e))
+
+
+# Each benchmark returns (function to time, number of items it processes per call)
+
+def bench_generate_regular_conjugations():
+    lemmas = fixed_lemmas()
+    return lambda: [generate_regular_conjugations(lemma) for lemma in lemmas], len(lemmas)
+
+
+def bench_match_regular_conjugation():
+    forms = fixed_forms()
+    return lambda: [match_regular_conjugation(form, lemma) for form, lemma in forms], len(forms)
+
+
+def bench_pretty_label():
+    codes = [code for lemma in fixed_lemmas()[:20] for code in generate_regular_conjugations(lemma)]
+    return lambda: [pretty_label(code) for code in codes], len(codes)
+
+
+def bench_dialogue_cleaner():
+    from turninversionling430project import dialogue_cleaner
+
+    lines = fixed_lines()
+    return lambda: dialogue_cleaner(lines), len(lines)
+
+
+def bench_classify_verb():
+    from turninversionling430project import classify_verb
+
+    lemmas = list(load_verb_lemmas())
+    return lambda: [classify_verb(lemma) for lemma in lemmas], len(lemmas)
+
+
+def bench_find_conjugation():
+    from lexicon import get_lexicon
+    from turninversionling430project import find_conjugation
+
+    get_lexicon()  # built (or mapped) once, outside the timing
+    forms = fixed_forms()
+    return lambda: [find_conjugation(form, lemma) for form, lemma in forms], len(forms)
+
+
+def bench_annotate_conjugations():
+    try:
+        import pandas as pd
+    except ImportError as e:
+        raise Skip(str(e))
+    from corpus import VERB_COLUMNS
+    from turninversionling430project import annotate_conjugations, classify_verb, get_verb_paradigm
+
+    get_verb_paradigm()  # built once, outside the timing
+    forms = fixed_forms()
+    df_verbs = pd.DataFrame([(form, lemma, classify_verb(lemma), 100) for form, lemma in forms], columns=VERB_COLUMNS)
+    return lambda: annotate_conjugations(df_verbs.copy()), len(df_verbs)
+
+
+def bench_analyze_sentence_spacy(batch_size: int):
+    def setup():
+        from analyzer import analyze_doc, analyze_sentence_spacy, token_cache
+
+        nlp = load_nlp()
+        sentences = fixed_utterances(SPACY_SENTENCES)
+
+        def run():
+            token_cache.clear()  # time the analysis, not the token cache
+            if batch_size == 1:
+                return [analyze_sentence_spacy(nlp, s) for s in sentences]
+            return [analyze_doc(doc) for doc in nlp.pipe(sentences, batch_size=batch_size)]
+
+        return run, len(sentences)
+    return setup
+
+
+BENCHMARKS = {
+    "generate_regular_conjugations": bench_generate_regular_conjugations,
+    "match_regular_conjugation": bench_match_regular_conjugation,
+    "pretty_label": bench_pretty_label,
+    "dialogue_cleaner": bench_dialogue_cleaner,
+    "classify_verb": bench_classify_verb,
+    "find_conjugation": bench_find_conjugation,
+    "annotate_conjugations": bench_annotate_conjugations,
+    **{f"analyze_sentence_spacy[batch={n}]": bench_analyze_sentence_spacy(n) for n in SPACY_BATCH_SIZES},
+}
+
+
+def time_benchmark(run, repeats: int, min_seconds: float):
+    """Seconds per call for `repeats` rounds, each looping until it lasts at least `min_seconds`."""
+    run()  # warm-up
+    start = time.perf_counter()
+    run()
+    once = time.perf_counter() - start
+    number = max(1, int(min_seconds / once) if once > 0 else 1000)
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        timings.append((time.perf_counter() - start) / number)
+    return timings, number
+
+
+def run_benchmarks(names, repeats: int = 5, min_seconds: float = 0.2):
+    results = {}
+    for name in names:
+        try:
+            run, items = BENCHMARKS[name]()
+        except Skip as e:
+            print(f"{name}: skipped ({e})", file=sys.stderr)
+            continue
+        timings, number = time_benchmark(run, repeats, min_seconds)
+        median = statistics.median(timings)
+        results[name] = {
+            "items": items,
+            "repeats": repeats,
+            "loops": number,
+            "min_s": min(timings),
+            "median_s": median,
+            "mean_s": statistics.mean(timings),
+            "stdev_s": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+            "per_item_us": median / items * 1e6 if items else 0.0,
+        }
+        print(f"{name}: {median * 1000:.3f} ms per call ({results[name]['per_item_us']:.2f} us per item)",
+              file=sys.stderr)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold: float = 0.10):
+    """Rows of (name, baseline median, current median, ratio, status), status one of ok/faster/slower/new/missing."""
+    rows = []
+    old, new = baseline["results"], current["results"]
+    order = {name: i for i, name in enumerate(BENCHMARKS)}
+    for name in sorted(set(old) | set(new), key=lambda name: (order.get(name, len(order)), name)):
+        if name not in new:
+            rows.append((name, old[name]["median_s"], None, None, "missing"))
+        elif name not in old:
+            rows.append((name, None, new[name]["median_s"], None, "new"))
+        else:
+            ratio = new[name]["median_s"] / old[name]["median_s"]
+            status = "slower" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else "ok"
+            rows.append((name, old[name]["median_s"], new[name]["median_s"], ratio, status))
+    return rows
+
+
+def print_report(rows, threshold: float):
+    print(f"{'benchmark':<36} {'baseline ms':>12} {'current ms':>12} {'change':>9}  status")
+    for name, old, new, ratio, status in rows:
+        old_ms = f"{old * 1000:.3f}" if old is not None else "-"
+        new_ms = f"{new * 1000:.3f}" if new is not None else "-"
+        change = f"{(ratio - 1) * 100:+.1f}%" if ratio is not None else "-"
+        marker = "  <-- REGRESSION" if status == "slower" else ""
+        print(f"{name:<36} {old_ms:>12} {new_ms:>12} {change:>9}  {status}{marker}")
+    regressions = [row for row in rows if row[4] == "slower"]
+    print(f"\n{len(regressions)} regression(s) slower than +{threshold:.0%}" if regressions
+          else f"\nno regressions (threshold +{threshold:.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the conjugator and analyzer.")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="shortest duration of one repeat")
+    parser.add_argument("--output", help="write the results as JSON here")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="results JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown counted as a regression")
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.only or list(BENCHMARKS), args.repeats, args.min_seconds)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=1)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=1)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline} (run with --save-baseline first)")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if args.only:  # only compare what was run
+        baseline["results"] = {k: v for k, v in baseline["results"].items() if k in args.only}
+    return 1 if print_report(compare(baseline, current, args.threshold), args.threshold) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+# Streaming reader for CHAT (.cha) transcripts from TalkBank
+# Files are read lazily line by line and turned into one small record per
+# utterance, so memory stays the same no matter how large the corpus is
+
+import glob
+import os
+import re
+from typing import NamedTuple, Optional
+
+SPEAKER_LINE = re.compile(r"^\*([^:\s]+):\s*(.*)$")  # *PAR0:\tEu lembro ...
+TIMESTAMP = re.compile(r"\x15(\d+)_(\d+)\x15")       # \x15200_1600\x15 (milliseconds)
+
+
+class Utterance(NamedTuple):
+    file: str
+    speaker: str
+    text: str
+    start_ms: Optional[int]
+    end_ms: Optional[int]
+
+
+def make_utterance(file: str, speaker: str, parts):
+    """Join a main tier and its continuation lines, pulling out the timestamps."""
+    raw = " ".join(parts)
+    stamps = TIMESTAMP.findall(raw)
+    start_ms = int(stamps[0][0]) if stamps else None
+    end_ms = int(stamps[-1][1]) if stamps else None
+    text = " ".join(TIMESTAMP.sub(" ", raw).split())
+    return Utterance(file, speaker, text, start_ms, end_ms)
+
+
+def parse_chat(lines, file: str = ""):
+    """
+    Yield an Utterance for every main tier (*SPK:) in an iterable of CHAT lines.
+    Tab-indented continuation lines are merged into the utterance they belong to,
+    headers (@) and dependent tiers (%) are skipped together with their continuations.
+    """
+    speaker = None
+    parts = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line.startswith("\t"):
+            if speaker is not None:
+                parts.append(line.strip())
+            continue
+
+        if speaker is not None:
+            yield make_utterance(file, speaker, parts)
+            speaker = None
+
+        match = SPEAKER_LINE.match(line)
+        if match:
+            speaker, parts = match.group(1), [match.group(2)]
+
+    if speaker is not None:
+        yield make_utterance(file, speaker, parts)
+
+
+def read_chat(path: str):
+    """Lazily yield the utterances of one .cha file."""
+    name = os.path.basename(path)
+    with open(path, "r", encoding="utf-8") as f:
+        yield from parse_chat(f, name)
+
+
+def chat_files(patterns):
+    """Sorted, de-duplicated paths matching one glob pattern or a list of them ("**" matches any depth)."""
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    return sorted({path for pattern in patterns for path in glob.glob(pattern, recursive=True)})
+
+
+def filter_speakers(utterances, speakers=None):
+    """Keep only utterances of speakers whose ID starts with one of `speakers` ("PAR"); None keeps all."""
+    if speakers is None:
+        return iter(utterances)
+    prefixes = (speakers,) if isinstance(speakers, str) else tuple(speakers)
+    return (u for u in utterances if u.speaker.startswith(prefixes))
+
+
+def read_corpus(patterns, speakers=None):
+    """
+    Lazily yield the utterances of every .cha file matching the glob pattern(s),
+    optionally keeping only speakers whose ID starts with one of `speakers` ("PAR").
+    """
+    for path in chat_files(patterns):
+        yield from filter_speakers(read_chat(path), speakers)
@@ -0,0 +1,225 @@
+# Command line interface for the verb analyzer
+# Reads sentences, transcripts or lemmas from files or stdin and writes one JSON
+# object per line (JSONL). spaCy and pandas are only imported by the commands
+# that need them, so simple commands like `conjugate` start almost instantly.
+#
+#   python cli.py analyze sentences.txt            one sentence per line (or stdin)
+#   python cli.py analyze --fast < sentences.txt   lexicon fast path, spaCy only when needed
+#   python cli.py -o verbs.jsonl annotate-corpus "data/bfamdl/*.cha"
+#   python cli.py stats --ranking corpus_verbs.csv "data/bfamdl/*.cha"
+#   python cli.py concordance "falar 3PL PSTSimple" --page 2
+#   python cli.py scan falar ir --files "data/bfamdl/*.cha"   forms of lemmas in raw transcripts
+#   python cli.py conjugate falar comer            lemmas as arguments (or stdin)
+
+import argparse
+import json
+import sys
+
+from pipelines import ANALYSIS_PROFILES, DEFAULT_PROFILE
+
+
+def read_lines(paths):
+    """Yield the non-empty lines of the given files, or of stdin when there are none."""
+    if not paths:
+        paths = ["-"]
+    for path in paths:
+        f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+        try:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield line
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+
+def write_jsonl(records, out):
+    for record in records:
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def open_output(path):
+    return sys.stdout if path in (None, "-") else open(path, "w", encoding="utf-8")
+
+
+def command_analyze(args, out):
+    from analyzer import analyze_doc
+    from batch_analysis import chunks
+    from pipelines import load_pipeline
+
+    sentences = read_lines(args.files)
+    if args.fast:
+        from fast_analyzer import FastAnalyzer
+
+        fuzzy = None
+        if args.fuzzy:
+            from fuzzy import get_fuzzy_index
+
+            fuzzy = get_fuzzy_index(args.fuzzy)
+        analyzer = FastAnalyzer(lambda: load_pipeline(args.profile), fuzzy=fuzzy)
+        for chunk in chunks(sentences, args.batch_size):
+            results = analyzer.analyze_many(chunk, batch_size=args.batch_size)
+            write_jsonl(({"sentence": s, "verbs": r} for s, r in zip(chunk, results)), out)
+        print(json.dumps(analyzer.stats()), file=sys.stderr)
+        return
+
+    nlp = load_pipeline(args.profile)
+    for chunk in chunks(sentences, args.batch_size):
+        docs = nlp.pipe(chunk, batch_size=args.batch_size)
+        write_jsonl(({"sentence": s, "verbs": analyze_doc(doc)} for s, doc in zip(chunk, docs)), out)
+
+
+def command_annotate_corpus(args, out):
+    import turninversionling430project as project
+    from pipelines import load_pipeline
+
+    patterns = args.patterns or project.TRAINING_FILES
+    nlp = load_pipeline(args.profile)
+    prefilter = None
+    if args.prefilter:
+        from prefilter import get_prefilter
+
+        prefilter = get_prefilter()
+    if args.no_cache:
+        df_verbs = project.get_past_tense_by_file(patterns, args.speakers, batch_size=args.batch_size,
+                                                  n_process=args.n_process, nlp=nlp, prefilter=prefilter)
+    else:
+        from corpus_cache import CACHE_DIR, build_corpus
+
+        df_verbs, rebuilt = build_corpus(patterns, nlp, project.classify_verb, project.read_bfamdl_file,
+                                         args.profile, args.speakers, args.cache_dir or CACHE_DIR, args.batch_size,
+                                         prefilter)
+        print(f"annotated {len(rebuilt)} new or changed file(s)", file=sys.stderr)
+    df_verbs = project.annotate_conjugations(df_verbs)
+    df_verbs.to_json(out, orient="records", lines=True, force_ascii=False)
+
+
+def command_stats(args, out):
+    import turninversionling430project as project
+    from corpus_stats import corpus_stats, write_lemma_ranking
+
+    stats = corpus_stats(args.patterns or project.TRAINING_FILES, args.profile, args.speakers, args.workers)
+    write_jsonl([{"file": None, "speaker": None, **stats["total"].to_dict()}], out)
+    write_jsonl(({"file": name, "speaker": None, **s.to_dict()} for name, s in stats["files"].items()), out)
+    write_jsonl(({"file": name, "speaker": speaker, **s.to_dict()}
+                 for (name, speaker), s in stats["speakers"].items()), out)
+    if args.ranking:
+        write_lemma_ranking(stats["total"], args.ranking)
+
+
+def command_concordance(args, out):
+    from concordance import get_index
+
+    index = get_index(args.files or None, args.profile, rebuild=args.rebuild)
+    hits = index.search(args.query)
+    pages = max(1, -(-len(hits) // args.page_size))
+    write_jsonl(index.kwic(hits, args.page, args.page_size, args.width), out)
+    print(f"{len(hits)} hit(s), page {args.page} of {pages}", file=sys.stderr)
+
+
+def command_scan(args, out):
+    import turninversionling430project as project
+    from fast_analyzer import IRREGULAR_LEMMA_FORMS
+    from lexicon import is_irregular
+    from prefilter import Prefilter, get_prefilter, lemma_forms, scan_chat
+
+    for lemma in args.lemmas or ():
+        if is_irregular(lemma.lower()) and lemma.lower() not in IRREGULAR_LEMMA_FORMS:
+            print(f"{lemma}: irregular, only the infinitive is searched", file=sys.stderr)
+    prefilter = Prefilter(lemma_forms(args.lemmas)) if args.lemmas else get_prefilter()
+    write_jsonl((span._asdict() for span in scan_chat(args.files or project.TRAINING_FILES, prefilter,
+                                                      args.speakers)), out)
+
+
+def command_conjugate(args, out):
+    from lexicon import conjugation_table
+
+    for lemma in (args.lemmas or read_lines([])):
+        table = conjugation_table(lemma)
+        if table["irregular"]:
+            print(f"{table['lemma']}: irregular, only the infinitive is known", file=sys.stderr)
+        write_jsonl([table], out)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Portuguese verb analyzer (JSONL output).")
+    parser.add_argument("-o", "--output", help="write to this file instead of stdout")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="record per-stage timings (instrumentation.py) and write them here as JSON")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    analyze = commands.add_parser("analyze", help="analyze the verbs of sentences, one per line")
+    analyze.add_argument("files", nargs="*", help="input files (default: stdin)")
+    analyze.add_argument("--fast", action="store_true", help="use the lexicon fast path (fast_analyzer.py)")
+    analyze.add_argument("--fuzzy", type=int, default=0, metavar="DISTANCE",
+                         help="with --fast, match unknown verbs to lexicon forms within this edit distance")
+    analyze.add_argument("--profile", default=DEFAULT_PROFILE, choices=ANALYSIS_PROFILES)
+    analyze.add_argument("--batch-size", type=int, default=256)
+    analyze.set_defaults(run=command_analyze)
+
+    annotate = commands.add_parser("annotate-corpus", help="annotate every verb of a CHAT corpus")
+    annotate.add_argument("patterns", nargs="*", help="glob(s) of .cha files (default: bfamdl 01-14)")
+    annotate.add_argument("--speakers", default="PAR", help="keep speakers whose ID starts with this")
+    annotate.add_argument("--profile", default=DEFAULT_PROFILE, choices=ANALYSIS_PROFILES)
+    annotate.add_argument("--batch-size", type=int, default=256)
+    annotate.add_argument("--n-process", type=int, default=1, help="spaCy processes (only with --no-cache)")
+    annotate.add_argument("--no-cache", action="store_true", help="re-annotate everything, skip corpus_cache.py")
+    annotate.add_argument("--prefilter", action="store_true",
+                          help="only send utterances with a known verb form to spaCy")
+    annotate.add_argument("--cache-dir", default=None, help="per-file cache directory (default: .cache/corpus)")
+    annotate.set_defaults(run=command_annotate_corpus)
+
+    stats = commands.add_parser("stats", help="lemma, class and feature counts per file and speaker")
+    stats.add_argument("patterns", nargs="*", help="glob(s) of .cha files (default: bfamdl 01-14)")
+    stats.add_argument("--speakers", default=None, help="keep speakers whose ID starts with this (default: all)")
+    stats.add_argument("--profile", default=DEFAULT_PROFILE, choices=ANALYSIS_PROFILES)
+    stats.add_argument("--workers", type=int, default=None, help="worker processes (default: every core)")
+    stats.add_argument("--ranking", help="also write a verbs.csv-style Rank,Lemma,Freq ranking here")
+    stats.set_defaults(run=command_stats)
+
+    concordance = commands.add_parser("concordance", help="keyword-in-context search by lemma, form and feature")
+    concordance.add_argument("query", help='e.g. "falar 3PL PSTSimple", "form:falou OR form:falaram", "comer -PL"')
+    concordance.add_argument("--files", action="append", help="glob of .cha files to index (default: bfamdl 01-14)")
+    concordance.add_argument("--page", type=int, default=1)
+    concordance.add_argument("--page-size", type=int, default=20)
+    concordance.add_argument("--width", type=int, default=40, help="characters of context on each side")
+    concordance.add_argument("--profile", default=DEFAULT_PROFILE, choices=ANALYSIS_PROFILES)
+    concordance.add_argument("--rebuild", action="store_true", help="rebuild the index even if it is up to date")
+    concordance.set_defaults(run=command_concordance)
+
+    scan = commands.add_parser("scan", help="find verb forms in raw transcripts without running spaCy")
+    scan.add_argument("lemmas", nargs="*", help="only the forms of these lemmas (default: every known verb form)")
+    scan.add_argument("--files", action="append", help="glob of .cha files (default: bfamdl 01-14)")
+    scan.add_argument("--speakers", default=None, help="keep speakers whose ID starts with this (default: all)")
+    scan.set_defaults(run=command_scan)
+
+    conjugate = commands.add_parser("conjugate", help="list the forms the lexicon knows for lemmas")
+    conjugate.add_argument("lemmas", nargs="*", help="lemmas (default: one per line on stdin)")
+    conjugate.set_defaults(run=command_conjugate)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "analyze" and args.fuzzy and not args.fast:
+        parser.error("--fuzzy needs --fast (it is a fallback tier of the fast analyzer)")
+    if args.metrics:
+        import instrumentation
+
+        instrumentation.enable()
+    out = open_output(args.output)
+    try:
+        args.run(args, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if args.metrics:
+            with open(args.metrics, "w", encoding="utf-8") as f:
+                json.dump(instrumentation.snapshot(), f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Latency/accuracy comparison of the spaCy pipeline profiles (pipelines.py)
+# Every profile runs in its own process over held-out bfamdl transcripts
+# (15-35, the ones the corpus script does not train on) and is compared to "full":
+#   tokens/sec, peak RSS, and how many verb labels differ from the full pipeline
+#
+# Run with:  python compare_profiles.py [--profiles full morph-only] [--json report.json]
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import time
+
+from analyzer import analyze_doc
+from chat_reader import read_corpus
+from pipelines import PROFILES, load_pipeline
+
+DATADIR = os.path.join(os.path.dirname(__file__), "data")
+HELD_OUT_FILES = [os.path.join(DATADIR, "bfamdl", "bfamdl1[5-9].cha"),
+                  os.path.join(DATADIR, "bfamdl", "bfamdl[23][0-9].cha")]
+
+
+def run_profile(profile: str, utterances, batch_size: int):
+    """Analyze the utterances with one profile; runs inside a fresh worker process."""
+    start = time.perf_counter()
+    nlp = load_pipeline(profile)
+    load_seconds = time.perf_counter() - start
+
+    tokens = 0
+    labels = []  # one list of (verb, lemma, conjugation) per utterance
+    start = time.perf_counter()
+    for doc in nlp.pipe(utterances, batch_size=batch_size):
+        tokens += len(doc)
+        labels.append([(r["Verb"], r["Lemma"], r["Conjugation"]) for r in analyze_doc(doc)])
+    seconds = time.perf_counter() - start
+
+    return {
+        "profile": profile,
+        "components": nlp.pipe_names,
+        "load_seconds": load_seconds,
+        "tokens": tokens,
+        "tokens_per_sec": tokens / seconds if seconds else 0.0,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,  # ru_maxrss is KB on Linux
+        "labels": labels,
+    }
+
+
+def label_differences(reference, labels):
+    """Count verb analyses of `labels` that differ from `reference` (the full pipeline)."""
+    total = differing = 0
+    for expected, found in zip(reference, labels):
+        total += max(len(expected), len(found))
+        differing += max(len(expected), len(found)) - len(set(expected) & set(found))
+    return total, differing
+
+
+def compare_profiles(profiles, patterns=HELD_OUT_FILES, batch_size: int = 256):
+    utterances = [u.text for u in read_corpus(patterns, "PAR")]
+    profiles = ["full"] + [p for p in profiles if p != "full"]
+
+    # a fresh process per profile, so peak RSS and load time are not shared
+    context = multiprocessing.get_context("spawn")
+    runs = []
+    for profile in profiles:
+        with context.Pool(1) as pool:
+            runs.append(pool.apply(run_profile, (profile, utterances, batch_size)))
+
+    reference = runs[0]["labels"]
+    for run in runs:
+        total, differing = label_differences(reference, run.pop("labels"))
+        run["verb_labels"] = total
+        run["verb_labels_differing"] = differing
+        run["verb_label_diff_rate"] = differing / total if total else 0.0
+    return runs
+
+
+def print_report(runs):
+    print(f"{'profile':<12} {'tokens/sec':>11} {'load s':>7} {'peak RSS MB':>12} {'labels != full':>15}")
+    for run in runs:
+        print(f"{run['profile']:<12} {run['tokens_per_sec']:>11.0f} {run['load_seconds']:>7.2f} "
+              f"{run['peak_rss_mb']:>12.0f} {run['verb_label_diff_rate']:>14.1%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare spaCy pipeline profiles on held-out bfamdl files.")
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument("--files", nargs="+", default=HELD_OUT_FILES, help="glob(s) of .cha files")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    runs = compare_profiles(args.profiles, args.files, args.batch_size)
+    print_report(runs)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(runs, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
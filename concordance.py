@@ -0,0 +1,304 @@
+# Persistent inverted concordance index over the annotated corpus
+# Every verb occurrence of the corpus (a "hit") is posted under its lemma and
+# its surface form. Each reading of a hit (one of its conjugation codes: "venda"
+# is 1SG-PRSTSub, 2SG-For-PRSTSub and 3SG-PRSTSub) is posted under its code and
+# the FEATURE_FLAGS names of that code, so code and feature terms of a query
+# have to hold for one single reading. Forms without a code (irregular verbs,
+# whose paradigms are not generated) only match lemma and form queries.
+# Queries are intersections/unions of sorted posting arrays, so
+# "falar 3PL PSTSimple" is answered in milliseconds without touching spaCy, and
+# the hits come back as keyword-in-context (KWIC) lines with their file,
+# speaker and timestamps.
+#
+# Query syntax: space-separated terms are ANDed, OR separates alternatives and
+# a leading "-" excludes a term.
+#   falar 3PL PSTSimple             lemma falar, 3rd person plural, past simple
+#   form:falou OR form:falaram      field prefixes: lemma:, form:, code:, feature:
+#   comer PRSTSub -PL               bare words are features ("PL"), person+number
+#                                   ("3PL"), codes ("3SG-PSTSimple") or lemmas
+#
+# The index is one .npz file of plain arrays (no pickles), rebuilt when the
+# transcripts, the annotation settings (model, profile, classifier, speakers)
+# or the lexicon change. Utterance texts are stored as one
+# joined string plus offsets, and file paths once each, so no column is padded
+# to the width of its longest value.
+
+import hashlib
+import os
+import re
+
+import numpy as np
+
+from chat_reader import chat_files
+from conjugator import FEATURE_FLAGS, feature_bits, feature_names
+
+INDEX_PATH = os.path.join(os.path.dirname(__file__), ".cache", "concordance.npz")
+INDEX_VERSION = 2  # part of the key, so indexes in an older layout are rebuilt
+READING_FIELDS = ("code:", "feature:")  # terms posted per reading instead of per hit
+PERSON_NUMBER = re.compile(r"^([123])(SG|PL)$")
+
+
+def corpus_key(paths, fingerprint: str):
+    """
+    Hash of what the index is built from: the transcripts' contents, the annotation
+    fingerprint (corpus_cache.annotation_fingerprint: model, profile, classifier,
+    speakers) and the lexicon the conjugations are looked up in.
+    """
+    from corpus_cache import file_hash
+    from lexicon_store import source_key
+
+    digest = hashlib.sha256(f"v{INDEX_VERSION}|{fingerprint}|".encode("utf-8"))
+    digest.update(source_key())
+    for path in paths:
+        digest.update(f"|{os.path.abspath(path)}:{file_hash(path)}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def hit_terms(lemma: str, form: str):
+    """The terms a verb occurrence is posted under."""
+    return {f"lemma:{lemma.lower()}", f"form:{form.lower()}"}
+
+
+def reading_terms(code: str):
+    """The terms one reading (conjugation code) of a verb occurrence is posted under."""
+    return {f"code:{code}", *(f"feature:{name}" for name in feature_names(feature_bits(code)))}
+
+
+def keyword_offsets(text: str, forms):
+    """Character offset of each form in an utterance, the n-th repeat of a form matching its n-th occurrence."""
+    seen = {}
+    offsets = []
+    for form in forms:
+        matches = [m.start() for m in re.finditer(rf"(?<!\w){re.escape(form)}(?!\w)", text, re.IGNORECASE)]
+        n = seen.get(form.lower(), 0)
+        seen[form.lower()] = n + 1
+        offsets.append(matches[n] if n < len(matches) else -1)
+    return offsets
+
+
+def build_index(verbs, utterances, key: str = ""):
+    """
+    Build the index from a compact verb table (verb_table.compact_verb_table: token,
+    lemma, conjugations, utterance, file) and the utterances the table was built
+    from, in corpus order. Utterance numbers in `verbs` are per file, and `file`
+    has to identify a transcript in both (its path: two folders can hold the same name).
+    """
+    first_utterance = {}
+    for i, u in enumerate(utterances):
+        first_utterance.setdefault(u.file, i)
+    files = list(first_utterance)
+    file_number = {file: n for n, file in enumerate(files)}
+    texts = [u.text for u in utterances]
+
+    hit_utterance = (verbs["file"].astype(str).map(first_utterance).to_numpy(dtype=np.int64)
+                     + verbs["utterance"].to_numpy(dtype=np.int64))
+    tokens = verbs["token"].astype(str).to_numpy()
+    lemmas = verbs["lemma"].astype(str).to_numpy()
+    conjugations = verbs["conjugations"].astype(str).to_numpy()
+
+    hit_start = np.full(len(verbs), -1, dtype=np.int32)
+    order = np.argsort(hit_utterance, kind="stable")
+    groups = np.split(order, np.flatnonzero(np.diff(hit_utterance[order])) + 1) if len(order) else []
+    for hits in groups:
+        text = texts[hit_utterance[hits[0]]]
+        hit_start[hits] = keyword_offsets(text, tokens[hits])
+
+    postings = {}  # term -> hit ids (lemma:, form:) or reading ids (code:, feature:)
+    reading_hit = []
+    for hit, (lemma, form, codes) in enumerate(zip(lemmas, tokens, conjugations)):
+        for term in hit_terms(lemma, form):
+            postings.setdefault(term, []).append(hit)
+        for code in filter(None, codes.split("|")):
+            for term in reading_terms(code):
+                postings.setdefault(term, []).append(len(reading_hit))
+            reading_hit.append(hit)
+    terms = sorted(postings)
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(postings[t]) for t in terms])
+
+    return ConcordanceIndex({
+        "key": np.array(key),
+        "terms": np.array(terms, dtype=str),
+        "offsets": offsets,
+        "postings": np.array([hit for t in terms for hit in postings[t]], dtype=np.int32),
+        "hit_utterance": hit_utterance.astype(np.int32),
+        "hit_start": hit_start,
+        "hit_token": np.array(tokens, dtype=str),
+        "hit_lemma": np.array(lemmas, dtype=str),
+        "hit_conjugations": np.array(conjugations, dtype=str),
+        "reading_hit": np.array(reading_hit, dtype=np.int32),
+        "utterance_chars": np.array("".join(texts)),
+        "utterance_offsets": np.concatenate(([0], np.cumsum([len(t) for t in texts], dtype=np.int64))),
+        "files": np.array(files, dtype=str),
+        "utterance_file": np.array([file_number[u.file] for u in utterances], dtype=np.int32),
+        "utterance_speaker": np.array([u.speaker for u in utterances], dtype=str),
+        "utterance_start_ms": np.array([-1 if u.start_ms is None else u.start_ms for u in utterances], dtype=np.int64),
+        "utterance_end_ms": np.array([-1 if u.end_ms is None else u.end_ms for u in utterances], dtype=np.int64),
+    })
+
+
+def query_terms(word: str):
+    """The index terms a query word stands for (all of them must match)."""
+    if ":" in word:
+        field, _, value = word.partition(":")
+        return [f"{field}:{value.lower() if field in ('lemma', 'form') else value}"]
+    if word in FEATURE_FLAGS:
+        return [f"feature:{word}"]
+    match = PERSON_NUMBER.match(word.upper())
+    if match:
+        return [f"feature:{match.group(1)}", f"feature:{match.group(2)}"]
+    if "-" in word:
+        return [f"code:{word}"]
+    return [f"lemma:{word.lower()}"]
+
+
+def parse_query(query: str):
+    """[(required terms, excluded terms), ...], one entry per OR alternative."""
+    alternatives = []
+    for part in re.split(r"\s+OR\s+", query.strip()):
+        required, excluded = [], []
+        for word in part.split():
+            if word.startswith("-") and len(word) > 1:
+                excluded.extend(query_terms(word[1:]))
+            else:
+                required.extend(query_terms(word))
+        alternatives.append((required, excluded))
+    return alternatives
+
+
+class ConcordanceIndex:
+    """The loaded index: term postings plus the hit and utterance tables for KWIC output."""
+
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.key = str(arrays["key"])
+        self.terms = arrays["terms"]
+        self.offsets = arrays["offsets"]
+        self.postings_array = arrays["postings"]
+        self.chars = str(arrays.get("utterance_chars", ""))  # an index from before the joined texts is rebuilt
+
+    def __len__(self):
+        return len(self.arrays["hit_token"])
+
+    def save(self, path: str = INDEX_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}.npz"  # np.savez adds .npz to other names
+        np.savez(tmp_path, **self.arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = INDEX_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            return cls({name: data[name] for name in data.files})
+
+    def postings(self, term: str):
+        """Sorted hit ids posted under a term."""
+        i = np.searchsorted(self.terms, term)
+        if i == len(self.terms) or self.terms[i] != term:
+            return np.empty(0, dtype=np.int32)
+        return self.postings_array[self.offsets[i]:self.offsets[i + 1]]
+
+    def utterance_text(self, u: int):
+        offsets = self.arrays["utterance_offsets"]
+        return self.chars[offsets[u]:offsets[u + 1]]
+
+    def _intersect(self, terms):
+        lists = sorted((self.postings(term) for term in terms), key=len)  # shortest first
+        ids = lists[0]
+        for postings in lists[1:]:
+            ids = np.intersect1d(ids, postings, assume_unique=True)
+        return ids
+
+    def search(self, query: str):
+        """Sorted ids of the hits matching a query (see the syntax at the top of this file)."""
+        reading_hit = self.arrays["reading_hit"]
+        found = np.empty(0, dtype=np.int32)
+        for required, excluded in parse_query(query):
+            if not required:
+                continue
+            required_readings = [t for t in required if t.startswith(READING_FIELDS)]
+            excluded_readings = [t for t in excluded if t.startswith(READING_FIELDS)]
+            required_hits = [t for t in required if not t.startswith(READING_FIELDS)]
+            hits = self._intersect(required_hits) if required_hits else None
+
+            if required_readings or excluded_readings:
+                # the hits with at least one reading that has every required and no excluded feature
+                readings = (self._intersect(required_readings) if required_readings
+                            else np.arange(len(reading_hit), dtype=np.int32))
+                for term in excluded_readings:
+                    readings = np.setdiff1d(readings, self.postings(term), assume_unique=True)
+                reading_hits = np.unique(reading_hit[readings])
+                hits = reading_hits if hits is None else np.intersect1d(hits, reading_hits, assume_unique=True)
+
+            for term in excluded:
+                if not term.startswith(READING_FIELDS):
+                    hits = np.setdiff1d(hits, self.postings(term), assume_unique=True)
+            found = np.union1d(found, hits)
+        return found
+
+    def kwic(self, hits, page: int = 1, page_size: int = 20, width: int = 40):
+        """Keyword-in-context rows for one page (1-based) of hit ids."""
+        a = self.arrays
+        rows = []
+        for hit in hits[(page - 1) * page_size:page * page_size]:
+            u = a["hit_utterance"][hit]
+            text = self.utterance_text(u)
+            token = str(a["hit_token"][hit])
+            start = int(a["hit_start"][hit])
+            if start < 0:  # token not found verbatim in the utterance text
+                left, keyword, right = "", token, text
+            else:
+                left, keyword, right = text[:start], text[start:start + len(token)], text[start + len(token):]
+            rows.append({
+                "file": str(a["files"][a["utterance_file"][u]]),
+                "speaker": str(a["utterance_speaker"][u]),
+                "start_ms": int(a["utterance_start_ms"][u]) if a["utterance_start_ms"][u] >= 0 else None,
+                "end_ms": int(a["utterance_end_ms"][u]) if a["utterance_end_ms"][u] >= 0 else None,
+                "left": left[-width:],
+                "keyword": keyword,
+                "right": right[:width],
+                "lemma": str(a["hit_lemma"][hit]),
+                "conjugations": str(a["hit_conjugations"][hit]),
+            })
+        return rows
+
+
+def get_index(patterns=None, profile: str = None, path: str = INDEX_PATH, rebuild: bool = False):
+    """
+    Open the index of the transcripts matching the glob pattern(s) (default: the
+    bfamdl training files), building it first when it is missing or stale.
+    Building annotates the corpus through the per-file corpus cache (corpus_cache.py).
+    """
+    import turninversionling430project as project
+    from corpus_cache import annotation_fingerprint
+    from pipelines import load_pipeline
+
+    patterns = project.TRAINING_FILES if patterns is None else patterns
+    profile = project.SPACY_PROFILE if profile is None else profile
+    paths = chat_files(patterns)
+    nlp = load_pipeline(profile)
+    speakers = project.TRAINING_SPEAKERS
+    fingerprint = annotation_fingerprint(nlp, profile, project.classify_verb, speakers)
+    key = corpus_key(paths, fingerprint)
+
+    if not rebuild and os.path.exists(path):
+        index = ConcordanceIndex.load(path)
+        if index.key == key:
+            return index
+
+    import pandas as pd
+
+    from corpus import META_COLUMNS, VERB_COLUMNS
+    from corpus_cache import CACHE_DIR, annotate_file, cache_key
+    from verb_table import compact_verb_table
+
+    # per file, so every row and utterance can be labelled with its path (the cached tables hold basenames)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tables = [annotate_file(p, nlp, project.classify_verb, project.read_bfamdl_file, cache_key(p, fingerprint),
+                            CACHE_DIR, speakers=speakers).assign(file=p)
+              for p in paths]
+    verbs = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(columns=VERB_COLUMNS + META_COLUMNS)
+    utterances = [u._replace(file=p) for p in paths for u in project.read_bfamdl_file(p, speakers)]
+    index = build_index(compact_verb_table(verbs, project.get_verb_paradigm()[1]), utterances, key)
+    index.save(path)
+    return index
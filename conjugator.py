@@ -2,6 +2,8 @@
 # This will be utilized when the spaCy model is unable to provide information
 # related to the given verb
 
+from instrumentation import timed
+
 
 # Master table for regular endings
 # Limitation: So far this is only for verbs in the past-tense and present-tense
@@ -138,7 +140,14 @@ REGULAR_ENDINGS = {
 }
 
 
+# Verbs whose forms do not follow REGULAR_ENDINGS
+# (mirrors irregular_verbs_list in turninversionling430project.py)
+IRREGULAR_VERBS = ('ser', 'estar', 'ter', 'poder', 'ir', 'fazer', 'dar', 'dizer',
+                   'querer', 'saber', 'ver', 'vir', 'pôr')
+
+
 # gets all conjugations for regular verbs
+@timed("conjugator.generate_regular_conjugations")
 def generate_regular_conjugations(lemma: str):
     """Return dict of all regular forms for a verb ending in -ar/-er/-ir."""
     ending = lemma[-2:]
@@ -156,6 +165,16 @@ def generate_regular_conjugations(lemma: str):
     return conj
 
 
+# Reverse table of REGULAR_ENDINGS: {"ar": {"amos": ["1PL-PSTSimple", "1PL-PRSTInd"], ...}}
+# Codes keep the order generate_regular_conjugations produces them in
+SUFFIX_CODES = {}
+for _ending, _tenses in REGULAR_ENDINGS.items():
+    for _tense_name, _persons in _tenses.items():
+        for _person_code, _suffix in _persons.items():
+            SUFFIX_CODES.setdefault(_ending, {}).setdefault(_suffix, []).append(
+                f"{_person_code}-{_tense_name}")
+
+
 # Human-Friendly label mappings for person(and number) and tense
 PERSON_LABELS = {
     "1SG": "First Person Singular",
@@ -176,11 +195,46 @@ TENSE_LABELS = {
 }
 
 
+# Bit flags for each feature of a code, so any set of readings of a token fits
+# in one small integer: "3PL-PSTSimple" -> PERSON_3 | PLURAL | PST_SIMPLE
+FEATURE_FLAGS = {
+    "1": 1 << 0,             # person
+    "2": 1 << 1,
+    "3": 1 << 2,
+    "SG": 1 << 3,            # number
+    "PL": 1 << 4,
+    "Inf": 1 << 5,           # formality
+    "For": 1 << 6,
+    "PSTSimple": 1 << 7,     # tense
+    "PSTImperfect": 1 << 8,
+    "PRSTInd": 1 << 9,
+    "PRSTSub": 1 << 10,
+    "Infinitive": 1 << 11,
+}
+
+
+def feature_bits(code: str):
+    """Bit flags of a code such as "2SG-Inf-PSTSimple" (see FEATURE_FLAGS)."""
+    if code == "Infinitive":
+        return FEATURE_FLAGS["Infinitive"]
+    person, tense = code.rsplit("-", 1)
+    number_part, _, formality = person.partition("-")
+    bits = FEATURE_FLAGS[number_part[0]] | FEATURE_FLAGS[number_part[1:]] | FEATURE_FLAGS[tense]
+    if formality:
+        bits |= FEATURE_FLAGS[formality]
+    return bits
+
+
+def feature_names(bits: int):
+    """The FEATURE_FLAGS names set in `bits`, e.g. ["3", "PL", "PSTSimple"]."""
+    return [name for name, flag in FEATURE_FLAGS.items() if bits & flag]
+
+
 # function that is able to get pretty labels
 def pretty_label(code: str):
     if code == "Infinitive":
         return "Infinitive"
-    person, tense = code.split("-")
+    person, tense = code.rsplit("-", 1) # person codes can contain "-" (2SG-Inf)
     return f"{PERSON_LABELS.get(person, person)} {TENSE_LABELS.get(tense, tense)}"
 
 
@@ -188,11 +242,19 @@ def pretty_label(code: str):
 # gets the lemma, identifies all the conjugations, and then tries find a match
 # outputs pretty label for the proper conjugaton
 
+@timed("conjugator.match_regular_conjugation")
 def match_regular_conjugation(token: str, lemma: str):
-    conj = generate_regular_conjugations(lemma) # takes lemma and gets all conjugations
+    if token == lemma:
+        return pretty_label("Infinitive")
+
+    ending = lemma[-2:]
+    base = lemma[:-2]
+    if ending not in SUFFIX_CODES or not token.startswith(base):
+        return None
 
-    for code, form in conj.items(): # 
-        if form == token:
-            return pretty_label(code)
+    # strip the stem and look the remaining suffix up directly
+    codes = SUFFIX_CODES[ending].get(token[len(base):])
+    if codes:
+        return pretty_label(codes[0])
 
     return None
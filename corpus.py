@@ -0,0 +1,73 @@
+# Corpus annotation pipeline
+# Utterances are kept as separate documents and streamed through nlp.pipe in
+# batches (optionally over several processes) instead of joining the corpus into
+# one giant string, which is single-core and runs into nlp.max_length.
+# With a prefilter (prefilter.py) utterances without any known verb form skip spaCy.
+
+from collections import deque
+
+import pandas as pd
+
+from instrumentation import stage, timed_iter
+
+# same columns get_past_tense has always produced
+VERB_COLUMNS = ["token", "lemma", "classification", "pos"]
+# where each verb came from; filled in when the input is chat_reader.Utterance records
+META_COLUMNS = ["utterance", "file", "speaker", "start_ms", "end_ms"]
+
+
+def verb_rows(doc, classify):
+    """Return a (token, lemma, classification, pos) tuple for every verb in a doc."""
+    return [(token.text, token.lemma_, classify(token.lemma_), token.pos)
+            for token in doc if token.pos_ == "VERB"]
+
+
+def utterance_text(utterance):
+    return utterance if isinstance(utterance, str) else utterance.text
+
+
+def utterance_meta(index, utterance):
+    if isinstance(utterance, str):
+        return (index, None, None, None, None)
+    return (index, utterance.file, utterance.speaker, utterance.start_ms, utterance.end_ms)
+
+
+def annotate_utterances(nlp, utterances, classify, batch_size: int = 256, n_process: int = 1, prefilter=None):
+    """
+    Run every utterance (plain strings or chat_reader.Utterance records) through spaCy
+    and return the verbs as a DataFrame with VERB_COLUMNS + META_COLUMNS.
+    The input is consumed lazily, repeated utterances (one-word turns like "é" or "não")
+    are only analysed once, and the rows come back in corpus order.
+    Utterances in which `prefilter` finds no candidate form are never sent to spaCy.
+    """
+    analysed = {}     # utterance text -> verb rows
+    pending = deque() # utterances read ahead of spaCy, waiting for their analysis
+    rows = []
+
+    def unseen_texts():
+        seen = set()
+        for index, utterance in enumerate(utterances):
+            pending.append((index, utterance))
+            text = utterance_text(utterance)
+            if text and text not in seen:
+                seen.add(text)
+                if prefilter is not None and not prefilter.has_candidate(text):
+                    analysed[text] = []  # no verb form we could label
+                    continue
+                yield text, text
+
+    def flush():
+        while pending and (not utterance_text(pending[0][1]) or utterance_text(pending[0][1]) in analysed):
+            index, utterance = pending.popleft()
+            meta = utterance_meta(index, utterance)
+            rows.extend(row + meta for row in analysed.get(utterance_text(utterance), ()))
+
+    # keyed by the input text carried along with each doc, not doc.text, which need not be identical
+    docs = nlp.pipe(unseen_texts(), batch_size=batch_size, n_process=n_process, as_tuples=True)
+    for doc, text in timed_iter("corpus.spacy_pipe", docs):
+        with stage("corpus.verb_rows"):
+            analysed[text] = verb_rows(doc, classify)
+        flush()
+    flush()
+
+    return pd.DataFrame(rows, columns=VERB_COLUMNS + META_COLUMNS)
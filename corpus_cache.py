@@ -0,0 +1,158 @@
+# Content-hashed on-disk cache of the annotated corpus
+# Every .cha file's spaCy output (DocBin) and verb table (Parquet) are stored
+# under a key made of the file's content hash, the spaCy/model versions, the
+# pipeline profile, the speaker filter, the verb classifier and the prefilter
+# (prefilter.py) when one is used. A rebuild only
+# re-processes files that were added or changed and merges them with the cached
+# ones into the corpus totals.
+#
+# Layout of the cache directory:
+#   <key>.spacy         DocBin with one doc per distinct utterance of the file
+#   <key>.parquet       that file's verb table (corpus.VERB_COLUMNS + META_COLUMNS)
+#   totals.parquet      every file's table concatenated, in file order
+#   totals.json         {"fingerprint": ..., "files": {file path: key}} the totals were built from
+
+import hashlib
+import inspect
+import json
+import os
+
+import pandas as pd
+
+from chat_reader import chat_files
+from corpus import META_COLUMNS, VERB_COLUMNS, verb_rows
+from instrumentation import stage, timed
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), ".cache", "corpus")
+
+
+def file_hash(path: str):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def pipeline_fingerprint(nlp, profile: str):
+    """Everything besides the file content that changes the annotation."""
+    import spacy
+
+    return f"{nlp.meta.get('name')}-{nlp.meta.get('version')}|spacy-{spacy.__version__}|{profile}|{','.join(nlp.pipe_names)}"
+
+
+def classifier_tag(classify):
+    """Name and source hash of the verb classifier, so editing it invalidates the cached tables."""
+    try:
+        source = inspect.getsource(classify)
+    except (OSError, TypeError):  # builtins, lambdas typed in a REPL
+        source = ""
+    name = f"{getattr(classify, '__module__', '')}.{getattr(classify, '__qualname__', repr(classify))}"
+    return f"{name}:{hashlib.sha256(source.encode('utf-8')).hexdigest()[:12]}"
+
+
+def speakers_tag(speakers):
+    if speakers is None:
+        return "*"
+    return speakers if isinstance(speakers, str) else ",".join(speakers)
+
+
+def prefilter_tag(prefilter):
+    """Hash of the prefilter's form set: a different set sends different utterances to spaCy."""
+    return hashlib.sha256("\n".join(sorted(prefilter.forms)).encode("utf-8")).hexdigest()[:12]
+
+
+def annotation_fingerprint(nlp, profile: str, classify, speakers, prefilter=None):
+    """Everything besides the file content that changes a file's verb table."""
+    fingerprint = f"{pipeline_fingerprint(nlp, profile)}|{classifier_tag(classify)}|speakers={speakers_tag(speakers)}"
+    if prefilter is not None:
+        fingerprint += f"|prefilter={prefilter_tag(prefilter)}"
+    return fingerprint
+
+
+def cache_key(path: str, fingerprint: str):
+    return hashlib.sha256(f"{file_hash(path)}|{fingerprint}".encode("utf-8")).hexdigest()[:32]
+
+
+def write_atomic(path: str, write):
+    """Call write(temporary path) and move the result over `path`, so readers never see a partial file."""
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def write_json(path: str, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+
+
+@timed("corpus_cache.annotate_file")
+def annotate_file(path: str, nlp, classify, read_utterances, key: str, cache_dir: str = CACHE_DIR,
+                  batch_size: int = 256, speakers=None, prefilter=None):
+    """
+    Return the verb table of one file, from the cache when its key is known.
+    read_utterances(path, speakers) yields the file's utterances; `key` has to
+    come from annotation_fingerprint with the same speakers, classifier and prefilter.
+    Utterances in which `prefilter` finds no candidate form are not sent to spaCy.
+    The DocBin is reused when only the table is missing, so the file is not re-parsed.
+    """
+    from spacy.tokens import DocBin
+
+    table_path = os.path.join(cache_dir, f"{key}.parquet")
+    if os.path.exists(table_path):
+        return pd.read_parquet(table_path)
+
+    utterances = list(read_utterances(path, speakers))
+    texts = list(dict.fromkeys(u.text for u in utterances if u.text))
+    if prefilter is not None:
+        texts = [text for text in texts if prefilter.has_candidate(text)]
+
+    docbin_path = os.path.join(cache_dir, f"{key}.spacy")
+    if os.path.exists(docbin_path):
+        docs = list(DocBin().from_disk(docbin_path).get_docs(nlp.vocab))
+    else:
+        with stage("corpus_cache.spacy_pipe"):
+            docs = list(nlp.pipe(texts, batch_size=batch_size))
+        docbin = DocBin(docs=docs, store_user_data=False)
+        write_atomic(docbin_path, docbin.to_disk)
+
+    analysed = {text: verb_rows(doc, classify) for text, doc in zip(texts, docs)}  # docs are in `texts` order
+    rows = [row + (index, u.file, u.speaker, u.start_ms, u.end_ms)
+            for index, u in enumerate(utterances)
+            for row in analysed.get(u.text, ())]
+    table = pd.DataFrame(rows, columns=VERB_COLUMNS + META_COLUMNS)
+    write_atomic(table_path, lambda tmp: table.to_parquet(tmp, index=False))
+    return table
+
+
+@timed("corpus_cache.build_corpus")
+def build_corpus(patterns, nlp, classify, read_utterances, profile: str, speakers=None,
+                 cache_dir: str = CACHE_DIR, batch_size: int = 256, prefilter=None):
+    """
+    Return the verb table of every .cha file matching the glob pattern(s) and
+    the list of files that had to be (re-)annotated. Utterance indices are per file.
+    read_utterances(path, speakers) reads one file, keeping only speakers whose ID
+    starts with `speakers` (None keeps everyone). With a prefilter, utterances without
+    a known verb form skip spaCy; the result is cached apart from the unfiltered one.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    fingerprint = annotation_fingerprint(nlp, profile, classify, speakers, prefilter)
+    keys = {path: cache_key(path, fingerprint) for path in chat_files(patterns)}
+    manifest = {"fingerprint": fingerprint, "files": keys}
+
+    totals_path = os.path.join(cache_dir, "totals.parquet")
+    manifest_path = os.path.join(cache_dir, "totals.json")
+    if os.path.exists(totals_path) and os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            if json.load(f) == manifest:
+                return pd.read_parquet(totals_path), []
+
+    rebuilt = [path for path in keys if not os.path.exists(os.path.join(cache_dir, f"{keys[path]}.parquet"))]
+    tables = [annotate_file(path, nlp, classify, read_utterances, key, cache_dir, batch_size, speakers, prefilter)
+              for path, key in keys.items()]
+    totals = (pd.concat(tables, ignore_index=True) if tables
+              else pd.DataFrame(columns=VERB_COLUMNS + META_COLUMNS))
+
+    write_atomic(totals_path, lambda tmp: totals.to_parquet(tmp, index=False))
+    write_atomic(manifest_path, lambda tmp: write_json(tmp, manifest))
+    return totals, rebuilt
@@ -0,0 +1,117 @@
+# Parallel map-reduce statistics over a CHAT corpus
+# Each transcript is a map task on a process pool (every worker loads the spaCy
+# pipeline once) that counts lemmas, conjugation classes (classify_verb) and
+# Tense/Person/Number features per file and per speaker; the partial counters
+# are then merged. The merged lemma counts can be written out as a
+# verbs.csv-style ranking (Rank,Lemma,Freq) built from the corpus itself.
+
+import csv
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from chat_reader import chat_files, read_corpus
+from pipelines import DEFAULT_PROFILE, load_pipeline
+
+VERB_POS = ("VERB",)  # same as corpus.verb_rows, so the counts match the annotated tables
+MORPH_FEATURES = ("Tense", "Person", "Number")
+
+
+class VerbStats:
+    """Counters of lemmas, conjugation classes and morphological features."""
+
+    def __init__(self):
+        self.verbs = 0
+        self.lemmas = Counter()
+        self.classes = Counter()
+        self.features = Counter()  # "Tense=Past", "Person=3", ...
+
+    def add(self, token, classification: str):
+        self.verbs += 1
+        self.lemmas[token.lemma_] += 1
+        self.classes[classification] += 1
+        for feature in MORPH_FEATURES:
+            for value in token.morph.get(feature):
+                self.features[f"{feature}={value}"] += 1
+
+    def update(self, other):
+        self.verbs += other.verbs
+        self.lemmas.update(other.lemmas)
+        self.classes.update(other.classes)
+        self.features.update(other.features)
+        return self
+
+    def to_dict(self):
+        return {
+            "verbs": self.verbs,
+            "lemmas": dict(self.lemmas.most_common()),
+            "classes": dict(self.classes),
+            "features": dict(self.features),
+        }
+
+
+def file_stats(path: str, profile: str = DEFAULT_PROFILE, speakers=None, batch_size: int = 256):
+    """
+    Map step: count the verbs of one transcript.
+    Returns (path, file VerbStats, {speaker: VerbStats}).
+    """
+    from turninversionling430project import classify_verb
+
+    nlp = load_pipeline(profile)  # cached, so each worker process loads it once
+    utterances = list(read_corpus(path, speakers))
+    totals = VerbStats()
+    by_speaker = {}
+
+    docs = nlp.pipe((u.text.lower() for u in utterances), batch_size=batch_size)
+    for utterance, doc in zip(utterances, docs):
+        speaker_stats = by_speaker.setdefault(utterance.speaker, VerbStats())
+        for token in doc:
+            if token.pos_ in VERB_POS:
+                classification = classify_verb(token.lemma_)
+                totals.add(token, classification)
+                speaker_stats.add(token, classification)
+
+    return path, totals, by_speaker
+
+
+def _warm_worker(profile: str):
+    load_pipeline(profile)
+
+
+def corpus_stats(patterns, profile: str = DEFAULT_PROFILE, speakers=None, workers: int = None):
+    """
+    Fan the transcripts matching the glob pattern(s) out over `workers` processes
+    (default: every core) and merge the partial counters (reduce step).
+    Returns {"total": VerbStats, "files": {path: VerbStats}, "speakers": {(path, speaker): VerbStats}},
+    keyed by full path so transcripts with the same name in different folders stay apart.
+    """
+    paths = chat_files(patterns)
+    workers = workers or os.cpu_count() or 1
+    result = {"total": VerbStats(), "files": {}, "speakers": {}}
+    if not paths:
+        return result
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths)),
+                             initializer=_warm_worker, initargs=(profile,)) as pool:
+        partials = pool.map(file_stats, paths, [profile] * len(paths), [speakers] * len(paths))
+        for path, stats, by_speaker in partials:
+            result["files"][path] = stats
+            result["total"].update(stats)
+            for speaker, speaker_stats in by_speaker.items():
+                result["speakers"][(path, speaker)] = speaker_stats
+
+    return result
+
+
+def lemma_ranking(stats):
+    """(rank, lemma, freq) rows of a VerbStats' lemma counts, most frequent first."""
+    ranked = sorted(stats.lemmas.items(), key=lambda item: (-item[1], item[0]))
+    return [(rank, lemma, freq) for rank, (lemma, freq) in enumerate(ranked, 1)]
+
+
+def write_lemma_ranking(stats, path: str):
+    """Write the ranking in the format of data/verbs.csv (Rank,Lemma,Freq), readable by load_verb_lemmas."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Rank", "Lemma", "Freq"])
+        writer.writerows(lemma_ranking(stats))
@@ -0,0 +1,247 @@
+# "Fast mode" analyzer
+# Sentences are tokenized with a regex and every word is resolved through the
+# verb lexicon, with a suffix trie over REGULAR_ENDINGS spotting verb-like words
+# the lexicon does not know. spaCy is only run for sentences that still contain
+# unresolved or ambiguous words, and every result records which path produced it.
+# Fast mode trades some accuracy for speed, so words that are more often nouns or
+# adjectives than verb forms ("casa", "bolo", "nada") and lexicon hits right after
+# an article, possessive, demonstrative or preposition ("a casa dela") are left
+# to spaCy instead of being reported as verbs.
+# With a fuzzy index (fuzzy.py), verbs found by spaCy that the lexicon does not
+# know (misspelled ASR tokens) are matched to their nearest lexicon form.
+
+import re
+import time
+
+from analyzer import analyze_doc
+from conjugator import REGULAR_ENDINGS
+from lexicon import get_lexicon
+
+WORD = re.compile(r"\w+", re.UNICODE)
+
+# frequent closed-class words; when the lexicon also knows them as verb forms
+# ("como", "para") the word is ambiguous and left to spaCy
+FUNCTION_WORDS = frozenset("""
+a à ao aos as às o os um uma uns umas de do da dos das dum duma em no na nos nas num numa
+por pelo pela pelos pelas para pra pro com sem sob sobre entre até desde contra após
+e ou mas nem que se porque como quando onde quanto enquanto embora pois então também
+eu tu ele ela nós vós eles elas você vocês me te lhe nos vos lhes se mim ti si comigo contigo
+meu minha meus minhas teu tua teus tuas seu sua seus suas nosso nossa nossos nossas
+este esta estes estas esse essa esses essas aquele aquela aqueles aquelas isto isso aquilo
+lo la los las não sim já ainda muito pouco mais menos bem mal aqui ali lá cá aí só tão
+""".split())
+
+# lexicon forms that are (far more often) nouns, adjectives or adverbs: casa (casar), bolo (bolar), nada (nadar)
+NOMINAL_HOMOGRAPHS = frozenset("""
+casa nada bolo parte filme programa caso porta torre saco curso marco bicho jogo cheiro falta causa prova
+forma trabalho resto monte venda medo banho começo formato estrutura calça fixo seguro interno marca almoço
+ensino arquivo cozinha olho baixo conta peso sonho uso custo pesca troca ajuda luta cedo junto barra passo bola
+""".split())
+
+# words after which a lexicon hit is more likely a noun than a verb ("a casa", "do jogo", "meu olho")
+NOMINAL_CONTEXT = frozenset("""
+o a os as um uma uns umas do da dos das no na nos nas num numa dum duma ao aos à às pelo pela pelos pelas
+meu minha meus minhas teu tua teus tuas seu sua seus suas nosso nossa nossos nossas
+este esta estes estas esse essa esses essas aquele aquela aqueles aquelas
+""".split())
+# after a preposition only an infinitive is taken as a verb ("para falar", but "de trabalho")
+PREPOSITIONS = frozenset("de em por para pra pro com sem sobre entre até desde".split())
+
+# frequent forms of irregular verbs, which REGULAR_ENDINGS cannot resolve, by lemma
+IRREGULAR_LEMMA_FORMS = {lemma: frozenset(forms.split()) for lemma, forms in {
+    "ser": "sou és é somos são fui foste foi fomos foram era eras éramos eram seja sejas sejamos sejam",
+    "estar": "estou estás está estamos estão estive esteve estivemos estiveram estava estavas estávamos estavam "
+             "esteja estejam",
+    "ter": "tenho tens tem temos têm tive teve tivemos tiveram tinha tinhas tínhamos tinham tenha tenhas tenhamos tenham",
+    "ir": "vou vais vai vamos vão fui foste foi fomos foram ia ias íamos iam vá vás",
+    "poder": "posso podes pode podemos podem pude pôde pudemos puderam podia podiam possa possam",
+    "fazer": "faço fazes faz fazemos fazem fiz fez fizemos fizeram fazia faziam faça façam",
+    "dar": "dou dás dá damos dão dei deu demos deram dava davam dê dêem",
+    "dizer": "digo dizes diz dizemos dizem disse dissemos disseram dizia diziam diga digam",
+    "querer": "quero queres quer queremos querem quis quisemos quiseram queria queriam queira queiram",
+    "saber": "sei sabes sabe sabemos sabem soube soubemos souberam sabia sabiam saiba saibam",
+    "ver": "vejo vês vê vemos veem vi viu vimos viram via viam veja vejam",
+    "vir": "venho vens vem vimos vêm vim veio viemos vieram vinha vinham venha venham",
+    "pôr": "ponho pões põe pomos põem pus pôs pusemos puseram punha punham ponha ponham",
+    "haver": "hei hás há havemos hão houve havia haja",
+}.items()}
+IRREGULAR_FORMS = frozenset().union(*IRREGULAR_LEMMA_FORMS.values())
+
+
+class SuffixTrie:
+    """Trie over the reversed suffixes of REGULAR_ENDINGS."""
+
+    def __init__(self, endings=REGULAR_ENDINGS):
+        self.root = {}
+        for ending, tenses in endings.items():
+            for tense_name, persons in tenses.items():
+                for person_code, suffix in persons.items():
+                    node = self.root
+                    for char in reversed(suffix):
+                        node = node.setdefault(char, {})
+                    node.setdefault(None, []).append((ending, f"{person_code}-{tense_name}"))
+
+    def matches(self, word: str):
+        """Yield (suffix length, conjugation class, code) for every suffix the word ends in."""
+        node = self.root
+        for length, char in enumerate(reversed(word), 1):
+            node = node.get(char)
+            if node is None:
+                return
+            for ending, code in node.get(None, ()):
+                yield length, ending, code
+
+
+SUFFIXES = SuffixTrie()
+
+# word statuses
+RESOLVED = "resolved"    # one lemma and one tense (person can still be 2SG-For/3SG)
+AMBIGUOUS = "ambiguous"  # several lemmas or tenses
+UNRESOLVED = "unresolved"  # looks like a verb but the lexicon cannot tell
+OTHER = "other"          # not a verb candidate
+
+
+def resolve_word(word: str, lexicon=None, trie=SUFFIXES, previous: str = None):
+    """Return (status, analyses) for one lowercased word, `previous` being the word before it."""
+    lexicon = get_lexicon() if lexicon is None else lexicon
+    analyses = lexicon.get(word, ())
+
+    if analyses:
+        if word in FUNCTION_WORDS or word in IRREGULAR_FORMS or word in NOMINAL_HOMOGRAPHS:
+            return AMBIGUOUS, analyses
+        if previous in NOMINAL_CONTEXT:
+            return AMBIGUOUS, analyses
+        if previous in PREPOSITIONS and any(a.tense != "Infinitive" for a in analyses):
+            return AMBIGUOUS, analyses
+        if len({a.lemma for a in analyses}) > 1 or len({a.tense for a in analyses}) > 1:
+            return AMBIGUOUS, analyses
+        return RESOLVED, analyses
+
+    if word in IRREGULAR_FORMS:
+        return UNRESOLVED, ()
+    if word in FUNCTION_WORDS:
+        return OTHER, ()
+    # a verb ending (two letters or more, after a real stem) on a word the lexicon does not know
+    for length, _, _ in trie.matches(word):
+        if length >= 2 and len(word) - length >= 2:
+            return UNRESOLVED, ()
+    return OTHER, ()
+
+
+def lexicon_result(text: str, analyses):
+    labels = list(dict.fromkeys(a.label for a in analyses))
+    return {
+        "Verb": text,
+        "Lemma": analyses[0].lemma,
+        "Conjugation": " / ".join(labels),
+        "Source": "fast",
+    }
+
+
+class FastAnalyzer:
+    """
+    Analyze sentences through the lexicon and only call spaCy when needed.
+    `load_nlp` is a zero-argument callable returning the spaCy pipeline, so the
+    model is never loaded if every sentence can be resolved on the fast path.
+    Instead of it, `analyze_spacy` can take a list of sentences and return their
+    analyze_doc results (e.g. model_pool.ModelPool.analyze, which owns the pipeline).
+    """
+
+    def __init__(self, load_nlp, lexicon=None, fuzzy=None, analyze_spacy=None):
+        self.load_nlp = load_nlp
+        self.analyze_spacy = analyze_spacy
+        self.lexicon = lexicon
+        self.fuzzy = fuzzy  # optional fuzzy.FuzzyIndex, the fallback tier for misspelled verbs
+        self.fuzzy_lookups = 0
+        self.fuzzy_hits = 0
+        self.fuzzy_corrections = 0
+        self.sentences = 0
+        self.fast_sentences = 0
+        self.fast_seconds = 0.0
+        self.spacy_seconds = 0.0
+
+    def fast_pass(self, sentence: str):
+        """Return the fast-path results, or None if the sentence needs spaCy."""
+        results = []
+        previous = None
+        for match in WORD.finditer(sentence):
+            word = match.group().lower()
+            status, analyses = resolve_word(word, self.lexicon, previous=previous)
+            if status in (AMBIGUOUS, UNRESOLVED):
+                return None
+            if status == RESOLVED:
+                results.append(lexicon_result(match.group(), analyses))
+            previous = word
+        return results
+
+    def fuzzy_fallback(self, result):
+        """
+        Fuzzy tier for a verb found by spaCy that the lexicon does not know (often an
+        ASR misspelling): record its nearest lexicon form as "Corrected", and label
+        it from that form when spaCy had no label either.
+        """
+        lexicon = get_lexicon() if self.lexicon is None else self.lexicon
+        if result["Verb"].lower() in lexicon:
+            return result
+        self.fuzzy_lookups += 1
+        corrected = self.fuzzy.correct(result["Verb"])
+        if corrected is None:
+            return result
+        self.fuzzy_hits += 1
+        result = dict(result, Corrected=corrected)
+        if result["Conjugation"] == "(unknown)":
+            self.fuzzy_corrections += 1
+            result["Conjugation"] = lexicon_result(result["Verb"], lexicon[corrected])["Conjugation"]
+        return result
+
+    def analyze(self, sentence: str):
+        return self.analyze_many([sentence])[0]
+
+    def spacy_results(self, sentences, batch_size: int = 64):
+        if self.analyze_spacy is not None:
+            return self.analyze_spacy(sentences)
+        return [analyze_doc(doc) for doc in self.load_nlp().pipe(sentences, batch_size=batch_size)]
+
+    def analyze_many(self, sentences, batch_size: int = 64):
+        """Analyze a list of sentences, sending only the unresolved ones to spaCy."""
+        sentences = list(sentences)
+        results = [None] * len(sentences)
+        needs_spacy = []
+
+        start = time.perf_counter()
+        for i, sentence in enumerate(sentences):
+            results[i] = self.fast_pass(sentence)
+            if results[i] is None:
+                needs_spacy.append(i)
+        self.fast_seconds += time.perf_counter() - start
+
+        if needs_spacy:
+            start = time.perf_counter()
+            spacy_results = self.spacy_results([sentences[i] for i in needs_spacy], batch_size)
+            for i, analyses in zip(needs_spacy, spacy_results):
+                results[i] = [dict(r, Source="spacy") for r in analyses]
+                if self.fuzzy is not None:
+                    results[i] = [self.fuzzy_fallback(r) for r in results[i]]
+            self.spacy_seconds += time.perf_counter() - start
+
+        self.sentences += len(sentences)
+        self.fast_sentences += len(sentences) - len(needs_spacy)
+        return results
+
+    def stats(self):
+        """Bypass rate and an estimate of the spaCy time the fast path saved."""
+        spacy_sentences = self.sentences - self.fast_sentences
+        spacy_per_sentence = self.spacy_seconds / spacy_sentences if spacy_sentences else 0.0
+        fast_per_sentence = self.fast_seconds / self.sentences if self.sentences else 0.0
+        return {
+            "sentences": self.sentences,
+            "fast_sentences": self.fast_sentences,
+            "spacy_sentences": spacy_sentences,
+            "bypass_rate": self.fast_sentences / self.sentences if self.sentences else 0.0,
+            "fast_seconds": self.fast_seconds,
+            "spacy_seconds": self.spacy_seconds,
+            "seconds_saved": self.fast_sentences * max(spacy_per_sentence - fast_per_sentence, 0.0),
+            "fuzzy_lookups": self.fuzzy_lookups,
+            "fuzzy_hits": self.fuzzy_hits,
+            "fuzzy_corrections": self.fuzzy_corrections,
+        }
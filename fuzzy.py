@@ -0,0 +1,153 @@
+# Approximate lookup of verb forms for noisy (ASR) transcripts
+# A symmetric-delete index over every form of the verb lexicon: each form is
+# stored under the strings obtained by deleting up to `max_distance` characters
+# from its first `prefix_length` characters, and a misspelled word is looked up
+# through its own deletes. The candidates found this way are narrowed down by
+# length and letter set, and at most MAX_CANDIDATES of them are checked with a
+# bounded Damerau-Levenshtein distance, so a lookup costs a few dozen dict probes
+# and distance checks instead of a scan of the 27k forms. The distance check is
+# pure Python and dominates: a cold distance-2 correction takes ~0.1 ms typically
+# and ~1 ms for words whose stem is shared by many forms (the cap bounds it at a
+# few ms); repeated words come from the LRU cache.
+
+import heapq
+from functools import lru_cache
+
+from analysis_cache import TOKEN_CACHE_SIZE, LRUCache
+from lexicon import get_lexicon, load_verb_lemmas
+
+MAX_DISTANCE = 2
+PREFIX_LENGTH = 7
+MAX_CANDIDATES = 64  # distance checks per lookup, closest-looking and most frequent forms first
+
+
+def deletes(word: str, distance: int):
+    """Every string obtained by deleting at most `distance` characters from `word`."""
+    found = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        found |= frontier
+    return found
+
+
+def letter_mask(word: str):
+    """Bit set of the letters of a word (one bit per code point modulo 64; collisions only weaken the bound)."""
+    mask = 0
+    for char in word:
+        mask |= 1 << (ord(char) & 63)
+    return mask
+
+
+def edit_distance(a: str, b: str, limit: int):
+    """Optimal string alignment distance between a and b, or limit + 1 once it exceeds `limit`."""
+    # the shared prefix and suffix cost nothing, and most candidates share a long prefix with the word
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    a, b = a[start:end_a], b[start:end_b]
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if not a or not b:
+        return max(len(a), len(b))
+
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [limit + 1] * len(b)
+        # only cells within `limit` of the diagonal can stay under the limit
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            cost = a[i - 1] != b[j - 1]
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)  # transposition
+            current[j] = value
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+class FuzzyIndex:
+    """Nearest lexicon forms of a word within an edit distance (symmetric delete)."""
+
+    def __init__(self, lexicon=None, max_distance: int = MAX_DISTANCE, prefix_length: int = PREFIX_LENGTH,
+                 max_candidates: int = MAX_CANDIDATES):
+        self.lexicon = get_lexicon() if lexicon is None else lexicon
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.max_candidates = max_candidates
+
+        lemma_rank = {lemma: rank for rank, lemma in enumerate(load_verb_lemmas())}
+        self.forms = sorted(self.lexicon)
+        # ties between equally close forms go to the form of the most frequent lemma
+        self.ranks = [min(lemma_rank.get(a.lemma, len(lemma_rank)) for a in self.lexicon[form]) for form in self.forms]
+        self.lengths = [len(form) for form in self.forms]
+        self.letters = [letter_mask(form) for form in self.forms]
+        self.corrections = LRUCache(TOKEN_CACHE_SIZE)  # (word, distance) -> form, ASR errors repeat
+        self.index = {}
+        for i, form in enumerate(self.forms):
+            for key in deletes(form[:prefix_length], max_distance):
+                self.index.setdefault(key, []).append(i)
+
+    def candidates(self, word: str, max_distance: int):
+        """
+        Indices of the forms sharing a delete key with the word that can be within max_distance:
+        the lengths differ by at most max_distance and so do the sets of letters, since every
+        letter only one of the two strings has costs an edit. The key only covers the first
+        `prefix_length` characters, so without these checks every form of a lemma with a long
+        stem would reach edit_distance. At most `max_candidates` are returned, those with the
+        lowest of these bounds (then of the most frequent lemmas) first.
+        """
+        found = set()
+        for key in deletes(word[:self.prefix_length], max_distance):
+            found.update(self.index.get(key, ()))
+        lengths, letters, ranks = self.lengths, self.letters, self.ranks
+        length, mask = len(word), letter_mask(word)
+        bounded = []
+        for i in found:
+            bound = max(abs(lengths[i] - length), (mask & ~letters[i]).bit_count(), (letters[i] & ~mask).bit_count())
+            if bound <= max_distance:
+                bounded.append((bound, ranks[i], i))
+        if len(bounded) > self.max_candidates:
+            bounded = heapq.nsmallest(self.max_candidates, bounded)
+        return [i for _, _, i in bounded]
+
+    def lookup(self, word: str, max_distance: int = None):
+        """[(form, distance), ...] of the forms within max_distance of word, closest (then most frequent) first."""
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        word = word.lower()
+        matches = []
+        for i in self.candidates(word, max_distance):
+            distance = edit_distance(word, self.forms[i], max_distance)
+            if distance <= max_distance:
+                matches.append((distance, self.ranks[i], self.forms[i]))
+        return [(form, distance) for distance, _, form in sorted(matches)]
+
+    def correct(self, word: str, max_distance: int = None):
+        """
+        The closest known form of a word that is not in the lexicon itself, or None.
+        Distances are tried in increasing order, so most corrections stop at distance 1.
+        """
+        word = word.lower()
+        if word in self.lexicon:
+            return None
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        return self.corrections.get_or_compute((word, max_distance), lambda: self._nearest(word, max_distance))
+
+    def _nearest(self, word: str, max_distance: int):
+        for distance in range(1, max_distance + 1):
+            matches = self.lookup(word, distance)
+            if matches:
+                return matches[0][0]
+        return None
+
+
+@lru_cache(maxsize=None)
+def get_fuzzy_index(max_distance: int = MAX_DISTANCE):
+    """The fuzzy index over get_lexicon(), built once per process and distance."""
+    return FuzzyIndex(get_lexicon(), max_distance)
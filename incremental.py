@@ -0,0 +1,54 @@
+# Incremental re-analysis of multi-sentence input
+# A pasted passage is split into sentences (and lines, so transcripts work too)
+# and every sentence is fingerprinted. The verb analyses of the previous version
+# of the passage are kept by fingerprint, so after an edit only the sentences
+# whose text changed are sent to the analyzer, in a single batch.
+
+import hashlib
+import re
+
+# a sentence runs up to . ! ? or … (possibly repeated and followed by closing quotes)
+# before whitespace, or up to the end of its line
+SENTENCE = re.compile(r"[^\s][^\n]*?(?:[.!?…]+[\"')\]»]*(?=\s|$)|(?=\n)|$)")
+SPACES = re.compile(r"\s+")
+
+
+def split_sentences(text: str):
+    """Split a passage into its non-empty sentences, in order."""
+    return [m.group().strip() for m in SENTENCE.finditer(text)]
+
+
+def fingerprint(sentence: str):
+    """Hash of a sentence's text with its whitespace normalized."""
+    return hashlib.blake2b(SPACES.sub(" ", sentence.strip()).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class IncrementalAnalyzer:
+    """
+    Re-analyzes a passage sentence by sentence, reusing the results of sentences
+    that did not change since the previous call. `analyze_many` takes a list of
+    sentences and returns one list of verb analyses per sentence.
+    """
+
+    def __init__(self, analyze_many):
+        self.analyze_many = analyze_many
+        self.previous = {}  # fingerprint -> verb analyses, for the last passage only
+        self.reused = 0
+        self.analyzed = 0
+
+    def analyze(self, text: str):
+        """Return (sentence, verb analyses) for every sentence of the passage."""
+        sentences = split_sentences(text)
+        keys = [fingerprint(s) for s in sentences]
+
+        changed = {}  # fingerprint -> sentence, each distinct changed sentence once
+        for key, sentence in zip(keys, sentences):
+            if key not in self.previous:
+                changed.setdefault(key, sentence)
+        results = dict(zip(changed, self.analyze_many(list(changed.values())))) if changed else {}
+
+        current = {key: results[key] if key in results else self.previous[key] for key in keys}
+        self.reused = len(sentences) - sum(1 for key in keys if key in results)
+        self.analyzed = len(changed)
+        self.previous = current
+        return [(sentence, current[key]) for sentence, key in zip(sentences, keys)]
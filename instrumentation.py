@@ -0,0 +1,216 @@
+# Lightweight per-stage instrumentation
+# Stages (model load, tokenizer, each spaCy component, label building, the
+# lexicon/regular-conjugation fallbacks, corpus annotation) record their wall
+# time and call count, plus an optional tracemalloc peak, into one process-wide
+# table. Everything is off by default: a disabled stage() returns a shared no-op
+# context manager and a disabled @timed function only pays one flag check, made
+# at call time, so turning it on later also times the per-token functions.
+# Turn it on for the whole process with enable() or LING_INSTRUMENT=1
+# (LING_INSTRUMENT=memory also traces allocations), or only for the current
+# context (thread or contextvars.Context) with use_session(): each Streamlit
+# session runs its script in its own thread, so one session's diagnostics
+# switch does not affect the others. Every finished stage is logged as a JSON
+# line on the "ling.instrumentation" logger at DEBUG level, and snapshot()
+# returns the table together with the hit rates of the registered caches.
+
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+logger = logging.getLogger("ling.instrumentation")
+
+_enabled = False
+_trace_memory = False
+_lock = threading.Lock()
+_stats = {}   # stage name -> [calls, total seconds, max seconds, peak bytes]
+_caches = {}  # name -> object with a stats() dict holding hits and misses
+_NOOP = contextlib.nullcontext()
+# per-context override (enabled, trace_memory), set by use_session(); None follows enable()/disable()
+_session = contextvars.ContextVar("ling_instrumentation", default=None)
+_sessions_used = False  # skip the ContextVar lookup until some context overrides the process setting
+
+
+def enable(trace_memory: bool = False):
+    global _enabled, _trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not trace_memory and _trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _trace_memory = trace_memory
+    _enabled = True
+
+
+def disable():
+    global _enabled, _trace_memory
+    _enabled = False
+    if _trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _trace_memory = False
+
+
+def use_session(enabled: bool, trace_memory: bool = False):
+    """
+    Turn instrumentation on or off for the current context only. Memory tracing
+    starts tracemalloc for the whole process, and a session never stops it,
+    since other sessions may still be tracing.
+    """
+    global _sessions_used
+    _sessions_used = True
+    trace_memory = enabled and trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _session.set((enabled, trace_memory))
+
+
+def is_enabled():
+    if _sessions_used:
+        override = _session.get()
+        if override is not None:
+            return override[0]
+    return _enabled
+
+
+def is_tracing_memory():
+    if _sessions_used:
+        override = _session.get()
+        if override is not None:
+            return override[1]
+    return _trace_memory
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def register_cache(name: str, cache):
+    """Report a cache's hit rate in snapshot() (anything with a stats() dict of hits/misses)."""
+    _caches[name] = cache
+
+
+def record(name: str, seconds: float, peak_bytes: int = 0):
+    with _lock:
+        entry = _stats.setdefault(name, [0, 0.0, 0.0, 0])
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+        entry[3] = max(entry[3], peak_bytes)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(json.dumps({"stage": name, "seconds": seconds, "peak_bytes": peak_bytes}))
+
+
+@contextlib.contextmanager
+def _measure(name: str):
+    trace = is_tracing_memory() and tracemalloc.is_tracing()
+    if trace:
+        tracemalloc.reset_peak()  # nested stages reset the peak, so it belongs to the innermost stage
+        base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] - base if trace and tracemalloc.is_tracing() else 0
+        record(name, seconds, peak)
+
+
+def stage(name: str):
+    """Context manager timing a block as one call of stage `name` (a no-op when disabled)."""
+    return _measure(name) if is_enabled() else _NOOP
+
+
+def timed(name: str):
+    """Decorator timing every call of a function as stage `name`, whenever instrumentation is on at call time."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if (_enabled or _sessions_used) and is_enabled():  # one global read while nothing is on
+                with _measure(name):
+                    return function(*args, **kwargs)
+            return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def timed_iter(name: str, iterable):
+    """Yield from an iterable, timing each step (e.g. the docs of nlp.pipe) as stage `name`."""
+    if not is_enabled():
+        return iterable
+
+    def steps():
+        iterator = iter(iterable)
+        while True:
+            with _measure(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+    return steps()
+
+
+def instrumented_doc(nlp, text: str):
+    """nlp(text), with the tokenizer and every pipeline component timed as separate stages when enabled."""
+    if not is_enabled():
+        return nlp(text)
+    with _measure("spacy.tokenizer"):
+        doc = nlp.make_doc(text)
+    for component, process in nlp.pipeline:
+        with _measure(f"spacy.{component}"):
+            doc = process(doc)
+    return doc
+
+
+def instrumented_pipe(nlp, texts, batch_size: int = 64):
+    """
+    nlp.pipe(texts) as a list of docs; when enabled the tokenizer and every component
+    run over the whole batch one after the other, so each is timed as its own stage.
+    """
+    if not is_enabled():
+        return list(nlp.pipe(texts, batch_size=batch_size))
+    with _measure("spacy.tokenizer"):
+        docs = [nlp.make_doc(text) for text in texts]
+    for component, process in nlp.pipeline:
+        with _measure(f"spacy.{component}"):
+            if hasattr(process, "pipe"):
+                docs = list(process.pipe(docs, batch_size=batch_size))
+            else:
+                docs = [process(doc) for doc in docs]
+    return docs
+
+
+def snapshot():
+    """{"stages": {name: {...}}, "caches": {name: {...}}} with totals, means and hit rates."""
+    with _lock:
+        stages = {
+            name: {
+                "calls": calls,
+                "total_s": total,
+                "mean_ms": total / calls * 1000 if calls else 0.0,
+                "max_ms": longest * 1000,
+                "peak_kb": peak / 1024,
+            }
+            for name, (calls, total, longest, peak) in _stats.items()
+        }
+    caches = {}
+    for name, cache in _caches.items():
+        stats = cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        caches[name] = dict(stats, hit_rate=stats["hits"] / lookups if lookups else 0.0)
+    return {"enabled": is_enabled(), "trace_memory": is_tracing_memory(), "stages": stages, "caches": caches}
+
+
+def log_snapshot(level: int = logging.INFO):
+    """Log the whole table as one JSON line."""
+    logger.log(level, json.dumps(snapshot()))
+
+
+# on from startup
+if os.environ.get("LING_INSTRUMENT", "").lower() not in ("", "0", "false"):
+    enable(trace_memory=os.environ["LING_INSTRUMENT"].lower() == "memory")
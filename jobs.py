@@ -0,0 +1,400 @@
+# Resumable, sharded corpus annotation jobs
+# `plan` splits the .cha files of a corpus into shards of roughly equal size and
+# writes them to a manifest in a job directory. `run` works through the shards.
+# Several runs may work on the same job at once, either local worker processes
+# or separate invocations on other machines that share the job directory. Each
+# run claims a shard with an exclusive lock file, annotates its files (through
+# the per-file cache of corpus_cache.py) and writes the shard's verb table
+# atomically, followed by a done marker. `merge` concatenates the finished
+# shards in corpus order and adds the conjugations.
+# A crashed or interrupted run loses at most the shard it was working on. A
+# re-run skips every shard that has a done marker, and takes over locks whose
+# owner died (same machine) or stopped updating them (--stale-after seconds).
+#
+# Layout of the job directory:
+#   manifest.json             patterns, speakers, profile and [{id, files: [{path, sha256, bytes}]}]
+#   shards/<id>.parquet       verb table of the shard (corpus.VERB_COLUMNS + META_COLUMNS)
+#   shards/<id>.done          {"rows", "seconds", "host", "pid", "fingerprint"}, written last
+#   shards/<id>.lock          {"host", "pid", "token", "time"} while a run is working on the shard
+#   verbs.parquet             merged, annotated verb table
+#
+# Run with:  python jobs.py plan JOB "data/bfamdl/*.cha" --shards 8
+#            python jobs.py run JOB --workers 4        (also on other machines)
+#            python jobs.py status JOB
+#            python jobs.py merge JOB
+
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from chat_reader import chat_files
+from pipelines import ANALYSIS_PROFILES, DEFAULT_PROFILE
+
+STALE_AFTER = float(os.environ.get("LING_JOB_STALE_AFTER", 3600))  # seconds without a heartbeat
+HOST = socket.gethostname()
+
+
+class JobError(Exception):
+    """The job directory is missing, out of date or not finished."""
+
+
+class LostLock(JobError):
+    """Another run took over a shard's lock (this run was considered stale)."""
+
+
+def manifest_path(job_dir: str):
+    return os.path.join(job_dir, "manifest.json")
+
+
+def shard_path(job_dir: str, shard_id: str, suffix: str):
+    return os.path.join(job_dir, "shards", f"{shard_id}.{suffix}")
+
+
+def split_files(files, shards: int):
+    """
+    Cut the sorted list of (path, bytes) into at most `shards` contiguous runs of
+    about the same total size, so merging the shards keeps the corpus order.
+    """
+    total = sum(size for _, size in files)
+    target = total / max(1, shards)
+    groups, current, done = [], [], 0
+    for path, size in files:
+        current.append((path, size))
+        done += size
+        if done >= target * (len(groups) + 1) and len(groups) < shards - 1:
+            groups.append(current)
+            current = []
+    if current:
+        groups.append(current)
+    return groups
+
+
+def plan(job_dir: str, patterns, shards: int, speakers: str = "PAR", profile: str = DEFAULT_PROFILE,
+         replan: bool = False):
+    """
+    Write the manifest of a new job. An existing manifest is kept when the corpus,
+    speakers and profile are unchanged; otherwise JobError, unless `replan`, which
+    discards the finished shards as well.
+    """
+    from corpus_cache import file_hash, write_atomic, write_json
+
+    files = [(path, os.path.getsize(path)) for path in chat_files(patterns)]
+    if not files:
+        raise JobError(f"no .cha files match {patterns}")
+    manifest = {
+        "patterns": [patterns] if isinstance(patterns, str) else list(patterns),
+        "speakers": speakers,
+        "profile": profile,
+        "shards": [
+            {"id": f"{i:05d}", "files": [{"path": path, "sha256": file_hash(path), "bytes": size}
+                                         for path, size in group]}
+            for i, group in enumerate(split_files(files, shards))
+        ],
+    }
+
+    if os.path.exists(manifest_path(job_dir)):
+        old = load_manifest(job_dir)
+        if old == manifest:
+            return old
+        if not replan:
+            raise JobError(f"{job_dir} already holds a different job (corpus, speakers or profile "
+                           "changed); use another directory or --replan")
+        shards_dir = os.path.join(job_dir, "shards")
+        for name in os.listdir(shards_dir) if os.path.isdir(shards_dir) else ():
+            os.remove(os.path.join(shards_dir, name))
+
+    os.makedirs(os.path.join(job_dir, "shards"), exist_ok=True)
+    write_atomic(manifest_path(job_dir), lambda tmp: write_json(tmp, manifest))
+    return manifest
+
+
+def load_manifest(job_dir: str):
+    if not os.path.exists(manifest_path(job_dir)):
+        raise JobError(f"no manifest in {job_dir} (run plan first)")
+    with open(manifest_path(job_dir), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def is_done(job_dir: str, shard_id: str):
+    return os.path.exists(shard_path(job_dir, shard_id, "done"))
+
+
+def read_lock(path: str):
+    """The owner record of a lock file, or None when it is gone or still being written."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _lock_owner_dead(path: str, stale_after: float):
+    owner = read_lock(path)
+    try:
+        age = time.time() - os.path.getmtime(path)
+    except OSError:
+        return False
+    if owner is None:  # unreadable: only stale once it is old
+        return age > stale_after
+    if age > stale_after:
+        return True
+    if owner.get("host") == HOST:
+        try:
+            os.kill(owner["pid"], 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass
+    return False
+
+
+def _take_over(path: str, stale_after: float):
+    """
+    Move a dead owner's lock aside. The lock moved is checked to be the one judged
+    dead; if another run replaced it in between, it is linked back (os.link never
+    overwrites) and the takeover is abandoned. Returns True when the path is free.
+    """
+    if not _lock_owner_dead(path, stale_after):
+        return False
+    dead = read_lock(path)
+    aside = f"{path}.stale-{uuid.uuid4().hex}"
+    try:
+        os.rename(path, aside)
+    except FileNotFoundError:  # another run moved it first
+        return False
+    moved = read_lock(aside)
+    if (moved or {}).get("token") != (dead or {}).get("token"):
+        try:
+            os.link(aside, path)  # a fresh lock was moved by mistake, put it back
+        except FileExistsError:
+            pass
+        os.remove(aside)
+        return False
+    os.remove(aside)
+    return True
+
+
+def claim(job_dir: str, shard_id: str, stale_after: float = STALE_AFTER):
+    """
+    Take the lock of a shard (O_CREAT | O_EXCL, so only one run on any machine gets it)
+    and return this run's token for it, or None when another run holds it.
+    A lock whose owner died is taken over first, then re-read to confirm the token.
+    """
+    path = shard_path(job_dir, shard_id, "lock")
+    token = f"{HOST}:{os.getpid()}:{uuid.uuid4().hex}"
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            if not _take_over(path, stale_after):
+                return None
+            continue
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"host": HOST, "pid": os.getpid(), "token": token, "time": time.time()}, f)
+        return token if owns(job_dir, shard_id, token) else None
+    return None
+
+
+def owns(job_dir: str, shard_id: str, token: str):
+    return (read_lock(shard_path(job_dir, shard_id, "lock")) or {}).get("token") == token
+
+
+def heartbeat(job_dir: str, shard_id: str, token: str):
+    """Tell other runs the shard is still being worked on; LostLock if another run took it over."""
+    if not owns(job_dir, shard_id, token):
+        raise LostLock(f"shard {shard_id}: lock was taken over by another run (raise --stale-after?)")
+    os.utime(shard_path(job_dir, shard_id, "lock"))
+
+
+def release(job_dir: str, shard_id: str, token: str):
+    """Remove the lock, but only if it is still this run's."""
+    if owns(job_dir, shard_id, token):
+        try:
+            os.remove(shard_path(job_dir, shard_id, "lock"))
+        except FileNotFoundError:
+            pass
+
+
+def check_files(shard):
+    """Refuse to annotate a shard whose files changed since the manifest was written."""
+    from corpus_cache import file_hash
+
+    changed = [f["path"] for f in shard["files"] if not os.path.exists(f["path"]) or file_hash(f["path"]) != f["sha256"]]
+    if changed:
+        raise JobError(f"shard {shard['id']}: {', '.join(changed)} changed since the job was planned (plan again with --replan)")
+
+
+def process_shard(job_dir: str, manifest, shard, token: str, cache_dir: str = None, batch_size: int = 256):
+    """
+    Annotate the files of one shard and write its table and done marker. The caller
+    holds the lock (`token`); LostLock when another run took it over meanwhile.
+    """
+    import pandas as pd
+
+    import turninversionling430project as project
+    from corpus import META_COLUMNS, VERB_COLUMNS
+    from corpus_cache import CACHE_DIR, annotate_file, annotation_fingerprint, cache_key, write_atomic, write_json
+    from pipelines import load_pipeline
+
+    check_files(shard)
+    start = time.perf_counter()
+    nlp = load_pipeline(manifest["profile"])
+    speakers = manifest["speakers"]
+    fingerprint = annotation_fingerprint(nlp, manifest["profile"], project.classify_verb, speakers)
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+
+    tables = []
+    for f in shard["files"]:
+        key = cache_key(f["path"], fingerprint)
+        tables.append(annotate_file(f["path"], nlp, project.classify_verb, project.read_bfamdl_file, key, cache_dir,
+                                    batch_size, speakers))
+        heartbeat(job_dir, shard["id"], token)
+    table = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(columns=VERB_COLUMNS + META_COLUMNS)
+
+    heartbeat(job_dir, shard["id"], token)
+    write_atomic(shard_path(job_dir, shard["id"], "parquet"), lambda tmp: table.to_parquet(tmp, index=False))
+    write_atomic(shard_path(job_dir, shard["id"], "done"), lambda tmp: write_json(tmp, {
+        "rows": len(table),
+        "seconds": time.perf_counter() - start,
+        "host": HOST,
+        "pid": os.getpid(),
+        "fingerprint": fingerprint,
+    }))
+    return len(table)
+
+
+def work(job_dir: str, cache_dir: str = None, batch_size: int = 256, stale_after: float = STALE_AFTER):
+    """Claim and process unfinished shards until none is left; returns the ids this run finished."""
+    manifest = load_manifest(job_dir)
+    finished = []
+    for shard in manifest["shards"]:
+        if is_done(job_dir, shard["id"]):
+            continue
+        token = claim(job_dir, shard["id"], stale_after)
+        if token is None:
+            continue
+        try:
+            if not is_done(job_dir, shard["id"]):  # finished by another run between the check and the claim
+                rows = process_shard(job_dir, manifest, shard, token, cache_dir, batch_size)
+                finished.append(shard["id"])
+                print(f"shard {shard['id']}: {rows} verbs", file=sys.stderr)
+        except LostLock as e:  # the run that took over finishes the shard
+            print(f"warning: {e}", file=sys.stderr)
+        finally:
+            release(job_dir, shard["id"], token)
+    return finished
+
+
+def run(job_dir: str, workers: int = 1, cache_dir: str = None, batch_size: int = 256,
+        stale_after: float = STALE_AFTER):
+    """Work on the job with `workers` local processes (each loads the spaCy pipeline once)."""
+    if workers <= 1:
+        return work(job_dir, cache_dir, batch_size, stale_after)
+    with ProcessPoolExecutor(workers) as pool:
+        runs = [pool.submit(work, job_dir, cache_dir, batch_size, stale_after) for _ in range(workers)]
+        return sorted(shard_id for r in runs for shard_id in r.result())
+
+
+def status(job_dir: str, stale_after: float = STALE_AFTER):
+    """{"done": [...], "running": [...], "stale": [...], "pending": [...]} shard ids."""
+    states = {"done": [], "running": [], "stale": [], "pending": []}
+    for shard in load_manifest(job_dir)["shards"]:
+        lock = shard_path(job_dir, shard["id"], "lock")
+        if is_done(job_dir, shard["id"]):
+            states["done"].append(shard["id"])
+        elif os.path.exists(lock):
+            states["stale" if _lock_owner_dead(lock, stale_after) else "running"].append(shard["id"])
+        else:
+            states["pending"].append(shard["id"])
+    return states
+
+
+def merge(job_dir: str, output: str = None):
+    """Concatenate every shard in manifest order, add the conjugations and write the verb table."""
+    import pandas as pd
+
+    import turninversionling430project as project
+    from corpus_cache import write_atomic
+
+    manifest = load_manifest(job_dir)
+    missing = [shard["id"] for shard in manifest["shards"] if not is_done(job_dir, shard["id"])]
+    if missing:
+        raise JobError(f"{len(missing)} shard(s) not finished: {', '.join(missing)}")
+    fingerprints = set()
+    for shard in manifest["shards"]:
+        with open(shard_path(job_dir, shard["id"], "done"), encoding="utf-8") as f:
+            fingerprints.add(json.load(f)["fingerprint"])
+    if len(fingerprints) > 1:
+        raise JobError(f"shards were annotated with different models: {sorted(fingerprints)}")
+
+    table = pd.concat([pd.read_parquet(shard_path(job_dir, shard["id"], "parquet"))
+                       for shard in manifest["shards"]], ignore_index=True)
+    table = project.annotate_conjugations(table)
+    output = output or os.path.join(job_dir, "verbs.parquet")
+    write_atomic(output, lambda tmp: table.to_parquet(tmp, index=False))
+    return output, len(table)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resumable, sharded annotation of a CHAT corpus.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    plan_parser = commands.add_parser("plan", help="split a corpus into shards")
+    plan_parser.add_argument("job", help="job directory")
+    plan_parser.add_argument("patterns", nargs="*", help="glob(s) of .cha files (default: bfamdl 01-14)")
+    plan_parser.add_argument("--shards", type=int, default=8)
+    plan_parser.add_argument("--speakers", default="PAR", help="keep speakers whose ID starts with this")
+    plan_parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=ANALYSIS_PROFILES)
+    plan_parser.add_argument("--replan", action="store_true", help="replace a different plan, dropping its shards")
+
+    run_parser = commands.add_parser("run", help="annotate unfinished shards (safe to start on several machines)")
+    run_parser.add_argument("job")
+    run_parser.add_argument("--workers", type=int, default=1, help="local worker processes")
+    run_parser.add_argument("--cache-dir", default=None, help="per-file cache directory (default: .cache/corpus)")
+    run_parser.add_argument("--batch-size", type=int, default=256)
+    run_parser.add_argument("--stale-after", type=float, default=STALE_AFTER,
+                            help="seconds after which a lock without heartbeat is taken over")
+
+    status_parser = commands.add_parser("status", help="list done, running, stale and pending shards")
+    status_parser.add_argument("job")
+    status_parser.add_argument("--stale-after", type=float, default=STALE_AFTER)
+
+    merge_parser = commands.add_parser("merge", help="combine the finished shards into the annotated verb table")
+    merge_parser.add_argument("job")
+    merge_parser.add_argument("-o", "--output", help="default: <job>/verbs.parquet")
+
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "plan":
+            if not args.patterns:
+                from turninversionling430project import TRAINING_FILES
+
+                args.patterns = TRAINING_FILES
+            manifest = plan(args.job, args.patterns, args.shards, args.speakers, args.profile, args.replan)
+            files = sum(len(shard["files"]) for shard in manifest["shards"])
+            print(f"{files} file(s) in {len(manifest['shards'])} shard(s)")
+        elif args.command == "run":
+            finished = run(args.job, args.workers, args.cache_dir, args.batch_size, args.stale_after)
+            left = status(args.job, args.stale_after)
+            print(f"finished {len(finished)} shard(s) in this run; {len(left['done'])} done, "
+                  f"{len(left['running'])} running elsewhere, {len(left['pending']) + len(left['stale'])} left")
+        elif args.command == "status":
+            for state, ids in status(args.job, args.stale_after).items():
+                print(f"{state:<8} {len(ids):>4}  {' '.join(ids)}")
+        else:
+            output, rows = merge(args.job, args.output)
+            print(f"{rows} verbs written to {output}")
+    except JobError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
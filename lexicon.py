@@ -0,0 +1,168 @@
+# Surface-form index over the whole verb lexicon
+# Every form generated from the lemmas in data/verbs.csv (through REGULAR_ENDINGS)
+# is mapped to all of its analyses once, so looking a token up is a single dict
+# access instead of regenerating and scanning a paradigm for every token.
+# Extra analyses (e.g. irregular paradigms) can be added from form,lemma,code
+# CSV files listed in LING_LEXICON_FORMS (separated by os.pathsep); they are
+# part of lemma_analyses, so the lexicon, the paradigm tables and the
+# conjugation tables all know the same forms.
+
+import csv
+import os
+from functools import lru_cache
+from typing import NamedTuple
+
+from conjugator import (IRREGULAR_VERBS, REGULAR_ENDINGS,
+                        generate_regular_conjugations, match_regular_conjugation,
+                        pretty_label)
+
+DATADIR = os.path.join(os.path.dirname(__file__), "data")
+VERBS_CSV = os.path.join(DATADIR, "verbs.csv")
+EXTRA_FORMS = tuple(filter(None, os.environ.get("LING_LEXICON_FORMS", "").split(os.pathsep)))
+
+
+class Analysis(NamedTuple):
+    """One reading of a surface form, e.g. ("falar", "1PL", "PSTSimple")."""
+    lemma: str
+    person: str  # person/number code from REGULAR_ENDINGS, "" for the infinitive
+    tense: str   # tense code from REGULAR_ENDINGS, or "Infinitive"
+
+    @property
+    def code(self):
+        """Code in the generate_regular_conjugations format ("1PL-PSTSimple")."""
+        if self.tense == "Infinitive":
+            return "Infinitive"
+        return f"{self.person}-{self.tense}"
+
+    @property
+    def label(self):
+        return pretty_label(self.code)
+
+
+@lru_cache(maxsize=8)
+def load_verb_lemmas(path: str = VERBS_CSV):
+    """Return the lemmas of verbs.csv in rank order (read once per path)."""
+    with open(path, newline="", encoding="utf-8") as f:
+        return tuple(row["Lemma"] for row in csv.DictReader(f))
+
+
+def load_extra_forms(paths=EXTRA_FORMS):
+    """{lemma: [(form, Analysis), ...]} read from form,lemma,code CSV files."""
+    extra = {}
+    for path in paths:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                code = row["code"]
+                person, tense = ("", "Infinitive") if code == "Infinitive" else code.rsplit("-", 1)
+                lemma = row["lemma"].strip().lower()
+                extra.setdefault(lemma, []).append((row["form"].strip().lower(), Analysis(lemma, person, tense)))
+    return extra
+
+
+@lru_cache(maxsize=1)
+def get_extra_forms():
+    """The extra analyses of LING_LEXICON_FORMS (read once)."""
+    return load_extra_forms(EXTRA_FORMS)
+
+
+def lexicon_lemmas(path: str = VERBS_CSV, extra=None):
+    """The lemmas of verbs.csv in rank order, followed by the other lemmas that have extra forms."""
+    extra = get_extra_forms() if extra is None else extra
+    return tuple(dict.fromkeys(load_verb_lemmas(path) + tuple(extra)))
+
+
+def is_irregular(lemma: str):
+    """True for lemmas REGULAR_ENDINGS cannot conjugate (IRREGULAR_VERBS, -or/-ôr verbs, non-verbs)."""
+    return lemma in IRREGULAR_VERBS or lemma[-2:] not in REGULAR_ENDINGS
+
+
+def is_verb_lemma(lemma: str):
+    """True for lemmas the lexicon knows at least the infinitive of (regular, irregular or -or/-ôr verbs)."""
+    return lemma in IRREGULAR_VERBS or lemma[-2:] in REGULAR_ENDINGS or lemma.endswith(("or", "ôr"))
+
+
+def lemma_analyses(lemma: str, extra=None):
+    """
+    Yield (form, Analysis) pairs for every form the lexicon knows for a lemma:
+    the generated ones, then its extra forms (`extra`, default get_extra_forms()).
+    """
+    extra = get_extra_forms() if extra is None else extra
+    if is_irregular(lemma):
+        # irregular paradigms are not generated, only the infinitive is known unless
+        # extra forms supply them (-or verbs such as pôr/propor count as irregular)
+        if is_verb_lemma(lemma):
+            yield lemma, Analysis(lemma, "", "Infinitive")
+    else:
+        for code, form in generate_regular_conjugations(lemma).items():
+            if code == "Infinitive":
+                yield form, Analysis(lemma, "", "Infinitive")
+            else:
+                person, tense = code.rsplit("-", 1)
+                yield form, Analysis(lemma, person, tense)
+    yield from extra.get(lemma, ())
+
+
+def build_lexicon(lemmas, extra=None):
+    """
+    Map every inflected form of the given lemmas to a tuple of all its analyses.
+    Ambiguous forms keep every reading (falamos -> 1PL PSTSimple and 1PL PRSTInd).
+    """
+    index = {}
+    for lemma in dict.fromkeys(l.strip().lower() for l in lemmas):
+        for form, analysis in lemma_analyses(lemma, extra):
+            readings = index.setdefault(form, [])
+            if analysis not in readings:
+                readings.append(analysis)
+
+    return {form: tuple(readings) for form, readings in index.items()}
+
+
+# built on first use and shared by the app and the corpus scripts
+# a compiled lexicon file (lexicon_store.py) is memory-mapped instead when it is up to date
+@lru_cache(maxsize=1)
+def get_lexicon():
+    import lexicon_store  # imported here, lexicon_store builds on this module
+
+    compiled = lexicon_store.open_lexicon(key=lexicon_store.source_key(VERBS_CSV, EXTRA_FORMS))
+    if compiled is not None:
+        return compiled
+    return build_lexicon(lexicon_lemmas())
+
+
+def lookup(form: str, lemma: str = None, lexicon=None):
+    """Return every analysis of a form, optionally only those of one lemma."""
+    lexicon = get_lexicon() if lexicon is None else lexicon
+    analyses = lexicon.get(form.lower(), ())
+    if lemma is not None:
+        lemma = lemma.lower()
+        analyses = tuple(a for a in analyses if a.lemma == lemma)
+    return analyses
+
+
+def match_conjugation(token: str, lemma: str, lexicon=None):
+    """
+    Readable label for a token of a lemma (first reading), or None.
+    Lemmas missing from the lexicon fall back to the regular conjugator.
+    """
+    analyses = lookup(token, lemma, lexicon)
+    if analyses:
+        return analyses[0].label
+
+    lemma = lemma.lower()
+    if not lookup(lemma, lemma, lexicon):
+        return match_regular_conjugation(token.lower(), lemma)
+    return None
+
+
+def conjugation_table(lemma: str):
+    """
+    {"lemma", "irregular", "forms": [{"code", "label", "form"}]} for the forms the
+    lexicon knows, the same ones the analyzers label (only the infinitive of irregular
+    verbs, unless LING_LEXICON_FORMS has more).
+    """
+    lemma = lemma.strip().lower()
+    return {
+        "lemma": lemma,
+        "irregular": is_irregular(lemma),
+        "forms": [{"code": a.code, "label": a.label, "form": form} for form, a in lemma_analyses(lemma)],
+    }
@@ -0,0 +1,232 @@
+# Compiled, memory-mapped form of the verb lexicon (lexicon.py)
+# The form -> analyses index is written once into a compact binary file
+# (a sorted string table with interned lemmas and feature codes) that is
+# memory-mapped and queried without parsing, so startup is near-instant even
+# with millions of forms and every worker process shares the same pages.
+#
+# Compile with:  python lexicon_store.py [--forms irregular.csv]
+#
+# File layout (little-endian, every section padded to 4 bytes):
+#   header   magic, version, source key, section counts and offsets
+#   features interned codes ("1PL-PSTSimple", "Infinitive")   string table
+#   lemmas   interned lemmas                                    string table
+#   forms    every surface form, sorted by UTF-8 bytes          string table
+#   postings uint32[n_forms + 1] start of each form's analyses
+#   lemma_ids   uint32[n_analyses]
+#   feature_ids uint16[n_analyses]
+# A string table is uint32[n + 1] offsets followed by the UTF-8 blob.
+
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+
+from conjugator import IRREGULAR_VERBS, REGULAR_ENDINGS
+import conjugator
+import lexicon as lexicon_module
+from lexicon import DATADIR, EXTRA_FORMS, VERBS_CSV, Analysis, build_lexicon, lexicon_lemmas, load_extra_forms
+
+MAGIC = b"LXC1"
+VERSION = 1
+HEADER = struct.Struct("<4sI32s4I6Q")  # magic, version, key, 4 counts, 6 section offsets
+COMPILED_LEXICON = os.path.join(DATADIR, "verbs.lex")
+
+
+def source_key(lemma_path: str = VERBS_CSV, form_paths=EXTRA_FORMS):
+    """
+    Hash of everything the lexicon is generated from, used to detect stale files:
+    the lemma list, the extra form files (paths and contents), the ending tables
+    and the source of the modules holding the generation rules.
+    """
+    digest = hashlib.sha256()
+    with open(lemma_path, "rb") as f:
+        digest.update(f.read())
+    for path in form_paths:
+        digest.update(os.path.abspath(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    for module in (conjugator, lexicon_module):
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    digest.update(repr((REGULAR_ENDINGS, IRREGULAR_VERBS, VERSION)).encode("utf-8"))
+    return digest.digest()
+
+
+def _string_table(strings):
+    blobs = [s.encode("utf-8") for s in strings]
+    offsets = array("I", [0])
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+    return _le(offsets).tobytes() + b"".join(blobs)
+
+
+def _le(values):
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def _pad(data: bytes):
+    return data + b"\0" * (-len(data) % 4)
+
+
+def compile_lexicon(lexicon, path: str = COMPILED_LEXICON, key: bytes = b""):
+    """Write a form -> analyses mapping to `path` (atomically, via a temporary file)."""
+    forms = sorted(lexicon, key=lambda form: form.encode("utf-8"))
+    lemma_ids, feature_ids = {}, {}
+    postings = array("I", [0])
+    lemma_column, feature_column = array("I"), array("H")
+
+    for form in forms:
+        for analysis in lexicon[form]:
+            lemma_column.append(lemma_ids.setdefault(analysis.lemma, len(lemma_ids)))
+            feature_column.append(feature_ids.setdefault(analysis.code, len(feature_ids)))
+        postings.append(len(lemma_column))
+
+    sections = [
+        _pad(_string_table(feature_ids)),
+        _pad(_string_table(lemma_ids)),
+        _pad(_string_table(forms)),
+        _le(postings).tobytes(),
+        _le(lemma_column).tobytes(),
+        _pad(_le(feature_column).tobytes()),
+    ]
+    offsets = []
+    position = HEADER.size
+    for section in sections:
+        offsets.append(position)
+        position += len(section)
+
+    header = HEADER.pack(MAGIC, VERSION, key.ljust(32, b"\0")[:32],
+                         len(feature_ids), len(lemma_ids), len(forms), len(lemma_column),
+                         *offsets)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        for section in sections:
+            f.write(section)
+    os.replace(tmp_path, path)
+
+
+class MappedLexicon(Mapping):
+    """
+    Read-only form -> tuple[Analysis] mapping backed by a compiled lexicon file.
+    Lookups binary-search the sorted form table directly in the mapped pages.
+    """
+
+    def __init__(self, path: str = COMPILED_LEXICON):
+        if sys.byteorder != "little":
+            raise OSError("compiled lexicons can only be mapped on little-endian machines")
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, self.key, n_features, n_lemmas, n_forms, n_analyses,
+         *offsets) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} compiled lexicon")
+
+        view = memoryview(self._mm)
+        features, lemmas, forms, postings, lemma_column, feature_column = offsets
+        self._features = [self._decode(code) for code in self._strings(view, features, n_features)]
+        self._lemma_offsets, self._lemma_blob = self._table(view, lemmas, n_lemmas)
+        self._form_offsets, self._form_blob = self._table(view, forms, n_forms)
+        self._postings = view[postings:postings + 4 * (n_forms + 1)].cast("I")
+        self._lemma_column = view[lemma_column:lemma_column + 4 * n_analyses].cast("I")
+        self._feature_column = view[feature_column:feature_column + 2 * n_analyses].cast("H")
+        self._n_forms = n_forms
+        self._lemma_cache = {}  # lemma id -> decoded lemma
+
+    @staticmethod
+    def _table(view, start: int, count: int):
+        offsets = view[start:start + 4 * (count + 1)].cast("I")
+        blob_start = start + 4 * (count + 1)
+        return offsets, view[blob_start:blob_start + offsets[count]]
+
+    @classmethod
+    def _strings(cls, view, start: int, count: int):
+        offsets, blob = cls._table(view, start, count)
+        return [str(blob[offsets[i]:offsets[i + 1]], "utf-8") for i in range(count)]
+
+    @staticmethod
+    def _decode(code: str):
+        if code == "Infinitive":
+            return ("", "Infinitive")
+        return tuple(code.rsplit("-", 1))
+
+    def _form(self, i: int):
+        return self._form_blob[self._form_offsets[i]:self._form_offsets[i + 1]].tobytes()
+
+    def _lemma(self, i: int):
+        lemma = self._lemma_cache.get(i)
+        if lemma is None:
+            lemma = str(self._lemma_blob[self._lemma_offsets[i]:self._lemma_offsets[i + 1]], "utf-8")
+            self._lemma_cache[i] = lemma
+        return lemma
+
+    def _find(self, form: str):
+        key = form.encode("utf-8")
+        lo, hi = 0, self._n_forms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._form(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._n_forms and self._form(lo) == key:
+            return lo
+        return None
+
+    def __getitem__(self, form: str):
+        i = self._find(form)
+        if i is None:
+            raise KeyError(form)
+        return tuple(Analysis(self._lemma(self._lemma_column[j]), *self._features[self._feature_column[j]])
+                     for j in range(self._postings[i], self._postings[i + 1]))
+
+    def __contains__(self, form):
+        return isinstance(form, str) and self._find(form) is not None
+
+    def __iter__(self):
+        for i in range(self._n_forms):
+            yield str(self._form(i), "utf-8")
+
+    def __len__(self):
+        return self._n_forms
+
+
+def open_lexicon(path: str = COMPILED_LEXICON, key: bytes = None):
+    """
+    Map a compiled lexicon, or return None when it is missing, unreadable,
+    or was compiled from different sources than `key`.
+    """
+    try:
+        lexicon = MappedLexicon(path)
+    except (OSError, ValueError, struct.error):
+        return None
+    if key is not None and lexicon.key != key.ljust(32, b"\0")[:32]:
+        return None
+    return lexicon
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile the verb lexicon into a memory-mappable file.")
+    parser.add_argument("--lemmas", default=VERBS_CSV, help="CSV with a Lemma column (default: data/verbs.csv)")
+    parser.add_argument("--forms", action="append", default=None,
+                        help="extra form,lemma,code CSV, e.g. irregular paradigms (repeatable; default: "
+                             "LING_LEXICON_FORMS, which get_lexicon() must match to use the compiled file)")
+    parser.add_argument("--output", default=COMPILED_LEXICON)
+    args = parser.parse_args(argv)
+
+    form_paths = tuple(EXTRA_FORMS if args.forms is None else args.forms)
+    extra = load_extra_forms(form_paths)
+    lexicon = build_lexicon(lexicon_lemmas(args.lemmas, extra), extra)
+    compile_lexicon(lexicon, args.output, source_key(args.lemmas, form_paths))
+    print(f"wrote {len(lexicon)} forms to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+# Load generator for the analyzer
+# N concurrent clients send sentences sampled from the bfamdl utterances either
+# straight to the analysis code path in this process (threads sharing one
+# model pool, the way Streamlit sessions do) or to a running
+# server.py over HTTP. Reports throughput, p50/p95/p99 latency, errors and the
+# RSS of the process doing the analysis sampled over time.
+#
+# Run with:  python loadtest.py inproc --clients 8 --requests 2000 [--fast]
+#            python loadtest.py http --url http://127.0.0.1:8765 --clients 32 --duration 30 --pid <server pid>
+
+import argparse
+import http.client
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from chat_reader import read_corpus
+from lexicon import DATADIR
+from pipelines import ANALYSIS_PROFILES, DEFAULT_PROFILE
+
+CORPUS_FILES = os.path.join(DATADIR, "bfamdl", "*.cha")
+
+
+def sample_sentences(count: int, seed: int = 0, patterns=CORPUS_FILES):
+    """`count` utterances drawn (with replacement) from the PAR turns of the corpus, reproducibly."""
+    utterances = [u.text for u in read_corpus(patterns, "PAR") if len(u.text.split()) > 1]
+    rng = random.Random(seed)
+    return [rng.choice(utterances) for _ in range(count)]
+
+
+def rss_mb(pid: int = None):
+    """Current resident set size of a process in MB (peak RSS of this process where /proc is missing)."""
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+
+
+class RSSSampler(threading.Thread):
+    """Samples rss_mb(pid) every `interval` seconds until stopped."""
+
+    def __init__(self, pid: int = None, interval: float = 0.5):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.samples = []  # (seconds since start, MB)
+        self.stopped = threading.Event()
+
+    def run(self):
+        start = time.perf_counter()
+        while not self.stopped.is_set():
+            self.samples.append((round(time.perf_counter() - start, 3), round(rss_mb(self.pid), 1)))
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def inproc_client(args):
+    """A function analyzing a list of sentences the way the app does, in this process."""
+    from model_pool import get_pool
+
+    pool = get_pool(args.profile)
+    if args.fast:
+        from fast_analyzer import FastAnalyzer
+
+        analyzer = FastAnalyzer(None, analyze_spacy=pool.analyze)
+        return lambda sentences: analyzer.analyze_many(sentences)
+    return pool.analyze
+
+
+class HTTPClient:
+    """One keep-alive connection to server.py per load-test client."""
+
+    def __init__(self, url: str, timeout: float):
+        parts = urlsplit(url)
+        self.host, self.port, self.timeout = parts.hostname, parts.port or 80, timeout
+        self.connection = None
+
+    def __call__(self, sentences):
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        body = json.dumps({"sentences": sentences})
+        try:
+            self.connection.request("POST", "/analyze", body, {"Content-Type": "application/json"})
+            response = self.connection.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = None
+            raise
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+        return json.loads(payload)["results"]
+
+
+def run_clients(make_client, sentences, clients: int, per_request: int, duration: float = None,
+                warmup: int = 0):
+    """
+    Run `clients` threads, each with its own client, taking batches of `per_request`
+    sentences from a shared queue until it is empty (or `duration` seconds have passed).
+    Returns (latencies in seconds, errors by message, wall seconds, sentences done).
+    """
+    lock = threading.Lock()
+    position = [0]
+    latencies, errors = [], {}
+    done = [0]
+    deadline = [None]
+
+    def next_batch():
+        with lock:
+            if duration:
+                if time.perf_counter() >= deadline[0]:
+                    return None
+                start = position[0] % len(sentences)  # cycle through the sample until the deadline
+            else:
+                if position[0] >= len(sentences):
+                    return None
+                start = position[0]
+            position[0] += per_request
+            return sentences[start:start + per_request]
+
+    def worker():
+        client = make_client()
+        for _ in range(warmup):
+            try:
+                client(sentences[:per_request])
+            except Exception:
+                pass
+        ready.wait()
+        go.wait()
+        while True:
+            batch = next_batch()
+            if batch is None:
+                return
+            start = time.perf_counter()
+            try:
+                client(batch)
+            except Exception as e:
+                message = str(e) or type(e).__name__
+                with lock:
+                    errors[message] = errors.get(message, 0) + 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+                done[0] += len(batch)
+
+    ready = threading.Barrier(clients + 1)  # every client is connected and warmed up
+    go = threading.Barrier(clients + 1)     # the clock has started
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    start = time.perf_counter()
+    if duration:
+        deadline[0] = start + duration
+    go.wait()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, time.perf_counter() - start, done[0]
+
+
+def percentile(sorted_values, q: float):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, seconds: float, sentences: int, rss_samples):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "sentences": sentences,
+        "seconds": seconds,
+        "requests_per_sec": len(latencies) / seconds if seconds else 0.0,
+        "sentences_per_sec": sentences / seconds if seconds else 0.0,
+        "latency_ms": {
+            "mean": statistics.mean(latencies) * 1000 if latencies else 0.0,
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "max": latencies[-1] * 1000 if latencies else 0.0,
+        },
+        "rss_mb": {
+            "start": rss_samples[0][1] if rss_samples else None,
+            "peak": max(mb for _, mb in rss_samples) if rss_samples else None,
+            "end": rss_samples[-1][1] if rss_samples else None,
+            "samples": rss_samples,
+        },
+    }
+
+
+def print_report(report):
+    latency = report["latency_ms"]
+    print(f"{report['requests']} requests ({report['sentences']} sentences) in {report['seconds']:.2f}s: "
+          f"{report['requests_per_sec']:.1f} req/s, {report['sentences_per_sec']:.1f} sentences/s")
+    print(f"latency ms  mean {latency['mean']:.1f}  p50 {latency['p50']:.1f}  p95 {latency['p95']:.1f}  "
+          f"p99 {latency['p99']:.1f}  max {latency['max']:.1f}")
+    rss = report["rss_mb"]
+    if rss["samples"]:
+        print(f"RSS MB      start {rss['start']:.1f}  peak {rss['peak']:.1f}  end {rss['end']:.1f}  "
+              f"({len(rss['samples'])} samples)")
+    for message, count in report["errors"].items():
+        print(f"error: {message} x{count}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent load test of the analyzer, in-process or over HTTP.")
+    parser.add_argument("mode", choices=["inproc", "http"])
+    parser.add_argument("--clients", type=int, default=8, help="concurrent clients (threads)")
+    parser.add_argument("--requests", type=int, default=1000, help="requests in total (ignored with --duration)")
+    parser.add_argument("--duration", type=float, help="run for this many seconds instead")
+    parser.add_argument("--sentences-per-request", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=2, help="untimed requests per client before the run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=ANALYSIS_PROFILES, help="inproc pipeline")
+    parser.add_argument("--fast", action="store_true", help="inproc: go through FastAnalyzer like fast mode")
+    parser.add_argument("--url", default="http://127.0.0.1:8765", help="http: server.py address")
+    parser.add_argument("--timeout", type=float, default=30.0, help="http: seconds per request")
+    parser.add_argument("--pid", type=int, help="http: sample the RSS of this process (the server)")
+    parser.add_argument("--rss-interval", type=float, default=0.5)
+    parser.add_argument("--json", help="also write the report here")
+    args = parser.parse_args(argv)
+
+    count = args.requests * args.sentences_per_request if not args.duration else 5000
+    sentences = sample_sentences(count, args.seed)
+
+    if args.mode == "inproc":
+        analyze = inproc_client(args)  # one shared pipeline, loaded before the clock starts
+        make_client = lambda: analyze
+        pid = None
+    else:
+        make_client = lambda: HTTPClient(args.url, args.timeout)
+        pid = args.pid
+
+    sampler = RSSSampler(pid, args.rss_interval)
+    sampler.start()
+    try:
+        latencies, errors, seconds, done = run_clients(make_client, sentences, args.clients,
+                                                       args.sentences_per_request, args.duration, args.warmup)
+    finally:
+        sampler.stop()
+
+    report = dict(summarize(latencies, errors, seconds, done, sampler.samples),
+                  mode=args.mode, clients=args.clients, sentences_per_request=args.sentences_per_request)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+    return 1 if errors and not latencies else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+# Shared, warmed-up model behind a bounded request queue
+# One spaCy pipeline per profile is loaded once per process and warmed up on a
+# few sample sentences (together with the lexicon and the conjugation tables),
+# then every Streamlit session sends its sentences to the single worker thread
+# that owns that pipeline. spaCy does not promise that one pipeline can be
+# called from several threads at once (the StringStore grows while processing),
+# and the GIL would leave little to gain, so each model gets one worker and a
+# lock: anything else that needs the pipeline (building the concordance index)
+# takes it with exclusive(). For parallel analysis use server.py, whose workers
+# are processes. The request queue is bounded and every request has a timeout,
+# so a burst of sessions gets a quick "busy" answer instead of piling up.
+#
+# A batch that is already running cannot be interrupted, so a timed-out request
+# is abandoned between chunks of POOL_CHUNK sentences: at most one chunk of
+# wasted work keeps the worker busy after the timeout.
+#
+# Queue length and timeout come from LING_POOL_QUEUE (default 64) and
+# LING_POOL_TIMEOUT (seconds, default 30).
+
+import contextlib
+import contextvars
+import os
+import queue
+import threading
+import time
+from concurrent.futures import CancelledError, Future, TimeoutError as FutureTimeout
+
+import instrumentation
+from analyzer import analyze_doc
+from pipelines import DEFAULT_PROFILE, load_pipeline
+
+POOL_QUEUE = int(os.environ.get("LING_POOL_QUEUE", 64))
+POOL_TIMEOUT = float(os.environ.get("LING_POOL_TIMEOUT", 30))
+POOL_CHUNK = 32  # sentences analyzed between two checks for an abandoned request
+
+WARMUP_SENTENCES = (
+    "A garota sabe como ele encontrou o anel dela.",
+    "Nós falávamos com eles todos os dias.",
+    "Eu não tinha ido lá antes, mas fui ontem.",
+    "Quando vocês chegarem, comam alguma coisa.",
+)
+
+
+class PoolBusy(Exception):
+    """The request queue is full."""
+
+
+class Request(Future):
+    """A queued batch; abandon() stops it at the next chunk even when it is already running."""
+
+    def __init__(self, sentences):
+        super().__init__()
+        self.sentences = list(sentences)
+        self.context = contextvars.copy_context()  # the submitting session's instrumentation setting
+        self.abandoned = threading.Event()
+
+    def abandon(self):
+        self.abandoned.set()
+        self.cancel()  # only succeeds while it is still queued
+
+
+class ModelPool:
+    """
+    One worker thread analyzing batches of sentences with a pipeline it owns.
+    At most `max_queue` requests wait; analyze() gives up after `timeout` seconds.
+    """
+
+    def __init__(self, nlp, max_queue: int = POOL_QUEUE, timeout: float = POOL_TIMEOUT, chunk: int = POOL_CHUNK):
+        self.nlp = nlp
+        self.timeout = timeout
+        self.chunk = chunk
+        self.requests = queue.Queue(max_queue)
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.abandoned = 0  # timed-out batches stopped while running
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()      # counters
+        self._nlp_lock = threading.Lock()  # the pipeline
+        self.thread = threading.Thread(target=self._worker, name="model-pool", daemon=True)
+        self.thread.start()
+
+    @contextlib.contextmanager
+    def exclusive(self):
+        """Use the pipeline outside the pool (e.g. a corpus build); the worker waits meanwhile."""
+        with self._nlp_lock:
+            yield self.nlp
+
+    def _analyze(self, request):
+        results = []
+        for start in range(0, len(request.sentences), self.chunk):
+            if request.abandoned.is_set():
+                with self._lock:
+                    self.abandoned += 1
+                raise CancelledError()
+            with self._nlp_lock:
+                docs = instrumentation.instrumented_pipe(self.nlp, request.sentences[start:start + self.chunk])
+                results.extend(analyze_doc(doc) for doc in docs)
+        return results
+
+    def _worker(self):
+        while True:
+            request = self.requests.get()
+            if not request.set_running_or_notify_cancel():  # timed out while queued
+                continue
+            start = time.perf_counter()
+            try:
+                request.set_result(request.context.run(self._analyze, request))
+            except Exception as e:
+                request.set_exception(e)
+            with self._lock:
+                self.completed += 1
+                self.busy_seconds += time.perf_counter() - start
+
+    def submit(self, sentences):
+        """Queue a batch of sentences, returning its Request (a Future); raises PoolBusy when the queue is full."""
+        request = Request(sentences)
+        try:
+            self.requests.put_nowait(request)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            raise PoolBusy(f"{self.requests.maxsize} requests already waiting")
+        return request
+
+    def analyze(self, sentences, timeout: float = None):
+        """
+        One list of verb analyses per sentence; raises PoolBusy, or concurrent.futures.TimeoutError
+        (the batch is then abandoned, and stops at its next chunk if it already started).
+        """
+        request = self.submit(sentences)
+        try:
+            return request.result(self.timeout if timeout is None else timeout)
+        except FutureTimeout:
+            request.abandon()
+            with self._lock:
+                self.timed_out += 1
+            raise
+
+    def stats(self):
+        return {
+            "queued": self.requests.qsize(),
+            "max_queue": self.requests.maxsize,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "abandoned": self.abandoned,
+            "busy_seconds": self.busy_seconds,
+        }
+
+
+def warm_up(nlp):
+    """Run the pipeline and the lexicon/conjugation tables once, so the first real request is not the slow one."""
+    from conjugator import generate_regular_conjugations, match_regular_conjugation
+    from lexicon import get_lexicon, load_verb_lemmas
+
+    get_lexicon()
+    for lemma in load_verb_lemmas()[:20]:
+        for form in generate_regular_conjugations(lemma).values():
+            match_regular_conjugation(form, lemma)
+    for doc in nlp.pipe(WARMUP_SENTENCES):
+        analyze_doc(doc)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(profile: str = DEFAULT_PROFILE):
+    """The process-wide pool of a profile, loading and warming up its pipeline on first use."""
+    with _pools_lock:
+        if profile not in _pools:
+            nlp = load_pipeline(profile)
+            warm_up(nlp)
+            _pools[profile] = ModelPool(nlp)
+        return _pools[profile]
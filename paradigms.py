@@ -0,0 +1,89 @@
+# Long-format paradigm table: one row per (lemma, form, code)
+# Annotating a verb table is then a single pandas merge on (lemma, token)
+# instead of filtering a wide table and comparing cells for every token
+
+import pandas as pd
+
+from conjugator import REGULAR_ENDINGS, pretty_label
+from lexicon import get_extra_forms, is_irregular, is_verb_lemma
+
+PARADIGM_COLUMNS = ["lemma", "form", "code"]
+
+
+def paradigm_table(lemmas):
+    """
+    Conjugate any list of lemmas (verbs.csv, or a large external list) in one shot.
+    Lemmas are grouped by conjugation class and every REGULAR_ENDINGS suffix is added
+    to the whole group's stems with one vectorized string operation.
+    Returns a long DataFrame with PARADIGM_COLUMNS (code is categorical).
+    Which lemmas are irregular (only the infinitive) or not verbs at all is decided by
+    lexicon.is_irregular / is_verb_lemma, and the extra forms (LING_LEXICON_FORMS) are
+    appended, so the table has the forms of lexicon.lemma_analyses.
+    """
+    lemmas = pd.Series(list(lemmas), dtype=object).str.strip().str.lower().drop_duplicates()
+    endings = lemmas.str[-2:]
+    irregular = lemmas.map(is_irregular).astype(bool)
+    frames = []
+
+    known = lemmas[lemmas.map(is_verb_lemma).astype(bool)].to_numpy()
+    frames.append(pd.DataFrame({"lemma": known, "form": known, "code": "Infinitive"}))
+
+    for ending, tenses in REGULAR_ENDINGS.items():
+        group = lemmas[(endings == ending) & ~irregular]
+        if group.empty:
+            continue
+        stems = group.str[:-2]
+        for tense_name, persons in tenses.items():
+            for person_code, suffix in persons.items():
+                frames.append(pd.DataFrame({
+                    "lemma": group.to_numpy(),
+                    "form": (stems + suffix).to_numpy(),
+                    "code": f"{person_code}-{tense_name}",
+                }))
+
+    extra = get_extra_forms()
+    extra_rows = [(lemma, form, analysis.code) for lemma in lemmas if lemma in extra for form, analysis in extra[lemma]]
+    if extra_rows:
+        frames.append(pd.DataFrame(extra_rows, columns=PARADIGM_COLUMNS))
+
+    table = pd.concat(frames, ignore_index=True)
+    if extra_rows:  # extra forms can repeat generated ones
+        table = table.drop_duplicates(ignore_index=True)
+    table["code"] = table["code"].astype("category")
+    return table
+
+
+def wide_paradigm_table(paradigm):
+    """Pivot a long paradigm table to one row per lemma and one column per code."""
+    return paradigm.pivot(index="lemma", columns="code", values="form")
+
+
+def form_codes(paradigm):
+    """Collapse a paradigm table to one row per (lemma, form) with the list of its codes."""
+    return (paradigm.groupby(["lemma", "form"], sort=False)["code"]
+            .agg(list)
+            .reset_index())
+
+
+def annotate_conjugations(df_verbs, paradigm, codes=None):
+    """
+    Add a "conjugations" column to df_verbs holding the list of codes
+    ("3SG-PSTSimple", ...) of each token, or None when the form is unknown.
+    `codes` can be a precomputed form_codes(paradigm) to skip the groupby.
+    """
+    codes = form_codes(paradigm) if codes is None else codes
+    keys = pd.DataFrame({
+        "lemma": df_verbs["lemma"].str.lower().to_numpy(),
+        "form": df_verbs["token"].str.lower().to_numpy(),
+    })
+    merged = keys.merge(codes, on=["lemma", "form"], how="left")  # left merge keeps df_verbs order
+
+    df_verbs["conjugations"] = [c if isinstance(c, list) else None for c in merged["code"]]
+    return df_verbs
+
+
+def code_labels(codes):
+    """Readable labels for a list of codes (None stays None)."""
+    if codes is None:
+        return None
+    return [pretty_label(code) for code in codes]
@@ -0,0 +1,41 @@
+# Named spaCy pipeline profiles
+# The app and the corpus tools only use pos_, lemma_ and morph, so the parser
+# and NER components can be left out at load time (they are never loaded,
+# not just switched off). Pick a profile by name, or through the
+# LING_SPACY_PROFILE environment variable. Only ANALYSIS_PROFILES keep every
+# component the analyzer reads; "tagger-only" gives no lemmas and is only
+# meant for compare_profiles.py.
+
+import os
+from functools import lru_cache
+
+from instrumentation import stage
+
+MODEL = "pt_core_news_sm"
+
+# profile name -> components excluded from pt_core_news_sm
+PROFILES = {
+    "full": [],
+    "morph-only": ["parser", "ner"],                   # pos_, lemma_ and morph
+    "tagger-only": ["parser", "ner", "lemmatizer"],    # pos_ and morph, no lemmas (compare_profiles.py only)
+}
+
+# components behind what the analyzer and the corpus tools read: pos_ and morph
+# (morphologizer on top of tok2vec, attribute_ruler) and lemma_ (lemmatizer)
+ANALYZER_COMPONENTS = ("tok2vec", "morphologizer", "attribute_ruler", "lemmatizer")
+
+# the profiles the app, the server and the corpus commands offer
+ANALYSIS_PROFILES = [name for name, excluded in PROFILES.items() if not set(excluded) & set(ANALYZER_COMPONENTS)]
+
+DEFAULT_PROFILE = os.environ.get("LING_SPACY_PROFILE", "full")
+
+
+@lru_cache(maxsize=None)
+def load_pipeline(profile: str = DEFAULT_PROFILE, model: str = MODEL):
+    """Load (once per process) the spaCy model with the profile's components excluded."""
+    if profile not in PROFILES:
+        raise ValueError(f"unknown pipeline profile {profile!r}, expected one of {sorted(PROFILES)}")
+    with stage("spacy.model_load"):
+        import spacy  # deferred so importing this module stays cheap
+
+        return spacy.load(model, exclude=PROFILES[profile])
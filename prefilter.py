@@ -0,0 +1,115 @@
+# Verb-form prefilter over raw text
+# Every surface form the verb lexicon knows (the generate_regular_conjugations
+# forms of the verbs.csv lemmas and the infinitives of irregular_verbs_list),
+# plus the frequent irregular forms of fast_analyzer.IRREGULAR_FORMS, goes
+# into one set. Text is scanned in a single pass of a word regex, and every
+# word that is a known form becomes a candidate span (start, end, form). Only
+# whole words should match: an Aho-Corasick automaton would also find "falo"
+# inside "falou" and need a word-boundary check on every hit, while here the
+# regex and the set lookups both run in C.
+# The corpus pipeline uses it to send only utterances with a candidate to spaCy
+# (verbs of lemmas missing from verbs.csv are lost that way), and scan_chat()
+# finds the forms of given lemmas in raw .cha files without parsing them.
+
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+from chat_reader import SPEAKER_LINE, chat_files
+from conjugator import IRREGULAR_VERBS
+from lexicon import get_lexicon, lemma_analyses
+
+WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class Span(NamedTuple):
+    """A candidate verb form at [start, end) of the scanned text."""
+    start: int
+    end: int
+    form: str  # lowercased
+
+
+class ChatSpan(NamedTuple):
+    """A candidate in a .cha file; offsets are characters from the start of the file."""
+    file: str  # path as matched by the glob pattern
+    line: int  # 1-based, the line the form is on (a continuation line for long turns)
+    speaker: str
+    start: int
+    end: int
+    form: str
+
+
+class Prefilter:
+    """Whole-word matcher for a fixed set of lowercased forms."""
+
+    def __init__(self, forms):
+        self.forms = frozenset(form.lower() for form in forms)
+
+    def __contains__(self, form):
+        return form.lower() in self.forms
+
+    def __len__(self):
+        return len(self.forms)
+
+    def spans(self, text: str, offset: int = 0):
+        """Yield a Span for every known form in the text, with offsets shifted by `offset`."""
+        forms = self.forms
+        for match in WORD.finditer(text):
+            word = match.group().lower()
+            if word in forms:
+                yield Span(match.start() + offset, match.end() + offset, word)
+
+    def has_candidate(self, text: str):
+        """True when the text contains at least one known form (the cheap check for the corpus pipeline)."""
+        forms = self.forms
+        return any(word in forms for word in WORD.findall(text.lower()))
+
+
+def lemma_forms(lemmas):
+    """
+    Every form the lexicon knows for the given lemmas, plus the frequent forms of
+    irregular ones (fast_analyzer.IRREGULAR_LEMMA_FORMS), for which the lexicon
+    only has the infinitive.
+    """
+    from fast_analyzer import IRREGULAR_LEMMA_FORMS
+
+    forms = set()
+    for lemma in lemmas:
+        lemma = lemma.strip().lower()
+        forms.update(form for form, _ in lemma_analyses(lemma))
+        forms.update(IRREGULAR_LEMMA_FORMS.get(lemma, ()))
+    return forms
+
+
+@lru_cache(maxsize=1)
+def get_prefilter():
+    """The prefilter over every verb form the analyzers can label (built once)."""
+    from fast_analyzer import IRREGULAR_FORMS
+
+    return Prefilter(set(get_lexicon()) | IRREGULAR_FORMS | set(IRREGULAR_VERBS))
+
+
+def scan_chat(patterns, prefilter=None, speakers=None):
+    """
+    Yield a ChatSpan for every candidate in the main tiers (*SPK:) of the .cha files
+    matching the glob pattern(s), reading each file once, line by line. Headers and
+    dependent tiers are skipped; continuation lines belong to the turn above them.
+    """
+    prefilter = get_prefilter() if prefilter is None else prefilter
+    if isinstance(speakers, str):
+        speakers = (speakers,)
+    for path in chat_files(patterns):
+        speaker = None
+        offset = 0
+        with open(path, encoding="utf-8", newline="") as f:  # newline="" keeps offsets exact
+            for number, line in enumerate(f, 1):
+                if line.startswith("\t"):
+                    text_start = 0
+                else:
+                    match = SPEAKER_LINE.match(line.rstrip("\r\n"))
+                    speaker = match.group(1) if match else None
+                    text_start = match.start(2) if match else 0
+                if speaker is not None and (speakers is None or speaker.startswith(tuple(speakers))):
+                    for span in prefilter.spans(line[text_start:], offset + text_start):
+                        yield ChatSpan(path, number, speaker, *span)
+                offset += len(line)
@@ -0,0 +1,49 @@
+# Start the Streamlit app with a warm model
+# Loads the spaCy pipeline, the lexicon and the conjugation tables and warms
+# them up (model_pool.py) before the web server accepts its first session, then
+# runs streamlit_app.py in this same process, so the app's model pool picks up
+# the already loaded pipeline instead of loading it on the first user request.
+#
+# Run with:  python serve.py [--profile morph-only] [--port 8501] [--queue 64] [--timeout 30]
+# (instead of: streamlit run streamlit_app.py)
+
+import argparse
+import os
+import time
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamlit_app.py")
+
+
+def main(argv=None):
+    import pipelines
+    from pipelines import ANALYSIS_PROFILES, DEFAULT_PROFILE
+
+    parser = argparse.ArgumentParser(description="Preload and warm up the model, then start the Streamlit app.")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=ANALYSIS_PROFILES)
+    parser.add_argument("--port", type=int, default=8501)
+    parser.add_argument("--queue", type=int, help="requests allowed to wait (LING_POOL_QUEUE)")
+    parser.add_argument("--timeout", type=float, help="seconds a request may take (LING_POOL_TIMEOUT)")
+    args = parser.parse_args(argv)
+
+    # the pool settings are read when model_pool is imported, and the app preselects DEFAULT_PROFILE
+    for name, value in (("LING_POOL_QUEUE", args.queue), ("LING_POOL_TIMEOUT", args.timeout)):
+        if value is not None:
+            os.environ[name] = str(value)
+    os.environ["LING_SPACY_PROFILE"] = args.profile
+    pipelines.DEFAULT_PROFILE = args.profile
+
+    import model_pool
+
+    start = time.perf_counter()
+    model_pool.get_pool(args.profile)
+    print(f"model {args.profile!r} loaded and warmed up in {time.perf_counter() - start:.1f}s")
+
+    from streamlit.web import bootstrap
+
+    flag_options = {"server_port": args.port, "server_headless": True}
+    bootstrap.load_config_options(flag_options=flag_options)
+    bootstrap.run(APP, False, [], flag_options)
+
+
+if __name__ == "__main__":
+    main()
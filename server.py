@@ -0,0 +1,315 @@
+# Local HTTP/JSON analysis service
+# An asyncio server (standard library only) in front of the analyzer. Sentences
+# of concurrent requests are queued and collected into micro-batches (at most
+# --max-batch sentences, waiting at most --max-wait-ms for a batch to fill) that
+# go through nlp.pipe in a pool of --workers processes, each holding its own
+# copy of the pipeline. The queue is bounded: when it is full new requests get
+# a 503 with Retry-After instead of piling up. Lexicon lookups are answered
+# directly on the event loop.
+#
+#   POST /analyze     {"sentence": "..."} or {"sentences": ["...", ...]}
+#                     -> {"results": [[{"Verb", "Lemma", "Conjugation"}, ...], ...]}
+#   GET  /conjugate?lemma=falar          forms the lexicon knows for a lemma ("irregular": only the infinitive)
+#   GET  /lookup?form=falou[&lemma=...]  lexicon analyses of a form
+#   GET  /stats                          queue and batching counters
+#
+# Run with:  python server.py [--port 8765] [--workers 2] [--max-batch 64] [--max-wait-ms 10]
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from analyzer import analyze_doc
+from lexicon import conjugation_table, get_lexicon, lookup
+from pipelines import ANALYSIS_PROFILES, DEFAULT_PROFILE, load_pipeline
+
+MAX_BODY_BYTES = 1 << 20
+MAX_HEADERS = 100  # lines are capped by the StreamReader limit (64 KiB)
+
+
+class Overloaded(Exception):
+    """The request queue is full."""
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str = None):
+        super().__init__(message or status.phrase)
+        self.status = status
+
+
+def analyze_batch(profile: str, sentences):
+    """Analyze a batch of sentences in one nlp.pipe call; runs inside a worker process."""
+    nlp = load_pipeline(profile)
+    return [analyze_doc(doc) for doc in nlp.pipe(sentences, batch_size=len(sentences))]
+
+
+class MicroBatcher:
+    """
+    Collects sentences submitted by concurrent requests into batches for `run_batch`
+    (a coroutine function taking a list of sentences and returning one result each).
+    `workers` batches are processed at a time; at most `max_queue` sentences wait.
+    """
+
+    def __init__(self, run_batch, max_batch: int = 64, max_wait: float = 0.01, max_queue: int = 1024,
+                 workers: int = 1):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.workers = workers
+        self.queue = asyncio.Queue(max_queue)
+        self.tasks = []
+        self.batches = 0
+        self.sentences = 0
+        self.rejected = 0
+
+    def start(self):
+        self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    async def analyze(self, sentences):
+        """Queue the sentences and wait for their results; raises Overloaded when the queue is full."""
+        if self.queue.maxsize and self.queue.qsize() + len(sentences) > self.queue.maxsize:
+            self.rejected += 1
+            raise Overloaded()
+        loop = asyncio.get_running_loop()
+        futures = []
+        for sentence in sentences:
+            future = loop.create_future()
+            self.queue.put_nowait((sentence, future))
+            futures.append(future)
+        return await asyncio.gather(*futures)
+
+    async def _next_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return [(sentence, future) for sentence, future in batch if not future.done()]  # skip cancelled requests
+
+    async def _worker(self):
+        while True:
+            batch = await self._next_batch()
+            if not batch:
+                continue
+            try:
+                results = await self.run_batch([sentence for sentence, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.sentences += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self):
+        return {
+            "queued": self.queue.qsize(),
+            "batches": self.batches,
+            "sentences": self.sentences,
+            "mean_batch_size": self.sentences / self.batches if self.batches else 0.0,
+            "rejected": self.rejected,
+        }
+
+
+class AnalysisServer:
+    def __init__(self, profile: str = DEFAULT_PROFILE, workers: int = 1, max_batch: int = 64,
+                 max_wait: float = 0.01, max_queue: int = 1024):
+        self.profile = profile
+        self.workers = workers
+        self.executor = None
+        self.batcher = MicroBatcher(self._run_batch, max_batch, max_wait, max_queue, workers)
+        self.lexicon = None
+
+    async def _run_batch(self, sentences):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, analyze_batch, self.profile, sentences)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765):
+        # spawn, not fork: the workers must not inherit the running event loop
+        self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=load_pipeline, initargs=(self.profile,))
+        self.lexicon = get_lexicon()
+        self.batcher.start()
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def close(self):
+        await self.batcher.stop()
+        self.executor.shutdown(cancel_futures=True)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except HTTPError as e:
+                    write_response(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                try:
+                    status, payload, extra = HTTPStatus.OK, await self.route(method, target, body), {}
+                except HTTPError as e:
+                    status, payload, extra = e.status, {"error": str(e)}, {}
+                except Overloaded:
+                    status, payload, extra = HTTPStatus.SERVICE_UNAVAILABLE, {"error": "queue full"}, {"Retry-After": "1"}
+                except Exception as e:
+                    status, payload, extra = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}, {}
+                keep_alive = headers.get("connection", "").lower() != "close"
+                write_response(writer, status, payload, extra, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method: str, target: str, body: bytes):
+        url = urlsplit(target)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path == "/analyze":
+            if method != "POST":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+            sentences = request_sentences(body)
+            if self.batcher.queue.maxsize and len(sentences) > self.batcher.queue.maxsize:
+                # could never be queued, so a 503 with Retry-After would only invite endless retries
+                raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                f"at most {self.batcher.queue.maxsize} sentences per request")
+            return {"results": await self.batcher.analyze(sentences)}
+        if method != "GET":
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+        if url.path == "/conjugate":
+            return conjugation_table(required(query, "lemma"))
+        if url.path == "/lookup":
+            form = required(query, "form")
+            analyses = lookup(form, query.get("lemma"), self.lexicon)
+            return {"form": form, "analyses": [{"lemma": a.lemma, "code": a.code, "label": a.label} for a in analyses]}
+        if url.path == "/stats":
+            return {"profile": self.profile, "workers": self.workers, **self.batcher.stats()}
+        raise HTTPError(HTTPStatus.NOT_FOUND)
+
+
+def required(query, name: str):
+    if not query.get(name):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"missing query parameter {name!r}")
+    return query[name]
+
+
+def request_sentences(body: bytes):
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "body is not valid JSON")
+    if not isinstance(data, dict):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "expected a JSON object")
+    sentences = data.get("sentences", [data["sentence"]] if "sentence" in data else None)
+    if not isinstance(sentences, list) or not all(isinstance(s, str) for s in sentences):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, 'expected {"sentence": str} or {"sentences": [str, ...]}')
+    return sentences
+
+
+async def read_line(reader, status: HTTPStatus, message: str):
+    """One line of the request head; a line longer than the reader's limit answers `status`."""
+    try:
+        return await reader.readline()
+    except (ValueError, asyncio.LimitOverrunError):
+        raise HTTPError(status, message)
+
+
+async def read_request(reader):
+    """Read one HTTP/1.1 request: (method, target, lowercase headers, body), or None at EOF."""
+    request_line = await read_line(reader, HTTPStatus.BAD_REQUEST, "request line too long")
+    if not request_line.strip():
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST)
+
+    headers = {}
+    while True:
+        line = await read_line(reader, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "header line too long")
+        if line in (b"\r\n", b"\n", b""):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "too many headers")
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0) or 0)
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "invalid Content-Length")
+    if length < 0:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+    body = await reader.readexactly(length) if length else b""
+    return method, target, headers, body
+
+
+def write_response(writer, status: HTTPStatus, payload, extra_headers=None, keep_alive: bool = True):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    headers = {
+        "Content-Type": "application/json; charset=utf-8",
+        "Content-Length": str(len(body)),
+        "Connection": "keep-alive" if keep_alive else "close",
+        **(extra_headers or {}),
+    }
+    head = f"HTTP/1.1 {status.value} {status.phrase}\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+    writer.write(head.encode("latin-1") + b"\r\n" + body)
+
+
+async def serve(args):
+    app = AnalysisServer(args.profile, args.workers, args.max_batch, args.max_wait_ms / 1000, args.max_queue)
+    server = await app.start(args.host, args.port)
+    print(f"serving on http://{args.host}:{args.port} ({args.workers} worker(s), profile {args.profile})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await app.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP/JSON verb analysis service with micro-batching.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=ANALYSIS_PROFILES)
+    parser.add_argument("--workers", type=int, default=1, help="analysis processes, each with its own pipeline")
+    parser.add_argument("--max-batch", type=int, default=64, help="most sentences per nlp.pipe batch")
+    parser.add_argument("--max-wait-ms", type=float, default=10.0, help="longest wait for a batch to fill")
+    parser.add_argument("--max-queue", type=int, default=1024, help="sentences allowed to wait before 503s")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,76 +1,253 @@
+import json
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import pandas as pd
 import streamlit as st
-import spacy
-from conjugator import match_regular_conjugation
+from analysis_cache import SENTENCE_CACHE_SIZE, LRUCache
+from analyzer import token_cache
+from batch_analysis import (RESULT_COLUMNS, analyze_in_chunks, csv_to_parquet,
+                            read_uploaded_utterances, write_results_csv)
+from fast_analyzer import FastAnalyzer
+from fuzzy import get_fuzzy_index
+from incremental import IncrementalAnalyzer
+import instrumentation
+from model_pool import PoolBusy, get_pool
+from pipelines import ANALYSIS_PROFILES, DEFAULT_PROFILE
 
-# Load spaCy model
-@st.cache_resource
-def load_spacy_model():
-    return spacy.load("pt_core_news_sm")
+# Pipeline profile (see pipelines.py): "morph-only" skips components we never read
+profile_names = list(ANALYSIS_PROFILES)
+profile = st.sidebar.selectbox("spaCy pipeline profile", profile_names,
+                               index=profile_names.index(DEFAULT_PROFILE) if DEFAULT_PROFILE in profile_names else 0)
 
-nlp = load_spacy_model()
+# Diagnostics: per-stage timings and cache hit rates (instrumentation.py), off unless toggled on.
+# The switch only applies to this session (its script thread and the pool work it submits);
+# the timings table itself is shared by every session that has it on
+diagnostics = st.sidebar.checkbox("Diagnostics panel", value=instrumentation.is_enabled())
+trace_memory = diagnostics and st.sidebar.checkbox("Trace memory peaks (slower, stays on for the process)")
+instrumentation.use_session(diagnostics, trace_memory)
 
-# Readable mapping dictionaries for spaCy
-person_map = {"1": "First-Person", "2": "Second-Person", "3": "Third-Person"}
-number_map = {"Sing": "Singular", "Plur": "Plural"}
-tense_map = {"Pres": "Present-Tense", "Past": "Past-Tense", "Fut": "Future-Tense"}
-mood_map = {"Ind": "Indicative", "Imp": "Imperative", "Sub": "Subjunctive", "Cnd": "Conditional"}
-verbform_map = {"Fin": "Finite", "Inf": "Infinitive", "Part": "Participle", "Ger": "Gerund"}
+# The warmed-up spaCy pipeline lives in the model pool (preloaded by serve.py); every tab sends
+# its sentences there, since only the pool's worker may run it (PoolBusy / FutureTimeout when overloaded)
+pool = get_pool(profile)
 
+# Fast mode analyzer, shared across sessions so its bypass counters add up
+@st.cache_resource
+def load_fast_analyzer(profile: str = DEFAULT_PROFILE, fuzzy: bool = False):
+    return FastAnalyzer(None, fuzzy=get_fuzzy_index() if fuzzy else None, analyze_spacy=get_pool(profile).analyze)
 
-# Analyze sentence
-def analyze_sentence_spacy(sentence: str):
-    doc = nlp(sentence)
-    results = []
 
-    for token in doc:
-        if token.pos_ in ["VERB", "AUX"]:
-            # for each verb in the data, get morphology and human readable label
-            morph = token.morph
+# Batch mode: utterances per pool request, and how many recent verb rows stay on the page
+BATCH_CHUNK_SIZE = 500
+BATCH_PREVIEW_ROWS = 200
 
-            person = person_map.get(morph.get("Person")[0], "") if morph.get("Person") else ""
-            number = number_map.get(morph.get("Number")[0], "") if morph.get("Number") else ""
-            tense = tense_map.get(morph.get("Tense")[0], "") if morph.get("Tense") else ""
-            mood = mood_map.get(morph.get("Mood")[0], "") if morph.get("Mood") else ""
-            verbform = verbform_map.get(morph.get("VerbForm")[0], "") if morph.get("VerbForm") else ""
+# Concordance: KWIC lines per page
+CONCORDANCE_PAGE_SIZE = 25
 
-            # spaCy-generated label (readable version)
-            spacy_label = " ".join(filter(None, [person, number, tense, mood, verbform]))
+# Inverted index over the bfamdl training transcripts (built through the corpus cache on first use)
+@st.cache_resource
+def load_concordance(profile: str = DEFAULT_PROFILE):
+    from concordance import get_index
 
-            # fallback: regular conjugator (conjugator.py) if spaCy fails
-            if not spacy_label.strip():
-                fallback = match_regular_conjugation(token.text.lower(), token.lemma_)
-            else:
-                fallback = None
+    with get_pool(profile).exclusive():  # a first build runs the pool's pipeline over the corpus
+        return get_index(profile=profile)
 
-            readable = spacy_label if spacy_label else (fallback or "(unknown)")
+# Whole-sentence results shared by every session (size: LING_SENTENCE_CACHE_SIZE)
+@st.cache_resource
+def load_sentence_cache():
+    cache = LRUCache(SENTENCE_CACHE_SIZE)
+    instrumentation.register_cache("sentence", cache)
+    return cache
 
-            results.append({
-                "Verb": token.text,
-                "Lemma": token.lemma_,
-                "Conjugation": readable
-            })
 
+# Repeated sentences (classroom demos) come straight from the shared cache, the rest go
+# through the model pool in a single batch (PoolBusy / FutureTimeout when it is overloaded)
+def analyze_sentences_cached(sentences, fast_mode: bool, fuzzy_mode: bool = False):
+    cache = load_sentence_cache()
+    keys = [(profile, fast_mode, fuzzy_mode, s.strip()) for s in sentences]
+    results = [cache.get(key) for key in keys]
+    missing = [i for i, r in enumerate(results) if r is None]
+    if missing:
+        texts = [sentences[i] for i in missing]
+        if fast_mode:
+            computed = load_fast_analyzer(profile, fuzzy_mode).analyze_many(texts)
+        else:
+            computed = pool.analyze(texts)
+        for i, r in zip(missing, computed):
+            cache.put(keys[i], r)
+            results[i] = r
     return results
 
 
+# One incremental analyzer per session: after an edit only the changed sentences are re-analyzed
+def incremental_analyzer(fast_mode: bool, fuzzy_mode: bool = False):
+    key = f"incremental-{profile}-{fast_mode}-{fuzzy_mode}"
+    if key not in st.session_state:
+        st.session_state[key] = IncrementalAnalyzer(
+            lambda sentences: analyze_sentences_cached(sentences, fast_mode, fuzzy_mode))
+    return st.session_state[key]
+
+
 
 
 
 # User Interface Code
 st.title("Portuguese Verb Analyzer")
 
-sentence = st.text_input("Enter a Portuguese sentence: (Hint: Try 'A garota sabe como ele encontrou o anel dela.')")
+fast_mode = st.sidebar.checkbox("Fast mode (skip spaCy when the verb lexicon can resolve the sentence)")
+fuzzy_mode = fast_mode and st.sidebar.checkbox("Fuzzy matching (nearest known form for misspelled verbs)")
+
+sentence_tab, batch_tab, concordance_tab = st.tabs(["Sentence", "Batch file", "Concordance"])
+
+with sentence_tab:
+    text = st.text_area("Enter a Portuguese sentence or a passage: (Hint: Try 'A garota sabe como ele encontrou o anel dela.')")
+
+    if st.button("Analyze"):
+        analyzer = incremental_analyzer(fast_mode, fuzzy_mode)
+        try:
+            analyzed = analyzer.analyze(text)
+        except PoolBusy:
+            st.warning("The analyzer is busy with other requests, please try again in a moment.")
+            st.stop()
+        except FutureTimeout:
+            st.warning("The analysis took too long and was cancelled, try a shorter passage.")
+            st.stop()
+        results = [r for _, sentence_results in analyzed for r in sentence_results]
+        if len(analyzed) > 1:
+            st.caption(f"{analyzer.analyzed} changed sentence(s) analyzed, {analyzer.reused} reused")
+
+        if not results:
+            st.info("No verbs found.")
+        else:
+            for sentence, sentence_results in analyzed:
+                if len(analyzed) > 1 and sentence_results:
+                    st.markdown(f"> {sentence}")
+                for r in sentence_results:
+                    st.markdown("---")
+                    st.markdown(f"### {r['Verb']} (Lemma: *{r['Lemma']}*)")
+                    st.write(f"**Conjugation:** {r['Conjugation']}")
+                    if "Corrected" in r:
+                        st.write(f"**Nearest known form:** {r['Corrected']}")
+                    if "Source" in r:
+                        st.caption(f"Analyzed by: {r['Source']}")
+
+# Batch mode: a whole .cha transcript or text file (one utterance per line),
+# analysed chunk by chunk with results streamed to the page and to a CSV in a temporary directory
+with batch_tab:
+    upload = st.file_uploader("Upload a .cha transcript or a text file", type=["cha", "txt"])
+
+    if upload is not None and st.button("Analyze file"):
+        progress = st.progress(0.0, text="Analyzing...")
+        counter = st.empty()
+        preview = st.empty()
+        recent = deque(maxlen=BATCH_PREVIEW_ROWS)
+        verbs_found = 0
+
+        # one results directory per session: removed when the next file replaces it, or when
+        # the session (and with it the TemporaryDirectory) is garbage collected
+        if "batch_dir" in st.session_state:
+            st.session_state.pop("batch_output", None)
+            st.session_state.pop("batch_dir").cleanup()
+        st.session_state["batch_dir"] = tempfile.TemporaryDirectory(prefix="verb-batch-")
+        output_path = os.path.join(st.session_state["batch_dir"].name, "verbs.csv")
+        utterances = read_uploaded_utterances(upload.name, upload)
+        results = write_results_csv(output_path, analyze_in_chunks(pool.analyze, utterances, BATCH_CHUNK_SIZE))
+
+        try:
+            for done, rows in results:
+                verbs_found += len(rows)
+                recent.extend(rows)
+                progress.progress(min(upload.tell() / max(upload.size, 1), 1.0), text=f"{done} utterances analyzed")
+                counter.write(f"**{verbs_found}** verbs in **{done}** utterances")
+                preview.dataframe(pd.DataFrame(list(recent), columns=RESULT_COLUMNS), hide_index=True)
+        except PoolBusy:
+            st.warning("The analyzer is busy with other requests, please try again in a moment.")
+            st.stop()
+        except FutureTimeout:
+            st.warning("A chunk of the file took too long and was cancelled, please try again later.")
+            st.stop()
+
+        progress.progress(1.0, text="Done")
+        st.session_state["batch_output"] = output_path
+        st.session_state["batch_name"] = os.path.splitext(upload.name)[0]
+
+    if "batch_output" in st.session_state:
+        output_path = st.session_state["batch_output"]
+        name = st.session_state["batch_name"]
+        with open(output_path, "rb") as f:
+            st.download_button("Download CSV", f, file_name=f"{name}-verbs.csv", mime="text/csv")
+
+        parquet_path = os.path.splitext(output_path)[0] + ".parquet"
+        try:
+            if not os.path.exists(parquet_path):
+                csv_to_parquet(output_path, parquet_path)
+        except ImportError:
+            st.caption("Install pyarrow for a Parquet download.")
+        else:
+            with open(parquet_path, "rb") as f:
+                st.download_button("Download Parquet", f, file_name=f"{name}-verbs.parquet",
+                                   mime="application/octet-stream")
+
+# Concordance: boolean lemma/form/feature queries over the corpus, shown as keyword-in-context lines
+with concordance_tab:
+    query = st.text_input("Search the corpus: (Hint: Try 'falar 3PL PSTSimple', 'form:foi OR form:era' or 'comer -PL')")
+
+    if query:
+        index = load_concordance(profile)
+        hits = index.search(query)
+        pages = max(1, -(-len(hits) // CONCORDANCE_PAGE_SIZE))
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1)
+        st.caption(f"{len(hits)} matching verbs")
+        if len(hits):
+            st.dataframe(pd.DataFrame(index.kwic(hits, page, CONCORDANCE_PAGE_SIZE)), hide_index=True)
+
+if fast_mode:
+    stats = load_fast_analyzer(profile, fuzzy_mode).stats()
+    st.sidebar.metric("spaCy bypass rate", f"{stats['bypass_rate']:.0%}")
+    st.sidebar.caption(
+        f"{stats['fast_sentences']} of {stats['sentences']} sentences resolved without spaCy, "
+        f"~{stats['seconds_saved'] * 1000:.0f} ms saved"
+    )
+    if fuzzy_mode:
+        st.sidebar.caption(
+            f"Fuzzy matching: {stats['fuzzy_hits']} of {stats['fuzzy_lookups']} unknown verbs matched, "
+            f"{stats['fuzzy_corrections']} labelled from the matched form"
+        )
+
+with st.sidebar.expander("Caches"):
+    sentence_stats = load_sentence_cache().stats()
+    token_stats = token_cache.stats()
+    st.write(f"Sentences: {sentence_stats['hits']} hits / {sentence_stats['misses']} misses "
+             f"({sentence_stats['size']}/{sentence_stats['maxsize']} entries)")
+    st.write(f"Tokens: {token_stats['hits']} hits / {token_stats['misses']} misses "
+             f"({token_stats['size']}/{token_stats['maxsize']} entries)")
+    if st.button("Clear caches"):
+        load_sentence_cache().clear()
+        token_cache.clear()
 
-if st.button("Analyze"):
-    results = analyze_sentence_spacy(sentence)
+with st.sidebar.expander("Model pool"):
+    pool_stats = pool.stats()
+    st.write(f"{pool_stats['queued']}/{pool_stats['max_queue']} requests waiting")
+    st.write(f"{pool_stats['completed']} completed, {pool_stats['rejected']} rejected as busy, "
+             f"{pool_stats['timed_out']} timed out ({pool_stats['abandoned']} stopped while running, "
+             f"{pool_stats['busy_seconds']:.1f}s of analysis)")
 
-    if not results:
-        st.info("No verbs found.")
-    else:
-        for r in results:
-            st.markdown("---")
-            st.markdown(f"### {r['Verb']} (Lemma: *{r['Lemma']}*)")
-            st.write(f"**Conjugation:** {r['Conjugation']}")
+if diagnostics:
+    with st.sidebar.expander("Diagnostics", expanded=True):
+        metrics = instrumentation.snapshot()
+        if metrics["stages"]:
+            stages = pd.DataFrame.from_dict(metrics["stages"], orient="index").sort_values("total_s", ascending=False)
+            st.dataframe(stages if trace_memory else stages.drop(columns="peak_kb"))
+        else:
+            st.caption("No stages recorded yet, analyze something first.")
+        for name, cache in metrics["caches"].items():
+            st.write(f"{name} cache hit rate: {cache['hit_rate']:.0%} ({cache['hits']} hits / {cache['misses']} misses)")
+        st.download_button("Download metrics (JSON)", json.dumps(metrics, indent=1), file_name="metrics.json",
+                           mime="application/json")
+        if st.button("Reset timings"):
+            instrumentation.reset()
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,33 @@
+from analysis_cache import LRUCache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the oldest
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 3, "misses": 1, "hit_rate": 0.75}
+
+
+def test_get_or_compute_only_computes_on_a_miss():
+    cache = LRUCache(8)
+    calls = []
+    compute = lambda: calls.append(1) or "value"
+    assert cache.get_or_compute("key", compute) == "value"
+    assert cache.get_or_compute("key", compute) == "value"
+    assert len(calls) == 1
+
+
+def test_resize_and_zero_size():
+    cache = LRUCache(3)
+    for key in "abc":
+        cache.put(key, key)
+    cache.resize(1)
+    assert len(cache) == 1 and cache.get("c") == "c"
+    cache.resize(0)
+    cache.put("d", "d")
+    assert len(cache) == 0
+    cache.clear()
+    assert cache.stats()["hits"] == 0
@@ -0,0 +1,35 @@
+import csv
+import io
+
+from batch_analysis import RESULT_COLUMNS, analyze_in_chunks, read_uploaded_utterances, write_results_csv
+
+
+def analyze_many(texts):
+    """Every word ending in -ou is a verb."""
+    return [[{"Verb": w, "Lemma": w[:-2] + "ar", "Conjugation": "3SG-PSTSimple"} for w in text.split()
+             if w.endswith("ou")] for text in texts]
+
+
+def test_uploaded_transcripts_and_text_files_are_read_lazily():
+    cha = read_uploaded_utterances("t.CHA", io.BytesIO("*PAR0:\tele falou .\n*INV:\tsim .\n".encode("utf-8")))
+    assert [(u.file, u.speaker, u.text) for u in cha] == [("t.CHA", "PAR0", "ele falou ."), ("t.CHA", "INV", "sim .")]
+    txt = read_uploaded_utterances("t.txt", io.BytesIO(b"ela voltou\n\n  eu sei \n"))
+    assert [(u.file, u.speaker, u.text) for u in txt] == [("t.txt", "", "ela voltou"), ("t.txt", "", "eu sei")]
+
+
+def test_rows_are_written_chunk_by_chunk(tmp_path):
+    texts = b"ele falou\nnada\nela voltou e ficou\n"
+    utterances = read_uploaded_utterances("t.txt", io.BytesIO(texts))
+    path = str(tmp_path / "out.csv")
+
+    progress = []
+    for done, rows in write_results_csv(path, analyze_in_chunks(analyze_many, utterances, chunk_size=2)):
+        with open(path, encoding="utf-8") as f:
+            progress.append((done, len(list(csv.reader(f))) - 1))  # rows on disk when the chunk is reported
+    assert progress == [(2, 1), (3, 3)]
+
+    with open(path, encoding="utf-8") as f:
+        table = list(csv.DictReader(f))
+    assert list(table[0]) == RESULT_COLUMNS
+    assert [(r["utterance"], r["verb"], r["lemma"]) for r in table] == [
+        ("ele falou", "falou", "falar"), ("ela voltou e ficou", "voltou", "voltar"), ("ela voltou e ficou", "ficou", "ficar")]
@@ -0,0 +1,31 @@
+import json
+
+import benchmarks
+
+
+def results(**medians):
+    return {"results": {name: {"median_s": median} for name, median in medians.items()}}
+
+
+def test_compare_flags_changes_beyond_the_threshold():
+    baseline = results(pretty_label=1.0, classify_verb=1.0, dialogue_cleaner=1.0, gone=1.0)
+    current = results(pretty_label=1.05, classify_verb=1.5, dialogue_cleaner=0.5, added=1.0)
+    rows = benchmarks.compare(baseline, current, threshold=0.10)
+    assert [(name, status) for name, *_, status in rows] == [
+        ("pretty_label", "ok"), ("dialogue_cleaner", "faster"), ("classify_verb", "slower"),
+        ("added", "new"), ("gone", "missing")]  # BENCHMARKS order first, then unknown names sorted
+    assert rows[2][3] == 1.5
+
+
+def test_main_exits_1_on_a_regression(tmp_path, capsys):
+    baseline = str(tmp_path / "baseline.json")
+    argv = ["--only", "pretty_label", "--repeats", "2", "--min-seconds", "0.001", "--baseline", baseline]
+    assert benchmarks.main(argv + ["--save-baseline"]) == 0
+
+    with open(baseline, encoding="utf-8") as f:
+        saved = json.load(f)
+    saved["results"]["pretty_label"]["median_s"] /= 100  # pretend the baseline was much faster
+    with open(baseline, "w", encoding="utf-8") as f:
+        json.dump(saved, f)
+    assert benchmarks.main(argv) == 1
+    assert "REGRESSION" in capsys.readouterr().out
@@ -0,0 +1,27 @@
+from chat_reader import Utterance, parse_chat, read_corpus
+
+TRANSCRIPT = (
+    "@Begin\n"
+    "@Participants:\tPAR0 Participant,\n"
+    "\tINV Investigator\n"
+    "*PAR0:\tEu lembro \x15200_1600\x15\n"
+    "\tde tudo . \x151600_2500\x15\n"
+    "%mor:\tpro|eu v|lembrar\n"
+    "\tp|de\n"
+    "*INV:\tmuito bem .\r\n"
+    "@End\n"
+)
+
+
+def test_parse_chat_merges_continuations_and_skips_headers_and_tiers():
+    assert list(parse_chat(TRANSCRIPT.splitlines(keepends=True), "t.cha")) == [
+        Utterance("t.cha", "PAR0", "Eu lembro de tudo .", 200, 2500),
+        Utterance("t.cha", "INV", "muito bem .", None, None),
+    ]
+
+
+def test_read_corpus_filters_speakers_by_prefix(tmp_path):
+    for name in ("b.cha", "a.cha"):
+        (tmp_path / name).write_text(TRANSCRIPT, encoding="utf-8")
+    utterances = list(read_corpus(str(tmp_path / "*.cha"), speakers="PAR"))
+    assert [(u.file, u.speaker) for u in utterances] == [("a.cha", "PAR0"), ("b.cha", "PAR0")]
@@ -0,0 +1,66 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("numpy")
+
+from chat_reader import Utterance
+from concordance import ConcordanceIndex, build_index
+
+UTTERANCES = [
+    Utterance("a/same.cha", "PAR0", "eu falei com ela", 0, 900),
+    Utterance("a/same.cha", "PAR0", "não", None, None),
+    Utterance("b/same.cha", "PAR1", "ela comeu e falou", 100, 800),
+]
+VERBS = pd.DataFrame({
+    "token": ["falei", "comeu", "falou"],
+    "lemma": ["falar", "comer", "falar"],
+    "conjugations": ["1SG-PSTSimple", "3SG-PSTSimple", "3SG-PSTSimple"],
+    "utterance": [0, 0, 0],  # per file
+    "file": ["a/same.cha", "b/same.cha", "b/same.cha"],
+})
+
+
+def test_same_named_files_in_different_folders_stay_apart(tmp_path):
+    path = str(tmp_path / "index.npz")
+    build_index(VERBS, UTTERANCES, key="k").save(path)
+    index = ConcordanceIndex.load(path)
+
+    rows = index.kwic(index.search("falar"))
+    assert [(r["file"], r["left"], r["keyword"], r["right"]) for r in rows] == [
+        ("a/same.cha", "eu ", "falei", " com ela"),
+        ("b/same.cha", "ela comeu e ", "falou", ""),
+    ]
+    assert rows[0]["start_ms"] == 0 and rows[1]["speaker"] == "PAR1"
+    assert [index.utterance_text(u) for u in range(3)] == [u.text for u in UTTERANCES]
+    assert index.key == "k"
+
+
+def test_features_of_a_query_must_hold_for_one_reading():
+    utterances = [Utterance("c.cha", "PAR0", "que ele venda e foi", None, None)]
+    verbs = pd.DataFrame({
+        "token": ["venda", "foi"],
+        "lemma": ["vender", "ser"],
+        "conjugations": ["1SG-PRSTSub|2SG-For-PRSTSub|3SG-PRSTSub", ""],  # no codes for irregular forms
+        "utterance": [0, 0],
+        "file": ["c.cha", "c.cha"],
+    })
+    index = build_index(verbs, utterances)
+
+    assert list(index.search("1 For")) == []  # 1st person and formal come from different readings
+    assert list(index.search("2 For PRSTSub")) == [0]
+    assert list(index.search("vender -3")) == [0]  # the 1SG and 2SG-For readings are not 3rd person
+    assert list(index.search("vender -PRSTSub")) == []
+    assert list(index.search("ser")) == [1]
+    assert list(index.search("ser -PL")) == []  # no reading to check the feature against
+
+
+def test_corpus_key_follows_the_annotation_fingerprint(tmp_path):
+    from concordance import corpus_key
+
+    path = tmp_path / "a.cha"
+    path.write_text("*PAR0:\tEu falei .\n", encoding="utf-8")
+    par = corpus_key([str(path)], "model|full|classify|speakers=PAR")
+    assert corpus_key([str(path)], "model|full|classify|speakers=PAR") == par
+    assert corpus_key([str(path)], "model|full|classify|speakers=*") != par
+    path.write_text("*PAR0:\tEu falo .\n", encoding="utf-8")
+    assert corpus_key([str(path)], "model|full|classify|speakers=PAR") != par
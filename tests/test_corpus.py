@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pandas")
+
+from corpus import annotate_utterances
+
+
+class FakeDoc(list):
+    """Tokens of one text; words ending in -ou are VERBs. doc.text is normalized, unlike the input."""
+
+    def __init__(self, text):
+        super().__init__(SimpleNamespace(text=w, lemma_=w, pos_="VERB" if w.endswith("ou") else "X", pos=100)
+                         for w in text.split())
+        self.text = " ".join(text.split()).lower()
+
+
+class FakeNLP:
+    def pipe(self, items, as_tuples=False, **kwargs):
+        for text, context in items:
+            yield FakeDoc(text), context
+
+
+def test_rows_are_keyed_by_the_input_text():
+    utterances = ["Ele  falou", "não", "Ele  falou", "ela voltou "]
+    table = annotate_utterances(FakeNLP(), utterances, classify=lambda lemma: "regular")
+    assert list(table["token"]) == ["falou", "falou", "voltou"]
+    assert list(table["utterance"]) == [0, 2, 3]
+
+
+def test_utterances_are_streamed_and_analysed_once():
+    read = []
+
+    def utterances():
+        for text in ["ela falou", "não", "ela falou", "", "ele voltou"]:
+            read.append(text)
+            yield text
+
+    class CountingNLP(FakeNLP):
+        def pipe(self, items, as_tuples=False, **kwargs):
+            self.kwargs = kwargs
+            self.texts = []
+            for text, context in items:
+                assert read[-1] == text  # pulled from the input one utterance at a time
+                self.texts.append(text)
+                yield FakeDoc(text), context
+
+    nlp = CountingNLP()
+    table = annotate_utterances(nlp, utterances(), classify=lambda lemma: "regular", batch_size=8, n_process=2)
+    assert nlp.texts == ["ela falou", "não", "ele voltou"]
+    assert nlp.kwargs == {"batch_size": 8, "n_process": 2}
+    assert list(zip(table["utterance"], table["token"])) == [(0, "falou"), (2, "falou"), (4, "voltou")]
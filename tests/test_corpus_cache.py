@@ -0,0 +1,48 @@
+import pytest
+
+pytest.importorskip("pandas")
+
+import corpus_cache
+
+
+def classify_a(lemma):
+    return "regular"
+
+
+def classify_b(lemma):
+    return "irregular"
+
+
+@pytest.fixture
+def fingerprint(monkeypatch):
+    monkeypatch.setattr(corpus_cache, "pipeline_fingerprint", lambda nlp, profile: f"model|{profile}")
+    return lambda classify=classify_a, speakers="PAR", profile="morph-only": \
+        corpus_cache.annotation_fingerprint(None, profile, classify, speakers)
+
+
+def test_speaker_filter_changes_the_key(tmp_path, fingerprint):
+    path = tmp_path / "a.cha"
+    path.write_text("*PAR0:\tEu falei .\n*CHI:\tfui .\n", encoding="utf-8")
+    par = corpus_cache.cache_key(str(path), fingerprint(speakers="PAR"))
+    chi = corpus_cache.cache_key(str(path), fingerprint(speakers="CHI"))
+    everyone = corpus_cache.cache_key(str(path), fingerprint(speakers=None))
+    assert len({par, chi, everyone}) == 3
+
+
+def test_classifier_changes_the_key(fingerprint):
+    assert fingerprint(classify=classify_a) != fingerprint(classify=classify_b)
+    assert fingerprint(classify=classify_a) == fingerprint(classify=classify_a)
+
+
+def test_speakers_tag_is_order_preserving():
+    assert corpus_cache.speakers_tag(None) == "*"
+    assert corpus_cache.speakers_tag("PAR") == "PAR"
+    assert corpus_cache.speakers_tag(("PAR", "CHI")) == "PAR,CHI"
+
+
+def test_file_content_changes_the_key(tmp_path, fingerprint):
+    path = tmp_path / "a.cha"
+    path.write_text("*PAR0:\tEu falei .\n", encoding="utf-8")
+    before = corpus_cache.cache_key(str(path), fingerprint())
+    path.write_text("*PAR0:\tEu falo .\n", encoding="utf-8")
+    assert corpus_cache.cache_key(str(path), fingerprint()) != before
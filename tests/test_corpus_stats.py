@@ -0,0 +1,31 @@
+from types import SimpleNamespace
+
+import corpus_stats
+
+TRANSCRIPT = "@Begin\n*PAR0:\tela tinha falado .\n*INV:\tvocê falou ?\n@End\n"
+POS = {"tinha": "AUX", "falado": "VERB", "falou": "VERB"}
+
+
+class FakeMorph:
+    def get(self, feature):
+        return []
+
+
+class FakeNLP:
+    """Tags every word with POS (or X), the lemma being the word itself."""
+
+    def pipe(self, texts, **kwargs):
+        for text in texts:
+            yield [SimpleNamespace(text=w, lemma_=w, pos_=POS.get(w, "X"), morph=FakeMorph()) for w in text.split()]
+
+
+def test_counts_verbs_only_and_keys_files_by_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(corpus_stats, "load_pipeline", lambda profile: FakeNLP())
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "same.cha").write_text(TRANSCRIPT, encoding="utf-8")
+
+    path = str(tmp_path / "a" / "same.cha")
+    name, totals, by_speaker = corpus_stats.file_stats(path)
+    assert name == path
+    assert totals.verbs == 2 and "tinha" not in totals.lemmas  # AUX is left out, as in corpus.verb_rows
+    assert by_speaker["PAR0"].verbs == 1 and by_speaker["INV"].verbs == 1
@@ -0,0 +1,55 @@
+import pytest
+
+from fast_analyzer import AMBIGUOUS, RESOLVED, FastAnalyzer, resolve_word
+
+
+def no_spacy():
+    pytest.fail("spaCy should not be needed for this sentence")
+
+
+class FakeNLP:
+    """Records the sentences sent to the spaCy tier and finds no verbs in them."""
+
+    def __init__(self):
+        self.sentences = []
+
+    def pipe(self, texts, batch_size=64):
+        for text in texts:
+            self.sentences.append(text)
+            yield []
+
+
+@pytest.mark.parametrize("word, previous", [
+    ("bolo", "come"),
+    ("casa", None),
+    ("nada", "tem"),
+    ("trabalho", "de"),
+])
+def test_nominal_homographs_are_ambiguous(word, previous):
+    status, analyses = resolve_word(word, previous=previous)
+    assert analyses and status == AMBIGUOUS
+
+
+def test_hits_after_determiners_are_ambiguous():
+    assert resolve_word("falou")[0] == RESOLVED
+    assert resolve_word("falou", previous="o")[0] == AMBIGUOUS
+
+
+def test_infinitive_after_preposition_stays_resolved():
+    assert resolve_word("falar", previous="para")[0] == RESOLVED
+    assert resolve_word("falou", previous="para")[0] == AMBIGUOUS
+
+
+@pytest.mark.parametrize("sentence", ["o menino come bolo", "a casa dela", "não tem nada"])
+def test_homograph_sentences_go_to_spacy(sentence, monkeypatch):
+    monkeypatch.setattr("fast_analyzer.analyze_doc", lambda doc: doc)
+    nlp = FakeNLP()
+    analyzer = FastAnalyzer(lambda: nlp)
+    assert analyzer.fast_pass(sentence) is None
+    assert analyzer.analyze(sentence) == []
+    assert nlp.sentences == [sentence]
+
+
+def test_plain_verbs_stay_on_the_fast_path():
+    results = FastAnalyzer(no_spacy).analyze("eu falei com ele")
+    assert [(r["Verb"], r["Lemma"], r["Source"]) for r in results] == [("falei", "falar", "fast")]
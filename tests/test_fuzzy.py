@@ -0,0 +1,49 @@
+import itertools
+
+import pytest
+
+import cli
+from fuzzy import FuzzyIndex, edit_distance
+from lexicon import get_lexicon
+
+
+def osa(a, b):
+    """Unbanded optimal string alignment distance, the reference for edit_distance."""
+    d = [[i + j if i * j == 0 else 0 for j in range(len(b) + 1)] for i in range(len(a) + 1)]
+    for i, j in itertools.product(range(1, len(a) + 1), range(1, len(b) + 1)):
+        d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1, d[i - 1][j - 1] + (a[i - 1] != b[j - 1]))
+        if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+            d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
+    return d[-1][-1]
+
+
+@pytest.mark.parametrize("a, b", [("falou", "falou"), ("falou", "flaou"), ("falou", "falo"), ("falavamos", "falávamos"),
+                                  ("comeram", "comerão"), ("abc", "xyz"), ("", "ab"), ("partiste", "partistes")])
+def test_edit_distance_matches_the_unbanded_distance(a, b):
+    for limit in (1, 2):
+        assert edit_distance(a, b, limit) == min(osa(a, b), limit + 1)
+
+
+@pytest.fixture(scope="module")
+def index():
+    lexicon = get_lexicon()
+    return FuzzyIndex({form: lexicon[form] for form in lexicon if form.startswith(("fal", "com"))})
+
+
+def test_lookup_finds_every_form_a_full_scan_finds(index):
+    for word in ("falpu", "flaávamos", "comeremso", "falarem"):
+        expected = {form for form in index.forms if osa(word, form) <= 2}
+        if len(expected) <= index.max_candidates:
+            assert {form for form, _ in index.lookup(word)} == expected
+
+
+def test_correct_prefers_the_closest_form(index):
+    assert index.correct("falpu") == "falou"
+    assert index.correct("falou") is None  # known forms are not corrected
+    assert index.correct("xyzxyz") is None
+
+
+def test_fuzzy_without_fast_is_rejected(capsys):
+    with pytest.raises(SystemExit):
+        cli.main(["analyze", "--fuzzy", "2"])
+    assert "--fuzzy needs --fast" in capsys.readouterr().err
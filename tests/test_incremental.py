@@ -0,0 +1,32 @@
+from incremental import IncrementalAnalyzer, fingerprint, split_sentences
+
+
+def test_split_sentences():
+    text = 'Ele falou. "Ela foi?" Nós comemos…\nsem ponto\n\n  outra linha'
+    assert split_sentences(text) == ["Ele falou.", '"Ela foi?"', "Nós comemos…", "sem ponto", "outra linha"]
+
+
+def test_fingerprint_ignores_whitespace():
+    assert fingerprint(" ele  falou ") == fingerprint("ele falou")
+    assert fingerprint("ele falou") != fingerprint("ele falou.")
+
+
+def test_only_changed_sentences_are_analyzed():
+    batches = []
+
+    def analyze_many(sentences):
+        batches.append(sentences)
+        return [[s.upper()] for s in sentences]
+
+    analyzer = IncrementalAnalyzer(analyze_many)
+    assert analyzer.analyze("Eu falei. Eu falei. Ela foi.") == [
+        ("Eu falei.", ["EU FALEI."]), ("Eu falei.", ["EU FALEI."]), ("Ela foi.", ["ELA FOI."])]
+    assert batches == [["Eu falei.", "Ela foi."]]
+
+    result = analyzer.analyze("Eu  falei. Ela voltou.")
+    assert batches[-1] == ["Ela voltou."]
+    assert result[0][1] == ["EU FALEI."]
+    assert (analyzer.analyzed, analyzer.reused) == (1, 1)
+
+    analyzer.analyze("Eu falei.")
+    assert len(batches) == 2  # nothing changed, no call
@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+import instrumentation
+
+
+@pytest.fixture(autouse=True)
+def clean():
+    instrumentation.disable()
+    instrumentation.reset()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+@instrumentation.timed("test.double")
+def double(x):
+    return 2 * x
+
+
+def calls(name):
+    return instrumentation.snapshot()["stages"].get(name, {}).get("calls", 0)
+
+
+def test_functions_decorated_while_off_are_timed_once_enabled():
+    assert double(2) == 4 and calls("test.double") == 0
+    instrumentation.enable()
+    assert double(3) == 6 and calls("test.double") == 1
+
+
+def test_sessions_do_not_switch_each_other():
+    on_ready, off_done = threading.Event(), threading.Event()
+
+    def session_on():
+        instrumentation.use_session(True)
+        on_ready.set()
+        off_done.wait(5)  # the other session turns its switch off meanwhile
+        double(1)
+        with instrumentation.stage("test.block"):
+            pass
+
+    def session_off():
+        on_ready.wait(5)
+        instrumentation.use_session(False)
+        double(1)
+        off_done.set()
+
+    threads = [threading.Thread(target=session_on), threading.Thread(target=session_off)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls("test.double") == 1
+    assert calls("test.block") == 1
+    assert not instrumentation.is_enabled()  # this thread follows the process setting
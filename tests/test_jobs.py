@@ -0,0 +1,97 @@
+import json
+import os
+import time
+
+import pytest
+
+import jobs
+
+
+@pytest.fixture
+def job_dir(tmp_path):
+    os.makedirs(tmp_path / "shards")
+    return str(tmp_path)
+
+
+def write_lock(job_dir, shard_id, host, pid, token, age=0.0):
+    path = jobs.shard_path(job_dir, shard_id, "lock")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"host": host, "pid": pid, "token": token, "time": 0}, f)
+    if age:
+        then = time.time() - age
+        os.utime(path, (then, then))
+    return path
+
+
+def test_split_files_keeps_order_and_balances():
+    files = [(f"f{i}", size) for i, size in enumerate([10, 10, 10, 10, 40, 10, 10])]
+    groups = jobs.split_files(files, 3)
+    assert [path for group in groups for path, _ in group] == [path for path, _ in files]
+    assert len(groups) == 3
+
+
+def test_claim_is_exclusive(job_dir):
+    token = jobs.claim(job_dir, "00000")
+    assert token is not None
+    assert jobs.claim(job_dir, "00000") is None  # held by a live process (this one)
+    jobs.release(job_dir, "00000", token)
+    assert jobs.claim(job_dir, "00000") is not None
+
+
+def test_lock_of_dead_process_is_taken_over(job_dir):
+    write_lock(job_dir, "00000", jobs.HOST, 999999999, "dead")
+    token = jobs.claim(job_dir, "00000")
+    assert token is not None and jobs.owns(job_dir, "00000", token)
+
+
+def test_lock_from_other_host_waits_for_stale_after(job_dir):
+    write_lock(job_dir, "00000", "elsewhere", 1, "remote")
+    assert jobs.claim(job_dir, "00000", stale_after=60) is None
+    write_lock(job_dir, "00000", "elsewhere", 1, "remote", age=120)
+    assert jobs.claim(job_dir, "00000", stale_after=60) is not None
+
+
+def test_stale_owner_loses_the_lock(job_dir):
+    slow = jobs.claim(job_dir, "00000")
+    path = jobs.shard_path(job_dir, "00000", "lock")
+    os.utime(path, (0, 0))  # the slow run stopped heart-beating
+    fresh = jobs.claim(job_dir, "00000", stale_after=60)
+    assert fresh is not None and fresh != slow
+
+    with pytest.raises(jobs.LostLock):
+        jobs.heartbeat(job_dir, "00000", slow)
+    jobs.release(job_dir, "00000", slow)  # must not remove the new owner's lock
+    assert jobs.owns(job_dir, "00000", fresh)
+    assert jobs.claim(job_dir, "00000", stale_after=60) is None
+
+
+def test_work_survives_a_lost_lock(job_dir, monkeypatch):
+    with open(jobs.manifest_path(job_dir), "w", encoding="utf-8") as f:
+        json.dump({"shards": [{"id": "00000", "files": []}, {"id": "00001", "files": []}]}, f)
+
+    def process_shard(job_dir, manifest, shard, token, cache_dir=None, batch_size=256):
+        if shard["id"] == "00000":
+            write_lock(job_dir, "00000", "elsewhere", 1, "thief")
+            jobs.heartbeat(job_dir, "00000", token)
+        open(jobs.shard_path(job_dir, shard["id"], "done"), "w").close()
+        return 0
+
+    monkeypatch.setattr(jobs, "process_shard", process_shard)
+    assert jobs.work(job_dir) == ["00001"]
+    assert jobs.read_lock(jobs.shard_path(job_dir, "00000", "lock"))["token"] == "thief"
+    assert jobs.status(job_dir) == {"done": ["00001"], "running": ["00000"], "stale": [], "pending": []}
+
+
+def test_replan_without_shards_dir_and_recursive_patterns(tmp_path):
+    corpus = tmp_path / "data" / "sub"
+    corpus.mkdir(parents=True)
+    (corpus / "a.cha").write_text("*PAR0:\tEu falei .\n", encoding="utf-8")
+    job_dir = str(tmp_path / "job")
+
+    manifest = jobs.plan(job_dir, str(tmp_path / "data" / "**" / "*.cha"), shards=1)
+    assert [f["path"] for f in manifest["shards"][0]["files"]] == [str(corpus / "a.cha")]
+    os.rmdir(os.path.join(job_dir, "shards"))
+    (corpus / "b.cha").write_text("*PAR0:\tEu falo .\n", encoding="utf-8")
+    manifest = jobs.plan(job_dir, str(tmp_path / "data" / "**" / "*.cha"), shards=1, replan=True)
+    assert len(manifest["shards"][0]["files"]) == 2
+    assert os.path.isdir(os.path.join(job_dir, "shards"))
@@ -0,0 +1,23 @@
+from lexicon import build_lexicon, conjugation_table, is_irregular, lookup
+
+
+def test_regular_lemma_lists_generated_forms():
+    table = conjugation_table("Falar")
+    forms = {f["form"]: f["code"] for f in table["forms"]}
+    assert table["lemma"] == "falar" and not table["irregular"]
+    assert "falou" in forms and "falei" in forms
+    assert forms["falar"] == "Infinitive"
+
+
+def test_irregular_lemma_lists_no_made_up_forms():
+    table = conjugation_table("ser")
+    assert table["irregular"]
+    assert [f["form"] for f in table["forms"]] == ["ser"]
+    assert is_irregular("pôr") and is_irregular("propor")
+
+
+def test_ambiguous_forms_keep_every_reading():
+    lexicon = build_lexicon(["falar", "comer"])
+    codes = {a.code for a in lookup("falamos", "falar", lexicon)}
+    assert {"1PL-PSTSimple", "1PL-PRSTInd"} <= codes
+    assert lookup("falamos", "comer", lexicon) == ()
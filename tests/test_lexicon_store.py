@@ -0,0 +1,73 @@
+import pytest
+
+from lexicon import Analysis, build_lexicon
+from lexicon_store import MappedLexicon, compile_lexicon, main, open_lexicon, source_key
+
+
+@pytest.fixture
+def lexicon():
+    lexicon = build_lexicon(["falar", "comer", "partir", "ser", "pôr"])
+    lexicon["à"] = (Analysis("àlemma", "3SG", "PSTSimple"),)  # non-ASCII forms sort by UTF-8 bytes
+    return lexicon
+
+
+def test_compiled_lexicon_round_trips(tmp_path, lexicon):
+    path = str(tmp_path / "verbs.lex")
+    compile_lexicon(lexicon, path, key=b"k")
+    mapped = MappedLexicon(path)
+
+    assert len(mapped) == len(lexicon)
+    assert sorted(mapped) == sorted(lexicon)
+    for form, analyses in lexicon.items():
+        assert mapped[form] == analyses
+    assert mapped["falamos"] == lexicon["falamos"] and len(mapped["falamos"]) > 1
+    assert "falxyz" not in mapped and 3 not in mapped
+    with pytest.raises(KeyError):
+        mapped["falxyz"]
+
+
+def test_open_lexicon_rejects_stale_and_broken_files(tmp_path, lexicon):
+    path = tmp_path / "verbs.lex"
+    compile_lexicon(lexicon, str(path), key=b"new")
+    assert open_lexicon(str(path), key=b"new") is not None
+    assert open_lexicon(str(path), key=b"old") is None
+    assert open_lexicon(str(tmp_path / "missing.lex")) is None
+
+    path.write_bytes(b"not a lexicon")
+    assert open_lexicon(str(path)) is None
+
+
+def test_extra_forms_are_merged(tmp_path):
+    lemmas = tmp_path / "verbs.csv"
+    lemmas.write_text("Rank,Lemma,Freq\n1,falar,10\n2,ser,5\n", encoding="utf-8")
+    forms = tmp_path / "irregular.csv"
+    forms.write_text("form,lemma,code\nfoi,ser,3SG-PSTSimple\nSou,ser,1SG-PRSTInd\n", encoding="utf-8")
+    output = str(tmp_path / "verbs.lex")
+
+    main(["--lemmas", str(lemmas), "--forms", str(forms), "--output", output])
+    mapped = MappedLexicon(output)
+    assert mapped["foi"] == (Analysis("ser", "3SG", "PSTSimple"),)
+    assert mapped["sou"] == (Analysis("ser", "1SG", "PRSTInd"),)
+    assert mapped["ser"] == (Analysis("ser", "", "Infinitive"),)
+    assert "falou" in mapped
+
+
+def test_source_key_follows_the_extra_forms(tmp_path):
+    lemmas = tmp_path / "verbs.csv"
+    lemmas.write_text("Rank,Lemma,Freq\n1,falar,10\n", encoding="utf-8")
+    forms = tmp_path / "irregular.csv"
+    forms.write_text("form,lemma,code\nfoi,ser,3SG-PSTSimple\n", encoding="utf-8")
+
+    without = source_key(str(lemmas), ())
+    before = source_key(str(lemmas), (str(forms),))
+    forms.write_text("form,lemma,code\nfoi,ir,3SG-PSTSimple\n", encoding="utf-8")
+    assert len({without, before, source_key(str(lemmas), (str(forms),))}) == 3
+
+
+def test_extra_forms_reach_lemma_analyses_and_the_dict_lexicon(monkeypatch):
+    import lexicon
+
+    monkeypatch.setattr(lexicon, "get_extra_forms", lambda: {"ser": [("foi", Analysis("ser", "3SG", "PSTSimple"))]})
+    assert ("foi", Analysis("ser", "3SG", "PSTSimple")) in list(lexicon.lemma_analyses("ser"))
+    assert lexicon.build_lexicon(["ser"])["foi"] == (Analysis("ser", "3SG", "PSTSimple"),)
+    assert lexicon.conjugation_table("ser")["forms"][-1]["form"] == "foi"
@@ -0,0 +1,35 @@
+import threading
+
+from loadtest import percentile, run_clients, sample_sentences, summarize
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert [percentile(values, q) for q in (50, 95, 99, 100)] == [50, 95, 99, 100]
+    assert percentile([7], 99) == 7 and percentile([], 50) == 0.0
+
+
+def test_every_sentence_is_sent_once_across_clients():
+    sent, lock = [], threading.Lock()
+
+    def make_client():
+        def client(batch):
+            if batch == ["boom"]:
+                raise ValueError("bad sentence")
+            with lock:
+                sent.extend(batch)
+        return client
+
+    sentences = [f"s{i}" for i in range(9)] + ["boom"]
+    latencies, errors, seconds, done = run_clients(make_client, sentences, clients=3, per_request=1)
+    assert sorted(sent) == sorted(sentences[:-1])
+    assert (len(latencies), done, errors) == (9, 9, {"bad sentence": 1})
+    report = summarize(latencies, errors, seconds, done, [(0.0, 10.0), (0.5, 12.0)])
+    assert report["requests"] == 9 and report["rss_mb"]["peak"] == 12.0
+
+
+def test_sample_is_reproducible(tmp_path):
+    (tmp_path / "a.cha").write_text("*PAR0:\tele falou .\n*INV:\tsim senhora .\n*PAR0:\tsim\n", encoding="utf-8")
+    sample = sample_sentences(5, seed=1, patterns=str(tmp_path / "*.cha"))
+    assert sample == sample_sentences(5, seed=1, patterns=str(tmp_path / "*.cha"))
+    assert set(sample) == {"ele falou ."}  # PAR turns of more than one word only
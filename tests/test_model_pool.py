@@ -0,0 +1,91 @@
+import contextvars
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import pytest
+
+import instrumentation
+import model_pool
+from model_pool import ModelPool, PoolBusy
+
+
+class FakeNLP:
+    """Stands in for a spaCy pipeline: pipe() yields the texts, optionally blocking on an event first."""
+
+    pipeline = []
+
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.calls = []
+
+    def make_doc(self, text):
+        return text
+
+    def pipe(self, texts, **kwargs):
+        texts = list(texts)
+        self.calls.append(texts)
+        if self.gate is not None:
+            self.gate.wait(5)
+        return iter(texts)
+
+
+@pytest.fixture(autouse=True)
+def fake_analyze_doc(monkeypatch):
+    monkeypatch.setattr(model_pool, "analyze_doc", lambda doc: [{"Verb": doc, "enabled": instrumentation.is_enabled()}])
+
+
+def test_analyze_returns_one_result_per_sentence():
+    pool = ModelPool(FakeNLP(), chunk=2)
+    results = pool.analyze(["a", "b", "c"])
+    assert [r[0]["Verb"] for r in results] == ["a", "b", "c"]
+    assert pool.nlp.calls == [["a", "b"], ["c"]]
+    assert pool.stats()["completed"] == 1
+
+
+def test_full_queue_raises_pool_busy():
+    gate = threading.Event()
+    pool = ModelPool(FakeNLP(gate), max_queue=1)
+    try:
+        pool.submit(["running"])
+        while pool.requests.qsize():  # wait for the worker to take it
+            pass
+        pool.submit(["queued"])
+        with pytest.raises(PoolBusy):
+            pool.submit(["rejected"])
+        assert pool.stats()["rejected"] == 1
+    finally:
+        gate.set()
+
+
+def test_timed_out_batch_stops_at_the_next_chunk():
+    gate = threading.Event()
+    nlp = FakeNLP(gate)
+    pool = ModelPool(nlp, timeout=0.05, chunk=1)
+    with pytest.raises(FutureTimeout):
+        pool.analyze(["a", "b", "c"])
+    gate.set()
+    pool.analyze(["d"])  # served after the abandoned batch
+    assert nlp.calls == [["a"], ["d"]]
+    assert pool.stats()["abandoned"] == 1
+    assert pool.stats()["timed_out"] == 1
+
+
+def test_exclusive_holds_the_worker_back():
+    pool = ModelPool(FakeNLP())
+    with pool.exclusive() as nlp:
+        request = pool.submit(["a"])
+        with pytest.raises(FutureTimeout):
+            request.result(0.05)
+        assert nlp.calls == []
+    assert request.result(5)[0][0]["Verb"] == "a"
+
+
+def test_worker_runs_in_the_submitting_session_context():
+    pool = ModelPool(FakeNLP())
+
+    def analyze_in_session(enabled):
+        instrumentation.use_session(enabled)
+        return pool.analyze(["a"])[0][0]["enabled"]
+
+    assert contextvars.copy_context().run(analyze_in_session, True) is True
+    assert contextvars.copy_context().run(analyze_in_session, False) is False
@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("pandas")
+
+from lexicon import lemma_analyses
+from paradigms import paradigm_table
+
+LEMMAS = ["falar", "comer", "partir", "ser", "pôr", "propor", "nada", " Falar "]
+
+
+def test_paradigm_table_has_the_forms_of_lemma_analyses():
+    table = paradigm_table(LEMMAS)
+    rows = set(zip(table["lemma"], table["form"], table["code"].astype(str)))
+    expected = {(lemma, form, analysis.code)
+                for lemma in dict.fromkeys(l.strip().lower() for l in LEMMAS)
+                for form, analysis in lemma_analyses(lemma)}
+    assert rows == expected
+
+
+def test_paradigm_table_includes_extra_forms(monkeypatch):
+    import lexicon
+    import paradigms
+    from lexicon import Analysis
+
+    extra = {"ser": [("foi", Analysis("ser", "3SG", "PSTSimple"))]}
+    monkeypatch.setattr(lexicon, "get_extra_forms", lambda: extra)
+    monkeypatch.setattr(paradigms, "get_extra_forms", lambda: extra)
+    table = paradigm_table(["ser", "falar"])
+    rows = set(zip(table["lemma"], table["form"], table["code"].astype(str)))
+    assert ("ser", "foi", "3SG-PSTSimple") in rows
+    assert rows == {(l, f, a.code) for l in ("ser", "falar") for f, a in lemma_analyses(l)}
@@ -0,0 +1,20 @@
+import pytest
+
+import cli
+import jobs
+from pipelines import ANALYSIS_PROFILES, ANALYZER_COMPONENTS, PROFILES
+
+
+def test_analysis_profiles_keep_every_component_the_analyzer_reads():
+    for name in ANALYSIS_PROFILES:
+        assert not set(PROFILES[name]) & set(ANALYZER_COMPONENTS), name
+    assert "tagger-only" not in ANALYSIS_PROFILES  # no lemmatizer, so no lemma_
+    assert {"full", "morph-only"} <= set(ANALYSIS_PROFILES)
+
+
+def test_entry_points_reject_profiles_without_lemmas(capsys):
+    for main, argv in ((cli.main, ["annotate-corpus", "--profile", "tagger-only"]),
+                       (jobs.main, ["plan", "job", "--profile", "tagger-only"])):
+        with pytest.raises(SystemExit):
+            main(argv)
+        assert "invalid choice: 'tagger-only'" in capsys.readouterr().err
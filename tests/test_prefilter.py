@@ -0,0 +1,32 @@
+from prefilter import Prefilter, Span, lemma_forms, scan_chat
+
+
+def test_spans_are_whole_words_with_exact_offsets():
+    prefilter = Prefilter(["falo", "Falou"])
+    text = "Ele falou, eu falo; falouzinho não."
+    spans = list(prefilter.spans(text, offset=10))
+    assert spans == [Span(14, 19, "falou"), Span(24, 28, "falo")]
+    assert [text[s.start - 10:s.end - 10].lower() for s in spans] == ["falou", "falo"]
+
+
+def test_has_candidate():
+    prefilter = Prefilter(["falou"])
+    assert prefilter.has_candidate("Ele FALOU ontem")
+    assert not prefilter.has_candidate("ele falouzinho")
+
+
+def test_lemma_forms_include_irregular_forms():
+    assert {"falou", "falei", "falar"} <= lemma_forms(["falar"])
+    assert {"ir", "vou", "foi", "iam"} <= lemma_forms([" Ir "])
+
+
+def test_scan_chat_offsets_point_into_the_file(tmp_path):
+    text = ("@Begin\r\n*PAR0:\tEu fui lá .\r\n%mor:\tfui\r\n*INV:\tela vai\r\n\tvai sim .\r\n@End\r\n")
+    path = tmp_path / "t.cha"
+    path.write_bytes(text.encode("utf-8"))
+
+    spans = list(scan_chat(str(path), Prefilter(lemma_forms(["ir"]))))
+    assert [(s.line, s.speaker, s.form) for s in spans] == [(2, "PAR0", "fui"), (4, "INV", "vai"), (5, "INV", "vai")]
+    assert all(s.file == str(path) for s in spans)  # the path, so same-named files in other folders stay apart
+    assert all(text[s.start:s.end] == s.form for s in spans)
+    assert [s.form for s in scan_chat(str(path), Prefilter(["fui", "vai"]), speakers="PAR")] == ["fui"]
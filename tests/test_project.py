@@ -0,0 +1,26 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pandas")
+
+import turninversionling430project as project
+
+
+class FakeNLP:
+    """Tags words ending in -ou or -ei as VERBs, the lemma being the word itself."""
+
+    def pipe(self, items, **kwargs):
+        for text, context in items:
+            yield [SimpleNamespace(text=w, lemma_=w, pos_="VERB" if w.endswith(("ou", "ei")) else "X", pos=100)
+                   for w in text.split()], context
+
+
+def test_utterances_are_numbered_per_file(tmp_path):
+    (tmp_path / "a.cha").write_text("*PAR0:\tEle falou .\n*INV:\tvoltou ?\n*PAR0:\tEu falei .\n", encoding="utf-8")
+    (tmp_path / "b.cha").write_text("*PAR1:\tEla voltou .\n", encoding="utf-8")
+
+    table = project.get_past_tense_by_file(str(tmp_path / "*.cha"), "PAR", nlp=FakeNLP())
+    assert list(zip(table["file"], table["utterance"], table["token"])) == [
+        ("a.cha", 0, "falou"), ("a.cha", 1, "falei"), ("b.cha", 0, "voltou")]
+    assert list(project.read_bfamdl_file(str(tmp_path / "b.cha"), None))[0].text == "ela voltou ."
@@ -0,0 +1,77 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+
+from server import AnalysisServer, HTTPError, read_request, request_sentences
+
+
+def read(raw: bytes):
+    async def go():
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        return await read_request(reader)
+    return asyncio.run(go())
+
+
+def status_of(call):
+    with pytest.raises(HTTPError) as error:
+        call()
+    return error.value.status
+
+
+def test_request_sentences_accepts_both_shapes():
+    assert request_sentences(b'{"sentence": "Eu falei."}') == ["Eu falei."]
+    assert request_sentences(b'{"sentences": ["a", "b"]}') == ["a", "b"]
+
+
+@pytest.mark.parametrize("body", [b"[1, 2]", b'"text"', b"not json", b'{"sentences": [1]}', b"{}"])
+def test_bad_bodies_are_400(body):
+    assert status_of(lambda: request_sentences(body)) == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-5"])
+def test_bad_content_length_is_400(length):
+    raw = b"POST /analyze HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n{}"
+    assert status_of(lambda: read(raw)) == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.parametrize("raw, status", [
+    (b"GET /" + b"a" * (1 << 16) + b" HTTP/1.1\r\n\r\n", HTTPStatus.BAD_REQUEST),
+    (b"GET / HTTP/1.1\r\nX-Long: " + b"a" * (1 << 16) + b"\r\n\r\n", HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE),
+    (b"GET / HTTP/1.1\r\n" + b"".join(b"X-%d: 1\r\n" % i for i in range(101)) + b"\r\n",
+     HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE),
+])
+def test_oversized_request_heads_are_rejected(raw, status):
+    assert status_of(lambda: read(raw)) == status
+
+
+def test_request_is_parsed():
+    method, target, headers, body = read(b"POST /analyze HTTP/1.1\r\nContent-Length: 2\r\n\r\n{}")
+    assert (method, target, headers["content-length"], body) == ("POST", "/analyze", "2", b"{}")
+
+
+def test_more_sentences_than_the_queue_is_413():
+    async def go():
+        app = AnalysisServer(max_queue=4)
+        body = json.dumps({"sentences": ["a"] * 5}).encode()
+        with pytest.raises(HTTPError) as error:
+            await app.route("POST", "/analyze", body)
+        return error.value.status
+    assert asyncio.run(go()) == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+
+def test_conjugate_and_unknown_routes():
+    async def go():
+        app = AnalysisServer()
+        table = await app.route("GET", "/conjugate?lemma=ser", b"")
+        with pytest.raises(HTTPError) as missing:
+            await app.route("GET", "/conjugate", b"")
+        with pytest.raises(HTTPError) as unknown:
+            await app.route("GET", "/nope", b"")
+        return table, missing.value.status, unknown.value.status
+    table, missing, unknown = asyncio.run(go())
+    assert table["irregular"] and [f["form"] for f in table["forms"]] == ["ser"]
+    assert (missing, unknown) == (HTTPStatus.BAD_REQUEST, HTTPStatus.NOT_FOUND)
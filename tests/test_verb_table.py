@@ -0,0 +1,43 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from conjugator import FEATURE_FLAGS
+from verb_table import VerbTable, compact_verb_table
+
+CODES = pd.DataFrame({
+    "lemma": ["vender", "falar"],
+    "form": ["venda", "falou"],
+    "code": [["1SG-PRSTSub", "2SG-For-PRSTSub", "3SG-PRSTSub"], ["3SG-PSTSimple"]],
+})
+VERBS = pd.DataFrame({
+    "token": ["venda", "Falou", "foi"],
+    "lemma": ["vender", "falar", "ser"],
+    "classification": ["regular", "regular", "irregular"],
+    "pos": [100, 100, 100],
+    "utterance": [0, 1, 2],
+    "file": ["a.cha"] * 3,
+    "speaker": ["PAR0"] * 3,
+    "start_ms": [None] * 3,
+    "end_ms": [None] * 3,
+})
+
+
+def bits(*names):
+    return sum(FEATURE_FLAGS[name] for name in names)
+
+
+def test_select_matches_features_of_one_reading():
+    table = VerbTable(compact_verb_table(VERBS, CODES))
+    assert list(table.select(features=bits("1", "For"))["token"]) == []  # from two different readings of venda
+    assert list(table.select(features=bits("2", "For", "PRSTSub"))["token"]) == ["venda"]
+    assert list(table.select(features=bits("3", "SG"))["token"]) == ["venda", "Falou"]
+    assert list(table.select(lemma="falar", features=bits("3"))["token"]) == ["Falou"]
+    assert len(table.select()) == 3  # no features: every row, unknown conjugations included
+
+
+def test_token_index():
+    table = VerbTable(compact_verb_table(VERBS, CODES))
+    assert list(table.rows("falou")["lemma"]) == ["falar"]
+    assert table.first("FOI")["conjugations"] == ""
+    assert table.first("nada") is None and len(table.rows("nada")) == 0
@@ -26,65 +26,96 @@ Before running this project, ensure you have run the following in your terminal:
 # MAJOR NOTE: Majority of this code was used as a reference, and is not actually
 # directly utilized in the development of the website
 
+# Importing this module has no side effects: the spaCy model, the transcripts and the
+# annotated verb table are only loaded the first time they are used (see the lazy
+# attributes at the bottom), and pandas/spaCy are imported inside the functions that need them.
+# Run it as a script for the interactive piece, or use cli.py for batch commands.
+
 import os
 import re
-import nltk
-from nltk.tokenize import word_tokenize
-import pandas as pd
-import spacy
+from functools import lru_cache
+from chat_reader import chat_files, filter_speakers, read_chat
+from conjugator import IRREGULAR_VERBS, pretty_label
+from lexicon import load_verb_lemmas, lookup
+from pipelines import DEFAULT_PROFILE, load_pipeline
 
 # Load spacy model (make sure you've run: python -m spacy download pt_core_news_sm)
-nlp = spacy.load("pt_core_news_sm")
+# SPACY_PROFILE picks which components get loaded (see pipelines.py), we only need pos_, lemma_ and morph
+SPACY_PROFILE = DEFAULT_PROFILE
+
+def get_nlp():
+  """
+  This function loads our spaCy model on first use (load_pipeline caches it)
+  """
+  return load_pipeline(SPACY_PROFILE)
 
 # Path to your data folder inside the repo
 ROOT_DIR = os.path.dirname(__file__)   # folder where this script lives
 DATADIR = os.path.join(ROOT_DIR, "data")   # folder containing verbs.csv, bfamdl/, etc.
 
-print("Using data directory:", DATADIR)
-
 """# Read Data
 
 """
 
 #  Opens contents of the training dialougues, which are the Portuguese- ca /
 #C-ORAL-BRASIL / - files from TalkBank specifically the bfamdl files which focus on everyday familial conversation.
-def read_bfamdl_files(base_path = "bfamdl", prefix = "bfamdl", start = 1, end = 14):
+#  Our training data is the first 14 bfamdl transcripts, any other glob(s) of .cha files can be passed in instead
+TRAINING_FILES = [os.path.join(DATADIR, "bfamdl", "bfamdl0[1-9].cha"),
+                  os.path.join(DATADIR, "bfamdl", "bfamdl1[0-4].cha")]
+
+TRAINING_SPEAKERS = "PAR" #<- the participants (PAR0, PAR1, ...), not the investigators
+
+def read_bfamdl_file(path, speakers = TRAINING_SPEAKERS):
   """
-    This function iteratively reads through our first 14 bfamld transcripts, which are our training data.
+    This function lazily reads one transcript (a path, not a glob pattern) using chat_reader.py,
+    yielding one utterance (file, speaker, text, start_ms, end_ms) at a time with lowercased text.
   """
-  combined_text = "" #<- creates a massive string with our transcripts
-  for i in range(start, end + 1):
-    file_name = f"{base_path}/{prefix}{i:02d}.cha"
-    with open(os.path.join(DATADIR, file_name), 'r', encoding='utf-8') as f:
-                combined_text += f.read() + "\n"
-  return combined_text
+  for utterance in filter_speakers(read_chat(path), speakers):
+    yield utterance._replace(text = utterance.text.lower())
 
-def dialogue_cleaner (lines):
+def read_bfamdl_files(patterns = TRAINING_FILES, speakers = TRAINING_SPEAKERS):
+  """
+    This function lazily reads through the transcripts matching the glob pattern(s), one file after the other
+  """
+  for path in chat_files(patterns):
+    yield from read_bfamdl_file(path, speakers)
+
+SPEAKER_PREFIX = re.compile(r"^(\*PAR\d:)") #<- compiled once instead of on every line
+TIME_SIGNATURE = re.compile(r"\x15\d+_\d+\x15")
+
+def clean_dialogue_lines(lines):
   """
-    This function cleans up the dialogue read from our conversation transcripts removing auxillary information
+    This function cleans up raw transcript lines removing auxillary information
     as well as isolating lines with dialogue, and then cleaning them up by removing time signatures and any extra punctuation.
+    Each cleaned line (one utterance) is kept as its own list entry.
+    (read_bfamdl_files already gives clean utterances, this is kept for raw text)
 
   """
-  dialogue = [] #<- the lines of the transcrips that contain transcripts of portuguese
-  cleaned_dialogue_lines = [] #<- the lines of the transcript that are iteratively being cleaned
   complete_cleaned_dialogue_lines = [] #<- a massive list of clean dialogue lines
-  for line in lines:
-    if line.startswith("*PAR"):
-      dialogue.append(line)
-
-  for line in dialogue: #<- the following lines clean up the dialogue using regex
-    cleaned_dialogue_lines = re.sub(r"^(\*PAR\d:)", "", line)
-    cleaned_dialogue_lines = re.sub(r"\x15\d+_\d+\x15", "", cleaned_dialogue_lines)
-    cleaned_dialogue_lines = re.sub(r"\n","", cleaned_dialogue_lines)
-    cleaned_dialogue_lines = cleaned_dialogue_lines.strip()
-    cleaned_dialogue_lines = cleaned_dialogue_lines.lower()
+  for line in lines: #<- the following lines clean up the dialogue using regex
+    if not line.startswith("*PAR"):
+      continue
+    cleaned_dialogue_lines = SPEAKER_PREFIX.sub("", line)
+    cleaned_dialogue_lines = TIME_SIGNATURE.sub("", cleaned_dialogue_lines)
+    cleaned_dialogue_lines = cleaned_dialogue_lines.replace("\n", "").strip().lower()
     complete_cleaned_dialogue_lines.append(cleaned_dialogue_lines)
 
-  full_text = " ".join(complete_cleaned_dialogue_lines) #<- a version of complete_cleaned_dialogue_lines that is a string
+  return complete_cleaned_dialogue_lines
+
+def dialogue_cleaner (lines):
+  """
+    This function joins the cleaned dialogue lines (see clean_dialogue_lines) into one string
+  """
+  full_text = " ".join(clean_dialogue_lines(lines)) #<- a version of complete_cleaned_dialogue_lines that is a string
 
   return full_text
 
-cleaned_dialogue = dialogue_cleaner(read_bfamdl_files().split("\n"))
+@lru_cache(maxsize=1)
+def get_dialogue_utterances():
+  """
+  This function reads our training transcripts once, one record per utterance, with speaker and timing
+  """
+  return tuple(read_bfamdl_files())
 
 #  In: n, num of most popular verbs you want
 #  Out: list of top n most common verbs in the corpus
@@ -94,12 +125,11 @@ def get_top_verbs(n):
   """
   This function identifies the most popular verbs in our corpus using the list of most popular lemmas from the verbs.csv file (provided by the creators of the bfamld corpus)
   """
-  verb_freq = pd.read_csv(os.path.join(DATADIR, "verbs.csv"))
-  top_n_verbs = verb_freq['Lemma'].head(n).to_list()
+  top_n_verbs = list(load_verb_lemmas()[:n]) #<- verbs.csv is only read once (lexicon.py caches it)
 
   return top_n_verbs
 
-top_verbs = get_top_verbs(58) #<- the verbs with more than 100 instances in the complete corpus (as lemmas)
+TOP_VERB_COUNT = 58 #<- the verbs with more than 100 instances in the complete corpus (as lemmas)
 
 #THIS CODE: Creates a dataframe for each regular verb of all of its conjugations
 columns = [
@@ -122,91 +152,25 @@ columns = [
     '3PL-PSTImperfect'
 ]
 
-verb_endings = pd.DataFrame(columns=columns)
-
-ar_regex = r""
-
-def get_ar_endings(verb):
-  """
-  This function identifies all of the conjugations of regular ar endings
-  """
-  short = verb[:-2]   # removes -ar
-  return {
-        'Infinitive': verb,
-        '1SG-PSTSimple': short + 'ei',
-        '2SG-InfPSTSimple': short + 'aste',
-        '2SG-ForPSTSimple': short + 'ou',
-        '3SG-PSTSimple': short + 'ou',
-        '1PL-PSTSimple': short + 'amos',
-        '2PL-InfPSTSimple': short + 'astes',
-        '2PL-ForPSTSimple': short + 'aram',
-        '3PL-PSTSimple': short + 'aram',
-        '1SG-PSTImperfect': short + 'ava',
-        '2SG-InfPSTImperfect': short + 'avas',
-        '2SG-ForPSTImperfect': short + 'ava',
-        '3SG-PSTImperfect': short + 'ava',
-        '1PL-PSTImperfect': short + 'ávamos',
-        '2PL-InfPSTImperfect': short + 'áveis',
-        '2PL-ForPSTImperfect': short + 'avam',
-        '3PL-PSTImperfect': short + 'avam'
-    }
-
-def get_er_endings(verb):
-  """
-  This function identifies all of the conjugations of regular er endings
-  """
-  short = verb[:-2]   # removes -er
-  return {
-        'Infinitive': verb,
-        '1SG-PSTSimple': short + 'i',
-        '2SG-InfPSTSimple': short + 'este',
-        '2SG-ForPSTSimple': short + 'eu',
-        '3SG-PSTSimple': short + 'eu',
-        '1PL-PSTSimple': short + 'emos',
-        '2PL-InfPSTSimple': short + 'estes',
-        '2PL-ForPSTSimple': short + 'eram',
-        '3PL-PSTSimple': short + 'eram',
-        '1SG-PSTImperfect': short + 'ia',
-        '2SG-InfPSTImperfect': short + 'ias',
-        '2SG-ForPSTImperfect': short + 'ia',
-        '3SG-PSTImperfect': short + 'ia',
-        '1PL-PSTImperfect': short + 'íamos',
-        '2PL-InfPSTImperfect': short + 'íeis',
-        '2PL-ForPSTImperfect': short + 'iam',
-        '3PL-PSTImperfect': short + 'iam'
-    }
-
-def get_ir_endings(verb):
-  """
-  This function identifies all of the conjugations of regular ir endings
-  """
-  short = verb[:-2]   # removes -ir
-  return {
-      'Infinitive': verb,
-      '1SG-PSTSimple': short + 'i',
-      '2SG-InfPSTSimple': short + 'iste',
-      '2SG-ForPSTSimple': short + 'iu',
-      '3SG-PSTSimple': short + 'iu',
-      '1PL-PSTSimple': short + 'imos',
-      '2PL-InfPSTSimple': short + 'istes',
-      '2PL-ForPSTSimple': short + 'iram',
-      '3PL-PSTSimple': short + 'iram',
-      '1SG-PSTImperfect': short + 'ia',
-      '2SG-InfPSTImperfect': short + 'ias',
-      '2SG-ForPSTImperfect': short + 'ia',
-      '3SG-PSTImperfect': short + 'ia',
-      '1PL-PSTImperfect': short + 'íamos',
-      '2PL-InfPSTImperfect': short + 'íeis',
-      '2PL-ForPSTImperfect': short + 'iam',
-      '3PL-PSTImperfect': short + 'iam'
-    }
+# the forms themselves come from the bulk conjugator in paradigms.py (one vectorized pass over REGULAR_ENDINGS)
+# and are pivoted into the columns above, e.g. "2SG-Inf-PSTSimple" -> "2SG-InfPSTSimple"
+def get_verb_endings(verb_list):
+  """
+  This function builds our wide table of conjugations, one row per verb, in one shot
+  """
+  from paradigms import paradigm_table, wide_paradigm_table
+
+  wide = wide_paradigm_table(paradigm_table(verb_list))
+  wide.columns = [str(col).replace("Inf-", "Inf").replace("For-", "For") for col in wide.columns]
+  wide = wide.reindex(index=[verb.lower() for verb in verb_list], columns=columns).reset_index(drop=True)
+  wide['Infinitive'] = list(verb_list) #<- every verb keeps its row, even ones we cannot conjugate
+  return wide
 
 """#"""
 
 #The following code (as a whole cell) creates the dataframe verb_totals which is our dictionary of our top verbs (top 58, more than 100 instances)
 #This is something we are activelly hoping to expand in the final project submission
-irregular_verbs_list = ['ser', 'estar', 'ter', 'poder', 'ir', 'fazer', 'dar', 'dizer',
-                   'querer', 'saber', 'ver', 'vir', 'pôr']
+irregular_verbs_list = list(IRREGULAR_VERBS) # shared with conjugator.py
 
 # In: a list of verbs, ideally from top_verbs
 # Returns a dictionary of {verb: ending_type} for each verb
@@ -230,28 +194,27 @@ def get_verb_type(verb_list):
       known_verbs[verb] = 'irregular'
   return known_verbs
 
-  #this code creates our original regular verb dataframe
-verb_types = get_verb_type(top_verbs)
-for verb in verb_types:
-    if verb_types[verb] == 'ar':
-      verb_endings.loc[len(verb_endings)] = get_ar_endings(verb)
-    elif verb_types[verb] == 'er':
-      verb_endings.loc[len(verb_endings)] = get_er_endings(verb)
-    elif verb_types[verb] == 'ir':
-      verb_endings.loc[len(verb_endings)] = get_ir_endings(verb)
-    else:
-      verb_endings.loc[len(verb_endings)] = {'Infinitive': verb}
-
-# Creates regular and irregular data frames
-conj_cols = verb_endings.columns[1:]
-regular_verbs = verb_endings[verb_endings[conj_cols].notna().all(axis=1)]
-irregular_verbs = pd.DataFrame({
-    'Infinitive': irregular_verbs_list
-})
-#and now the dataframes are concatenated to create our overall dictionary
-#of our most common verbs in the past tense
-#^ these will be the verbs that our script will be able to supply full info for!
-verb_totals = pd.concat([regular_verbs, irregular_verbs])
+@lru_cache(maxsize=1)
+def get_verb_totals():
+  """
+  This function creates the dataframe verb_totals, our dictionary of our top verbs with expanded column names
+  """
+  import pandas as pd
+
+  verb_endings = get_verb_endings(get_top_verbs(TOP_VERB_COUNT)) #<- irregular verbs only have their Infinitive filled in
+
+  # Creates regular and irregular data frames
+  conj_cols = verb_endings.columns[1:]
+  regular_verbs = verb_endings[verb_endings[conj_cols].notna().all(axis=1)]
+  irregular_verbs = pd.DataFrame({
+      'Infinitive': irregular_verbs_list
+  })
+  #and now the dataframes are concatenated to create our overall dictionary
+  #of our most common verbs in the past tense
+  #^ these will be the verbs that our script will be able to supply full info for!
+  verb_totals = pd.concat([regular_verbs, irregular_verbs])
+  verb_totals.columns = [expand(col) for col in verb_totals.columns] #<- replaces column names with expanded names, also helps out if we need to add more in the future
+  return verb_totals
 
 person = {"1":"1st Person","2":"2nd Person","3":"3rd Person"} #<- person dictionary
 number = {"SG":"Singular","PL":"Plural"} #<- plurality dictionary
@@ -264,109 +227,153 @@ def expand(col):
   """
   if col=="Infinitive":
     return col
-  print(col)
   p,n,f,t = re.match(r"([123])(SG|PL)-(Inf|For)?PST(Simple|Imperfect)", col).groups()
   return f"{person[p]} {number[n]} {formality.get(f,'')} — {tense[t]}".replace("  "," ").strip()
 
-verb_totals.columns = [expand(col) for col in verb_totals.columns] #<- replaces column names with expanded names, also helps out if we need to add more in the future
-
 #this pair of functions is able to identify the words in our corpus and tokenize
 #them using the open source package SpaCy which also has a pre trained portuguese
 #package called pt_core_news_sm
-nlp = spacy.load("pt_core_news_sm") #<- loads our pretrained portuguese nlp
 regular_endings = ("ar", "er", "ir")
 irregular = {"ser","estar","ter","ir","vir","pôr","dizer","fazer","haver","ver","querer","saber"}
-text = cleaned_dialogue
-verbs = []
 
 
 def classify_verb(lemma):
   """
   This function identifies irregular and regular verbs
   """
-  if lemma in irregular_verbs:
+  if lemma in irregular_verbs_list: #<- (this used to test the irregular_verbs dataframe, which only checks its column names)
         return "irregular"
   if lemma.endswith(regular_endings):
         return "regular"
   return "unknown"
 
-def get_past_tense(text):
+# batching settings for spaCy: utterances per batch and worker processes (n_process=-1 uses every core)
+BATCH_SIZE = 256
+N_PROCESS = 1
+
+def get_past_tense(utterances, batch_size=BATCH_SIZE, n_process=N_PROCESS, nlp=None, prefilter=None):
   """
-  This function identifies verbs in our corpus that are in the past tense
+  This function identifies verbs in our corpus that are in the past tense.
+  The utterances (strings or chat_reader records) are streamed through nlp.pipe (see corpus.py),
+  a single string is treated as one utterance. With a prefilter (prefilter.get_prefilter()) only utterances
+  containing a known verb form are sent to spaCy
   """
-  doc = nlp(text)
-  results = []
-  for token in doc:
-    if token.pos_ == "VERB":
-      lemma = token.lemma_
-      classification = classify_verb(lemma)
-      results.append({
-        "token": token.text,
-            "lemma": lemma,
-              "classification": classification,
-              "pos": token.pos
-      })
-  df = pd.DataFrame(results)
-  return df
+  from corpus import annotate_utterances
 
-df_verbs = get_past_tense(cleaned_dialogue) #<- creates a dataframe of all the verbs in our corpus
+  if isinstance(utterances, str):
+    utterances = [utterances]
+  nlp = get_nlp() if nlp is None else nlp
+  return annotate_utterances(nlp, utterances, classify_verb, batch_size=batch_size, n_process=n_process,
+                             prefilter=prefilter)
 
-def find_conjugation(token, lemma, verb_totals):
+def get_past_tense_by_file(patterns = TRAINING_FILES, speakers = TRAINING_SPEAKERS, **kwargs):
   """
-  This function finds the conjugation of our known verbs if they are in the corpus
+  This function runs get_past_tense on every transcript matching the glob pattern(s) separately, so the
+  utterance column counts from 0 in each file, like the corpus cache (corpus_cache.build_corpus) does
   """
-  results = [] #<- initiating our list of identified conjugations (column titles)
-  rows = verb_totals[verb_totals["Infinitive"] == lemma]
-  for idx, row in rows.iterrows():
-      cols = [col for col in verb_totals.columns if row[col] == token]
-      if cols:
-          results.append({
-              "row_index": idx,
-              "columns": cols
-          })
-  return results if results else None
+  import pandas as pd
+  from corpus import META_COLUMNS, VERB_COLUMNS
+
+  tables = [get_past_tense(read_bfamdl_file(path, speakers), **kwargs) for path in chat_files(patterns)]
+  return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(columns=VERB_COLUMNS + META_COLUMNS)
+
+def find_conjugation(token, lemma):
+  """
+  This function finds the conjugation of our known verbs using the verb lexicon (lexicon.py),
+  which indexes every form of the 1,309 lemmas in verbs.csv
+  """
+  analyses = lookup(token, lemma) #<- every reading of the token for this lemma, in one dict lookup
+  if not analyses:
+    return None
+  return [{
+      "lemma": lemma,
+      "columns": [a.label for a in analyses]
+  }]
+
+#  The long-format paradigm table (paradigms.py): one row per (lemma, form, code) for every verb in verbs.csv
+@lru_cache(maxsize=1)
+def get_verb_paradigm():
+  """
+  This function builds the paradigm table and its (lemma, form) -> codes grouping once
+  """
+  from paradigms import form_codes, paradigm_table
+
+  paradigm = paradigm_table(load_verb_lemmas())
+  return paradigm, form_codes(paradigm) #<- grouped once, reused by every annotation
 
-def annotate_conjugations(df_verbs, verb_totals):
+def annotate_conjugations(df_verbs, paradigm = None):
   """
   This function annotates our verbs with their conjugations, adding a column called conjugations to df_verbs
+  holding the list of conjugation codes of each token. It is a single merge on (lemma, token) against the paradigm table
   """
-  all_conjugations = []
+  from paradigms import annotate_conjugations as annotate_with_paradigm
 
-  for _, row in df_verbs.iterrows():
-      token = row["token"]
-      lemma = row["lemma"]
+  if paradigm is None:
+    paradigm, codes = get_verb_paradigm()
+  else:
+    codes = None
+  return annotate_with_paradigm(df_verbs, paradigm, codes)
 
-      conjugations = find_conjugation(token, lemma, verb_totals)
-      all_conjugations.append(conjugations)
+# the per-file spaCy output and verb tables are cached on disk (corpus_cache.py), keyed by file content,
+# model version and SPACY_PROFILE, so only new or changed transcripts get re-annotated
+USE_CORPUS_CACHE = True
 
-  df_verbs["conjugations"] = all_conjugations
-  return df_verbs
+@lru_cache(maxsize=1)
+def get_verb_records():
+  """
+  This function finds every verb in our training transcripts once (before conjugations are added).
+  Both paths number utterances per file (the utterance column counts from 0 in every file), so rows
+  are identified by (file, utterance) whether or not the corpus cache is used
+  """
+  if USE_CORPUS_CACHE:
+    from corpus_cache import build_corpus
+
+    df_verbs, _ = build_corpus(TRAINING_FILES, get_nlp(), classify_verb, read_bfamdl_file, SPACY_PROFILE,
+                               TRAINING_SPEAKERS)
+    return df_verbs
+  return get_past_tense_by_file(TRAINING_FILES)
 
-df_verbs = annotate_conjugations(get_past_tense(cleaned_dialogue), verb_totals) #<- df verbs now has additional column, conjugations
+@lru_cache(maxsize=1)
+def get_df_verbs():
+  """
+  This function annotates our training transcripts once: every verb with its conjugations
+  """
+  return annotate_conjugations(get_verb_records().copy()) #<- df verbs now has additional column, conjugations
+
+@lru_cache(maxsize=1)
+def get_verb_table():
+  """
+  This function builds the compact version of df_verbs (verb_table.py): categorical strings, conjugations as
+  interned codes plus feature bit flags, and a token -> rows index so looking a verb up is not a full column scan
+  """
+  from verb_table import VerbTable, compact_verb_table
+
+  return VerbTable(compact_verb_table(get_verb_records(), get_verb_paradigm()[1]))
 
 def interactive_piece(verbs_df, sentence):
     """
     Identifies the lemma, classification, conjugation (if known),
     and spaCy morphological features for each verb in a novel sentence.
+    verbs_df is the compact verb table (get_verb_table), a plain df_verbs is compacted first.
     """
+    from verb_table import VerbTable, compact_verb_table
+
+    if not isinstance(verbs_df, VerbTable):
+      verbs_df = VerbTable(compact_verb_table(verbs_df, get_verb_paradigm()[1]))
     results = []
-    doc = nlp(sentence)
+    doc = get_nlp()(sentence)
 
     for token in doc:
         if token.pos_ == "VERB" or token.pos_ == "AUX":
             word_lower = token.text.lower()
 
-            # Try to match the verb in the known corpus
-            match = verbs_df[verbs_df['token'].str.lower() == word_lower]
+            # Try to match the verb in the known corpus (index lookup on the compact table)
+            row = verbs_df.first(word_lower)
 
-            if not match.empty:
-                row = match.iloc[0]
-                conjug_info = row['conjugations']
+            if row is not None:
+                conjug_info = row['conjugations'] #<- "|"-joined codes, "" when unknown
 
-                if conjug_info is None:
-                    conjugation_annotation = None
-                else:
-                    conjugation_annotation = [d['columns'][0] for d in conjug_info]
+                conjugation_annotation = [pretty_label(c) for c in conjug_info.split("|")] if conjug_info else None
             else:
                 # Verb is not in the corpus
                 conjugation_annotation = None
@@ -391,14 +398,37 @@ def interactive_piece(verbs_df, sentence):
             })
 
     return results
+
 def run_interactive_piece():
   """
   This function runs the interactive piece of the script
   """
   sentence = input("Enter a Portuguese sentence: ").strip()
-  results = interactive_piece(df_verbs, sentence)
+  results = interactive_piece(get_verb_table(), sentence)
   print("\n--- Verb Info: ---")
   for r in results:
       print(r)
 
-run_interactive_piece()
\ No newline at end of file
+# The notebook's global variables, now computed on first access (PEP 562 module __getattr__)
+_LAZY_ATTRIBUTES = {
+    "nlp": get_nlp,
+    "dialogue_utterances": get_dialogue_utterances,
+    "dialogue_lines": lambda: [u.text for u in get_dialogue_utterances()],
+    "cleaned_dialogue": lambda: " ".join(u.text for u in get_dialogue_utterances()),
+    "top_verbs": lambda: get_top_verbs(TOP_VERB_COUNT),
+    "verb_types": lambda: get_verb_type(get_top_verbs(TOP_VERB_COUNT)),
+    "verb_endings": lambda: get_verb_endings(get_top_verbs(TOP_VERB_COUNT)),
+    "verb_totals": get_verb_totals,
+    "verb_paradigm": lambda: get_verb_paradigm()[0],
+    "df_verbs": get_df_verbs,
+    "verb_table": get_verb_table,
+}
+
+def __getattr__(name):
+  if name in _LAZY_ATTRIBUTES:
+    return _LAZY_ATTRIBUTES[name]()
+  raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+if __name__ == "__main__":
+  print("Using data directory:", DATADIR)
+  run_interactive_piece()
@@ -0,0 +1,101 @@
+# Compact, typed in-memory verb table
+# Repeated strings (tokens, lemmas, classifications, files, speakers) become
+# categoricals, the set of conjugation codes of a token becomes one interned
+# category, and a token -> rows index replaces full-column string scans for
+# per-token lookups. Feature queries keep one FEATURE_FLAGS mask per code of
+# each category, so a query has to match one reading of a token, not a mix of
+# several ("venda" is 1SG and 2SG-For, but never 1st person formal).
+
+import numpy as np
+import pandas as pd
+
+from conjugator import feature_bits
+
+CATEGORY_COLUMNS = ["token", "lemma", "classification", "file", "speaker"]
+
+
+def conjugation_keys(codes):
+    """
+    Turn form_codes(paradigm) (lemma, form, list of codes) into one row per
+    (lemma, form) with the codes joined by "|".
+    This runs over the paradigm, not over the corpus tokens.
+    """
+    keys = codes[["lemma", "form"]].copy()
+    keys["conjugations"] = ["|".join(c) for c in codes["code"]]
+    return keys
+
+
+def reading_bits(conjugations: str):
+    """One uint16 of FEATURE_FLAGS bits per code of a "|"-joined conjugations value."""
+    return np.array([feature_bits(code) for code in conjugations.split("|") if code], dtype=np.uint16)
+
+
+def compact_verb_table(df_verbs, codes):
+    """
+    Return a compact copy of a verb table (corpus.VERB_COLUMNS + META_COLUMNS) with
+    its conjugations looked up from form_codes(paradigm) in a single merge.
+    `conjugations` is a categorical of "|"-joined codes ("" when unknown).
+    """
+    keys = conjugation_keys(codes)
+    lookup = pd.DataFrame({
+        "lemma": df_verbs["lemma"].str.lower().to_numpy(),
+        "form": df_verbs["token"].str.lower().to_numpy(),
+    }).merge(keys, on=["lemma", "form"], how="left")  # left merge keeps df_verbs order
+
+    table = pd.DataFrame(index=pd.RangeIndex(len(df_verbs)))
+    for column in df_verbs.columns:
+        if column == "conjugations":
+            continue
+        values = df_verbs[column].to_numpy()
+        if column in CATEGORY_COLUMNS:
+            table[column] = pd.Categorical(values)
+        elif column in ("start_ms", "end_ms"):
+            table[column] = pd.array(values, dtype="Int32")
+        elif column in ("pos", "utterance"):
+            table[column] = values.astype(np.int32)
+        else:
+            table[column] = values
+
+    table["conjugations"] = pd.Categorical(lookup["conjugations"].fillna("").to_numpy())
+    return table
+
+
+class VerbTable:
+    """A compact verb table with a prebuilt lowercase token -> row positions index."""
+
+    def __init__(self, frame):
+        self.frame = frame
+        tokens = frame["token"].astype(str).str.lower()
+        self.token_rows = tokens.groupby(tokens.to_numpy(), sort=False).indices
+        conjugations = frame["conjugations"].astype("category")
+        self.conjugation_ids = conjugations.cat.codes.to_numpy()
+        # per conjugations category: the feature bits of each of its codes (its readings)
+        self.category_bits = [reading_bits(str(value)) for value in conjugations.cat.categories]
+
+    def __len__(self):
+        return len(self.frame)
+
+    def rows(self, token: str):
+        """Every row whose token matches (case-insensitive), without scanning the column."""
+        positions = self.token_rows.get(token.lower())
+        if positions is None:
+            return self.frame.iloc[0:0]
+        return self.frame.iloc[positions]
+
+    def first(self, token: str):
+        """The first row of a token, or None."""
+        positions = self.token_rows.get(token.lower())
+        return None if positions is None else self.frame.iloc[positions[0]]
+
+    def select(self, lemma: str = None, features: int = 0):
+        """Rows of a lemma (optional) with one reading (code) having every feature bit in `features`."""
+        mask = np.ones(len(self.frame), dtype=bool)
+        if features:
+            matching = np.array([bool(((bits & features) == features).any()) for bits in self.category_bits] + [False])
+            mask = matching[self.conjugation_ids]  # code -1 (missing) picks the trailing False
+        if lemma is not None:
+            mask &= (self.frame["lemma"] == lemma).to_numpy()
+        return self.frame[mask]
+
+    def memory_usage(self):
+        return int(self.frame.memory_usage(deep=True).sum())